@@ -6,6 +6,7 @@
 from rest_framework import serializers
 from django.utils import timezone
 from .models import Announcement
+from utils.images import ImageVariantsField
 
 
 class AnnouncementSerializer(serializers.ModelSerializer):
@@ -36,13 +37,14 @@ class AnnouncementSerializer(serializers.ModelSerializer):
     author_username = serializers.CharField(source='author.username', read_only=True)
     event_title = serializers.CharField(source='event.title', read_only=True)
     image = serializers.CharField(source='cover_image', required=False, allow_null=True)
+    image_variants = ImageVariantsField(source='cover_image')
     status = serializers.SerializerMethodField()
 
     class Meta:
         model = Announcement
         fields = [
             'id', 'title', 'content', 'summary', 'announcement_type', 'priority',
-            'event', 'event_title', 'cover_image', 'image', 'attachments', 'author',
+            'event', 'event_title', 'cover_image', 'image', 'image_variants', 'attachments', 'author',
             'author_name', 'author_username', 'is_published', 'is_pinned',
             'view_count', 'publish_time', 'expire_time', 'created_at', 'updated_at', 'status'
         ]
@@ -116,12 +118,13 @@ class AnnouncementListSerializer(serializers.ModelSerializer):
     event_title = serializers.CharField(source='event.title', read_only=True)
     status = serializers.SerializerMethodField()
     image = serializers.CharField(source='cover_image', read_only=True, allow_null=True)
+    image_variants = ImageVariantsField(source='cover_image')
 
     class Meta:
         model = Announcement
         fields = [
             'id', 'title', 'summary', 'announcement_type', 'priority', 'event_title',
-            'cover_image', 'image', 'author_name', 'is_published', 'is_pinned',
+            'cover_image', 'image', 'image_variants', 'author_name', 'is_published', 'is_pinned',
             'view_count', 'publish_time', 'created_at', 'status'
         ]
 
@@ -148,12 +151,13 @@ class AnnouncementDetailSerializer(serializers.ModelSerializer):
     author_info = serializers.SerializerMethodField()
     event_info = serializers.SerializerMethodField()
     image = serializers.CharField(source='cover_image', read_only=True, allow_null=True)
+    image_variants = ImageVariantsField(source='cover_image')
 
     class Meta:
         model = Announcement
         fields = [
             'id', 'title', 'content', 'summary', 'announcement_type', 'priority',
-            'event', 'event_info', 'cover_image', 'image', 'attachments', 'author',
+            'event', 'event_info', 'cover_image', 'image', 'image_variants', 'attachments', 'author',
             'author_info', 'is_published', 'is_pinned', 'view_count',
             'publish_time', 'expire_time', 'created_at', 'updated_at'
         ]
@@ -8,12 +8,8 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
+from rest_framework.filters import OrderingFilter
 from django.utils import timezone
-import os
-import uuid
-from datetime import datetime
-from django.conf import settings
 
 from .models import Announcement
 from .serializers import (
@@ -22,6 +18,10 @@ from .serializers import (
     AnnouncementDetailSerializer
 )
 from utils.permissions import IsAdmin, IsOwnerOrAdmin
+from utils.hit_counter import HitCounter
+from utils.conditional import conditional_get, queryset_validators
+from utils.images import save_public_image
+from apps.search.filters import RankedSearchFilter
 
 
 class AnnouncementViewSet(viewsets.ModelViewSet):
@@ -52,7 +52,8 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
     """
     queryset = Announcement.objects.select_related('author', 'event').all()
     serializer_class = AnnouncementSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    # 排序过滤器在前，搜索时按相关度排序（指定 ?ordering= 时除外）
+    filter_backends = [DjangoFilterBackend, OrderingFilter, RankedSearchFilter]
     filterset_fields = ['announcement_type', 'priority', 'is_published', 'is_pinned', 'event']
     search_fields = ['title', 'content']
     ordering_fields = ['created_at', 'publish_time', 'priority', 'is_pinned']
@@ -112,26 +113,37 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
         
         业务逻辑:
             - 返回公告完整信息
-            - 自动增加浏览次数统计
+            - 自动增加浏览次数统计（缓冲计数，定期批量写回数据库）
         """
         instance = self.get_object()
-        instance.view_count += 1
-        instance.save(update_fields=['view_count'])
+        # 浏览增量写入缓冲计数器，读取时合并未刷新的增量
+        counter = HitCounter(Announcement, 'view_count')
+        counter.increment(instance.pk)
+        instance.view_count = counter.total(instance)
         serializer = self.get_serializer(instance)
         return Response(serializer.data)
 
+    def get_published_queryset(self):
+        """已发布且未过期的公告"""
+        now = timezone.now()
+        return self.queryset.filter(
+            is_published=True
+        ).filter(
+            models.Q(expire_time__isnull=True) | models.Q(expire_time__gte=now)
+        )
+
+    def get_published_validators(self, request):
+        """已发布公告列表的条件请求校验值"""
+        return queryset_validators(self.get_published_queryset(), counters=('view_count',))
+
     @action(detail=False, methods=['get'])
+    @conditional_get('get_published_validators', max_age=60)
     def published(self, request):
         """
         获取已发布的公告
         GET /api/announcements/published/
         """
-        now = timezone.now()
-        announcements = self.queryset.filter(
-            is_published=True
-        ).filter(
-            models.Q(expire_time__isnull=True) | models.Q(expire_time__gte=now)
-        ).order_by('-is_pinned', '-publish_time')
+        announcements = self.get_published_queryset().order_by('-is_pinned', '-publish_time')
 
         serializer = AnnouncementListSerializer(announcements, many=True)
         return Response(serializer.data)
@@ -226,8 +238,8 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
         功能说明:
             - 支持jpg、png、gif、webp格式
             - 文件大小限制5MB
-            - 自动生成唯一文件名
-            - 保存到前端public目录
+            - 按内容哈希命名，重复上传同一图片只保存一份
+            - 保存到前端public目录，后台生成 WebP / JPEG 缩略图
             
         参数:
             - file: 图片文件
@@ -258,20 +270,7 @@ class AnnouncementViewSet(viewsets.ModelViewSet):
                 'error': '图片大小不能超过 5MB'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        random_str = str(uuid.uuid4())[:8]
-        extension = image_file.name.split('.')[-1]
-        filename = f'announcement_{timestamp}_{random_str}.{extension}'
-
-        frontend_public_dir = os.path.join(settings.BASE_DIR, '..', 'frontend', 'public', 'images', 'announcements')
-        os.makedirs(frontend_public_dir, exist_ok=True)
-
-        file_path = os.path.join(frontend_public_dir, filename)
-        with open(file_path, 'wb+') as destination:
-            for chunk in image_file.chunks():
-                destination.write(chunk)
-
-        relative_path = f'/images/announcements/{filename}'
+        relative_path = save_public_image(image_file, 'announcements', 'announcement')
 
         return Response({
             'message': '图片上传成功',
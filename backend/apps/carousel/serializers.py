@@ -5,6 +5,7 @@
 """
 from rest_framework import serializers
 from .models import Carousel
+from utils.images import ImageVariantsField
 
 
 class CarouselSerializer(serializers.ModelSerializer):
@@ -20,11 +21,12 @@ class CarouselSerializer(serializers.ModelSerializer):
     """
     creator_name = serializers.CharField(source='creator.real_name', read_only=True)
     event_title = serializers.CharField(source='event.title', read_only=True)
+    image_variants = ImageVariantsField(source='image')
 
     class Meta:
         model = Carousel
         fields = [
-            'id', 'title', 'description', 'image', 'link_url', 'event',
+            'id', 'title', 'description', 'image', 'image_variants', 'link_url', 'event',
             'event_title', 'position', 'order', 'is_active', 'start_time',
             'end_time', 'click_count', 'creator', 'creator_name',
             'created_at', 'updated_at'
@@ -45,10 +47,11 @@ class CarouselListSerializer(serializers.ModelSerializer):
     只包含展示必要的字段
     """
     event_title = serializers.CharField(source='event.title', read_only=True)
+    image_variants = ImageVariantsField(source='image')
 
     class Meta:
         model = Carousel
         fields = [
-            'id', 'title', 'image', 'link_url', 'event_title',
+            'id', 'title', 'image', 'image_variants', 'link_url', 'event_title',
             'position', 'order', 'is_active', 'created_at'
         ]
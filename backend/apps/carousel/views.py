@@ -15,6 +15,9 @@ from django.db.models import Q
 from .models import Carousel
 from .serializers import CarouselSerializer, CarouselListSerializer
 from utils.permissions import IsAdmin, IsOwnerOrAdmin
+from utils.hit_counter import HitCounter
+from utils.conditional import conditional_get, queryset_validators
+from utils.images import save_public_image
 
 
 class CarouselViewSet(viewsets.ModelViewSet):
@@ -89,20 +92,29 @@ class CarouselViewSet(viewsets.ModelViewSet):
             Q(end_time__isnull=True) | Q(end_time__gte=now)
         )
 
-    @action(detail=False, methods=['get'])
-    def active(self, request):
-        """
-        获取所有活动的轮播图
-        GET /api/carousels/active/
-        """
+    def get_active_queryset(self):
+        """已启用且在有效期内的轮播图"""
         now = timezone.now()
-        carousels = self.queryset.filter(
+        return self.queryset.filter(
             is_active=True
         ).filter(
             Q(start_time__isnull=True) | Q(start_time__lte=now)
         ).filter(
             Q(end_time__isnull=True) | Q(end_time__gte=now)
-        ).order_by('order')
+        )
+
+    def get_active_validators(self, request):
+        """活动轮播图列表的条件请求校验值"""
+        return queryset_validators(self.get_active_queryset())
+
+    @action(detail=False, methods=['get'])
+    @conditional_get('get_active_validators', max_age=300)
+    def active(self, request):
+        """
+        获取所有活动的轮播图
+        GET /api/carousels/active/
+        """
+        carousels = self.get_active_queryset().order_by('order')
 
         serializer = CarouselListSerializer(carousels, many=True)
         return Response(serializer.data)
@@ -135,12 +147,12 @@ class CarouselViewSet(viewsets.ModelViewSet):
         POST /api/carousels/{id}/click/
         """
         carousel = self.get_object()
-        carousel.click_count += 1
-        carousel.save(update_fields=['click_count'])
+        counter = HitCounter(Carousel, 'click_count')
+        counter.increment(carousel.pk)
 
         return Response({
             'message': '点击统计已更新',
-            'click_count': carousel.click_count
+            'click_count': counter.total(carousel)
         })
 
     @action(detail=True, methods=['put'])
@@ -179,9 +191,6 @@ class CarouselViewSet(viewsets.ModelViewSet):
         上传轮播图图片到前端public目录
         POST /api/carousels/upload_image/
         """
-        import os
-        from django.conf import settings
-
         # el-upload 默认使用 'file' 字段名
         if 'file' not in request.FILES and 'image' not in request.FILES:
             return Response({
@@ -203,26 +212,8 @@ class CarouselViewSet(viewsets.ModelViewSet):
                 'error': '图片大小不能超过 5MB'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # 生成唯一文件名
-        import uuid
-        from datetime import datetime
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        random_str = str(uuid.uuid4())[:8]
-        extension = image_file.name.split('.')[-1]
-        filename = f'carousel_{timestamp}_{random_str}.{extension}'
-
-        # 前端 public 目录路径
-        frontend_public_dir = os.path.join(settings.BASE_DIR, '..', 'frontend', 'public', 'images', 'carousel')
-        os.makedirs(frontend_public_dir, exist_ok=True)
-
-        # 保存文件
-        file_path = os.path.join(frontend_public_dir, filename)
-        with open(file_path, 'wb+') as destination:
-            for chunk in image_file.chunks():
-                destination.write(chunk)
-
-        # 返回相对路径
-        relative_path = f'/images/carousel/{filename}'
+        # 按内容哈希命名保存到前端 public 目录，缩略图在后台生成
+        relative_path = save_public_image(image_file, 'carousel', 'carousel')
 
         return Response({
             'message': '图片上传成功',
@@ -5,3 +5,7 @@ class EventsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.events'
     verbose_name = '赛事管理'
+
+    def ready(self):
+        # 注册列表快照失效的信号处理器
+        import apps.events.signals
@@ -0,0 +1,125 @@
+"""
+赛事归档导出
+
+GET /api/events/{id}/archive/ 把赛事的报名名单和各轮次（初赛、半决赛、决赛）成绩
+写入同一个多工作表的 xlsx 文件：
+    - 各工作表通过 values_list() + iterator() 分批读取，以 openpyxl write_only 模式写入
+    - 工作表内不再重复赛事名称，不关联 Event 表
+    - 生成的文件保存在 MEDIA_ROOT/exports/archives/，文件名包含赛事和数据版本的哈希，
+      赛事、报名或成绩的任何一行发生变化前，重复请求直接返回已生成的文件
+"""
+import hashlib
+import json
+import os
+import tempfile
+
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db.models import F
+from openpyxl import Workbook
+
+from apps.exports.jobs import get_data_version
+from apps.registrations.models import Registration
+from apps.results.models import Result
+from apps.results.scoring import directed_score
+from utils.export import append_xlsx_sheet, iter_export_rows
+
+
+ARCHIVE_DIR = 'exports/archives'
+
+ARCHIVE_REGISTRATION_FIELDS = [
+    'registration_number', 'participant_name', 'user.username', 'participant_gender',
+    'participant_birth_date', 'participant_id_card', 'participant_phone',
+    'participant_organization', 'status', 'created_at',
+]
+ARCHIVE_REGISTRATION_HEADERS = [
+    '报名编号', '参赛者', '用户名', '性别', '出生日期', '身份证', '手机号', '单位', '审核状态', '报名时间',
+]
+ARCHIVE_RESULT_FIELDS = [
+    'rank', 'registration.registration_number', 'registration.participant_name', 'user.username',
+    'score', 'score_unit', 'award', 'created_at',
+]
+ARCHIVE_RESULT_HEADERS = ['排名', '报名编号', '参赛者', '用户名', '成绩', '成绩单位', '奖项', '录入时间']
+
+
+def get_archive_version(event):
+    """
+    赛事归档的数据版本
+
+    由赛事的修改时间和报名、成绩的 [行数, 最大ID, 最近修改时间] 组成，
+    任何一行新增、修改或删除都会改变版本；
+    批量 update() 不会触发 auto_now，必须同时更新 updated_at（如报名批量审核）
+    """
+    return [
+        event.updated_at,
+        get_data_version(Registration.objects.filter(event=event)),
+        get_data_version(Result.objects.filter(event=event)),
+    ]
+
+
+def get_archive_name(event):
+    """当前数据版本对应的存储文件名"""
+    raw = json.dumps([event.id, get_archive_version(event)], default=str)
+    digest = hashlib.sha256(raw.encode('utf-8')).hexdigest()[:32]
+    return f'{ARCHIVE_DIR}/event_{event.id}_{digest}.xlsx'
+
+
+def write_event_archive(event, file):
+    """
+    写入赛事归档工作簿
+
+    参数:
+        event: 赛事对象
+        file: 以二进制方式打开的可写文件对象
+    """
+    workbook = Workbook(write_only=True)
+
+    registrations = Registration.objects.filter(event=event).order_by('created_at', 'id')
+    append_xlsx_sheet(
+        workbook, '报名名单',
+        iter_export_rows(registrations, ARCHIVE_REGISTRATION_FIELDS), ARCHIVE_REGISTRATION_HEADERS
+    )
+
+    for round_type, title in Result.STATUS_CHOICES:
+        # 按排名、数值成绩排序，未排名和无法解析的成绩在后
+        results = Result.objects.filter(event=event, round_type=round_type).order_by(
+            F('rank').asc(nulls_last=True), directed_score().asc(nulls_last=True), 'id'
+        )
+        append_xlsx_sheet(workbook, title, iter_export_rows(results, ARCHIVE_RESULT_FIELDS), ARCHIVE_RESULT_HEADERS)
+
+    workbook.save(file)
+
+
+def remove_stale_archives(event_id, keep):
+    """删除赛事旧版本的归档文件"""
+    if not default_storage.exists(ARCHIVE_DIR):
+        return
+    prefix = f'event_{event_id}_'
+    for filename in default_storage.listdir(ARCHIVE_DIR)[1]:
+        name = f'{ARCHIVE_DIR}/{filename}'
+        if filename.startswith(prefix) and name != keep:
+            default_storage.delete(name)
+
+
+def get_event_archive(event):
+    """
+    获取赛事归档文件，数据变化后才重新生成
+
+    参数:
+        event: 赛事对象
+
+    返回:
+        str: 归档文件的存储名称
+    """
+    name = get_archive_name(event)
+    if default_storage.exists(name):
+        return name
+
+    with tempfile.TemporaryFile() as file:
+        write_event_archive(event, file)
+        file.seek(0)
+        # 并发请求可能已生成同一版本的文件
+        if not default_storage.exists(name):
+            default_storage.save(name, File(file, name=os.path.basename(name)))
+    remove_stale_archives(event.id, keep=name)
+    return name
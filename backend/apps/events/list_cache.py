@@ -0,0 +1,95 @@
+"""
+公开赛事列表快照缓存
+
+首页的推荐、即将开始、进行中、可报名赛事列表被所有匿名访客频繁访问，
+每次都执行带报名统计的完整查询代价较高。本模块把序列化后的结果缓存为快照：
+    - 赛事或报名发生变化时，通过信号递增版本号使所有快照失效
+    - 快照的过期时间不超过下一个会改变列表成员的时间点
+      （最近的开始时间、结束时间、报名开始时间、报名截止时间）
+"""
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Min, Q
+from django.utils import timezone
+
+
+SNAPSHOT_VERSION_KEY = 'events:snapshots:version'
+# 边界时间字段：任何一个到达都可能改变列表成员或展示状态
+BOUNDARY_FIELDS = ('start_time', 'end_time', 'registration_start', 'registration_end')
+
+
+def get_snapshot_ttl():
+    """快照的最长缓存时间（秒）"""
+    return getattr(settings, 'EVENT_SNAPSHOT_TTL', 300)
+
+
+def get_snapshot_version():
+    """
+    获取当前快照版本号
+
+    版本号以毫秒时间戳初始化，缓存被淘汰后重新生成的版本号
+    不会与旧快照重复
+    """
+    version = cache.get(SNAPSHOT_VERSION_KEY)
+    if version is None:
+        cache.add(SNAPSHOT_VERSION_KEY, int(time.time() * 1000), timeout=None)
+        version = cache.get(SNAPSHOT_VERSION_KEY)
+    return version
+
+
+def invalidate_event_snapshots():
+    """使所有公开赛事列表快照失效"""
+    try:
+        cache.incr(SNAPSHOT_VERSION_KEY)
+    except ValueError:
+        cache.set(SNAPSHOT_VERSION_KEY, int(time.time() * 1000), timeout=None)
+
+
+def seconds_until_next_boundary(now=None):
+    """
+    计算距离下一个时间边界的秒数
+
+    只统计已发布和进行中的赛事；没有未来边界时返回 None
+
+    参数:
+        now: 当前时间，默认为 timezone.now()
+    """
+    from .models import Event
+
+    now = now or timezone.now()
+    boundaries = Event.objects.filter(status__in=['published', 'ongoing']).aggregate(**{
+        field: Min(field, filter=Q(**{f'{field}__gt': now}))
+        for field in BOUNDARY_FIELDS
+    })
+    upcoming = [value for value in boundaries.values() if value is not None]
+    if not upcoming:
+        return None
+    return max(1, math.ceil((min(upcoming) - now).total_seconds()))
+
+
+def get_event_snapshot(name, build):
+    """
+    读取或生成列表快照
+
+    参数:
+        name: 快照名称，如 'featured'、'upcoming'
+        build: 无参可调用对象，返回可缓存的序列化数据（list）
+
+    返回:
+        list: 序列化后的赛事列表
+    """
+    key = f'events:snapshot:{name}:{get_snapshot_version()}'
+    data = cache.get(key)
+    if data is not None:
+        return data
+
+    data = list(build())
+    timeout = get_snapshot_ttl()
+    boundary = seconds_until_next_boundary()
+    if boundary is not None:
+        timeout = min(timeout, boundary)
+    cache.set(key, data, timeout=timeout)
+    return data
@@ -0,0 +1,103 @@
+"""
+分页性能基准测试
+
+对比页码分页（COUNT + OFFSET）与游标分页（键集 WHERE 条件）
+在第 1 页和深页（默认第 500 页）上的查询耗时：
+    python manage.py benchmark_pagination
+    python manage.py benchmark_pagination --target registrations --page 500 --page-size 20 --repeat 10
+
+游标分页的深页游标由对应位置的记录直接生成（不计入耗时），
+相当于客户端已经一路翻到该页
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from utils.pagination import CursorOrPageNumberPagination
+
+
+def get_targets():
+    """可测试的列表接口及其查询集（与对应视图集保持一致）"""
+    from apps.events.views import EventViewSet
+    from apps.interactions.views import CommentViewSet
+    from apps.registrations.views import RegistrationViewSet
+    from apps.results.views import ResultViewSet
+
+    return {
+        'registrations': RegistrationViewSet.queryset,
+        'results': ResultViewSet.queryset,
+        'comments': CommentViewSet.queryset,
+        'events': EventViewSet.queryset,
+    }
+
+
+class Command(BaseCommand):
+    help = '对比页码分页与游标分页在第 1 页和深页上的耗时'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--target', choices=['registrations', 'results', 'comments', 'events'],
+                            action='append', help='要测试的列表，可重复指定，默认全部')
+        parser.add_argument('--page', type=int, default=500, help='深页页码，默认500')
+        parser.add_argument('--page-size', type=int, default=20, help='每页数量，默认20')
+        parser.add_argument('--repeat', type=int, default=5, help='每项重复次数，取中位数，默认5')
+
+    def handle(self, *args, **options):
+        targets = get_targets()
+        names = options['target'] or list(targets)
+        page_size = options['page_size']
+        deep_page = options['page']
+
+        for name in names:
+            queryset = targets[name].all()
+            self.stdout.write(self.style.MIGRATE_HEADING(f'{name}:'))
+            for page in (1, deep_page):
+                cursor = self.cursor_for_page(queryset, page, page_size)
+                if cursor is False:
+                    self.stdout.write(f'  第 {page} 页: 数据不足，跳过')
+                    continue
+                offset_ms = self.measure(options['repeat'], lambda: self.offset_page(queryset, page, page_size))
+                cursor_ms = self.measure(options['repeat'], lambda: self.cursor_page(queryset, cursor, page_size))
+                self.stdout.write(
+                    f'  第 {page} 页: 页码分页 {offset_ms:.2f} ms，游标分页 {cursor_ms:.2f} ms'
+                )
+
+    def measure(self, repeat, func):
+        """执行若干次并返回耗时中位数（毫秒）"""
+        timings = []
+        for _ in range(max(1, repeat)):
+            start = time.perf_counter()
+            func()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def build_request(self, params):
+        return Request(APIRequestFactory().get('/', params))
+
+    def offset_page(self, queryset, page, page_size):
+        paginator = CursorOrPageNumberPagination()
+        request = self.build_request({'page': page, 'page_size': page_size})
+        # 与接口一致：COUNT(*) 加 OFFSET 取数
+        paginator.paginate_queryset(queryset.order_by('-created_at', '-id'), request)
+
+    def cursor_page(self, queryset, cursor, page_size):
+        paginator = CursorOrPageNumberPagination()
+        request = self.build_request({'cursor': cursor, 'page_size': page_size})
+        paginator.paginate_queryset(queryset, request)
+
+    def cursor_for_page(self, queryset, page, page_size):
+        """
+        生成指向指定页的游标
+
+        返回:
+            str: 游标；第 1 页为空字符串；数据不足时返回 False
+        """
+        if page == 1:
+            return ''
+        index = (page - 1) * page_size - 1
+        rows = list(queryset.order_by('-created_at', '-id')[index:index + 1])
+        if not rows:
+            return False
+        return CursorOrPageNumberPagination().make_cursor(rows[0])
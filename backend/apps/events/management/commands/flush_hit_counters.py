@@ -0,0 +1,23 @@
+"""
+刷新浏览/点击计数器
+
+把缓存中累积的赛事浏览、公告浏览、轮播图点击增量批量写回数据库
+建议通过 cron 或进程管理工具定期执行：
+    python manage.py flush_hit_counters
+"""
+from django.core.management.base import BaseCommand
+
+from utils.hit_counter import flush_all
+
+
+class Command(BaseCommand):
+    help = '把缓冲的浏览/点击增量批量写回数据库'
+
+    def handle(self, *args, **options):
+        flushed = flush_all()
+        if not flushed:
+            self.stdout.write('没有待刷新的计数')
+            return
+        for name, amount in flushed.items():
+            self.stdout.write(f'{name}: +{amount}')
+        self.stdout.write(self.style.SUCCESS('计数刷新完成'))
@@ -0,0 +1,54 @@
+"""
+补生成图片缩略图
+
+为已有的赛事封面、公告封面、轮播图和用户头像生成 WebP / JPEG 缩略图：
+    python manage.py generate_image_variants
+    python manage.py generate_image_variants --workers 4 --force
+
+已生成的尺寸会被跳过（--force 时重新生成）；外部链接和缺失的原图会被忽略
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from utils.images import generate_variants
+
+
+def get_image_sources():
+    """需要生成缩略图的 (模型, 图片字段) 列表"""
+    from apps.announcements.models import Announcement
+    from apps.carousel.models import Carousel
+    from apps.events.models import Event
+    from apps.users.models import User
+
+    return [
+        (Event, 'cover_image'),
+        (Announcement, 'cover_image'),
+        (Carousel, 'image'),
+        (User, 'avatar'),
+    ]
+
+
+class Command(BaseCommand):
+    help = '为已上传的图片补生成各尺寸缩略图'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=2, help='并行处理的线程数，默认2')
+        parser.add_argument('--force', action='store_true', help='重新生成已存在的缩略图')
+
+    def handle(self, *args, **options):
+        paths = set()
+        for model, field in get_image_sources():
+            paths.update(
+                model.objects.exclude(**{f'{field}__isnull': True}).exclude(**{field: ''})
+                .values_list(field, flat=True).distinct()
+            )
+
+        force = options['force']
+        with ThreadPoolExecutor(max_workers=max(1, options['workers'])) as executor:
+            generated = list(executor.map(lambda path: generate_variants(path, force=force), sorted(paths)))
+
+        processed = sum(1 for count in generated if count)
+        self.stdout.write(self.style.SUCCESS(
+            f'共 {len(paths)} 张图片，为 {processed} 张生成了 {sum(generated)} 个缩略图文件'
+        ))
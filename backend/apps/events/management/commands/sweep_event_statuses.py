@@ -0,0 +1,19 @@
+"""
+推进赛事状态
+
+把已到开始时间的赛事改为进行中、已过结束时间的赛事改为已结束
+建议通过 cron 每分钟执行一次：
+    python manage.py sweep_event_statuses
+"""
+from django.core.management.base import BaseCommand
+
+from apps.events.status_sweeper import sweep_event_statuses
+
+
+class Command(BaseCommand):
+    help = '按开始/结束时间推进赛事状态（published → ongoing → finished）'
+
+    def handle(self, *args, **options):
+        result = sweep_event_statuses()
+        self.stdout.write(f"进行中: +{result['ongoing']}，已结束: +{result['finished']}")
+        self.stdout.write(self.style.SUCCESS('赛事状态推进完成'))
@@ -0,0 +1,31 @@
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_approved_count(apps, schema_editor):
+    """按现有报名记录初始化已通过人数"""
+    Event = apps.get_model('events', 'Event')
+    Registration = apps.get_model('registrations', 'Registration')
+    counts = Registration.objects.filter(status='approved')\
+        .values('event_id').annotate(total=Count('id')).order_by()
+    events = []
+    for row in counts:
+        events.append(Event(id=row['event_id'], approved_count=row['total']))
+    Event.objects.bulk_update(events, ['approved_count'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_keyset_pagination_index'),
+        ('registrations', '0003_keyset_pagination_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='approved_count',
+            field=models.IntegerField(default=0, help_text='由报名审核流程增量维护，可通过 reconcile_event_counters 命令校正', verbose_name='已通过报名人数'),
+        ),
+        migrations.RunPython(populate_approved_count, migrations.RunPython.noop),
+    ]
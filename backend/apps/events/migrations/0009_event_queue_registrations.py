@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0008_event_status_end_time_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='queue_registrations',
+            field=models.BooleanField(default=False, help_text='热门赛事开启后，报名请求先进入排队，由后台按提交顺序处理', verbose_name='排队报名'),
+        ),
+    ]
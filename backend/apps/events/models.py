@@ -1,7 +1,8 @@
 from django.db import models
 from django.conf import settings
 from apps.results.models import Result
-from django.utils import timezone
+
+from .status_sweeper import resolve_status
 
 
 class Event(models.Model):
@@ -21,6 +22,7 @@ class Event(models.Model):
         - status: 赛事状态，影响赛事的可见性和报名
         - max_participants: 最大参赛人数，0表示不限制
         - current_participants: 当前报名人数，由报名系统更新
+        - approved_count: 已通过审核的报名人数，由报名系统增量维护
         - is_featured: 是否推荐到首页展示
         
     数据表名: event
@@ -105,6 +107,11 @@ class Event(models.Model):
         default=0,
         verbose_name='当前报名人数'
     )
+    approved_count = models.IntegerField(
+        default=0,
+        verbose_name='已通过报名人数',
+        help_text='由报名审核流程增量维护，可通过 reconcile_event_counters 命令校正'
+    )
     registration_fee = models.DecimalField(
         max_digits=10,
         decimal_places=2,
@@ -161,6 +168,11 @@ class Event(models.Model):
         verbose_name='是否推荐',
         help_text='推荐到首页展示'
     )
+    queue_registrations = models.BooleanField(
+        default=False,
+        verbose_name='排队报名',
+        help_text='热门赛事开启后，报名请求先进入排队，由后台按提交顺序处理'
+    )
     created_at = models.DateTimeField(
         auto_now_add=True,
         verbose_name='创建时间'
@@ -175,16 +187,13 @@ class Event(models.Model):
         """
         动态展示状态属性
         
-        根据赛事的结束时间自动判断实际状态
-        如果赛事标记为published或ongoing，但结束时间已过，
-        则自动返回finished状态
+        状态由定时推进（sweep_event_statuses）写回数据库，通常直接返回存储的状态；
+        尚未推进的赛事按开始/结束时间兜底修正为ongoing或finished
         
         返回:
             str: 赛事的实际展示状态
         """
-        if self.status in ('published', 'ongoing') and self.end_time and timezone.now() > self.end_time:
-            return 'finished'
-        return self.status
+        return resolve_status(self.status, self.start_time, self.end_time)
 
     class Meta:
         db_table = 'event'
@@ -196,12 +205,35 @@ class Event(models.Model):
             models.Index(fields=['status', '-created_at']),  # 状态和时间组合查询
             models.Index(fields=['event_type']),              # 按类型查询
             models.Index(fields=['start_time']),              # 按开始时间排序
+            models.Index(fields=['-created_at', '-id']),      # 键集分页的稳定排序
+            models.Index(fields=['status', 'end_time']),      # 状态推进及已结束兜底查询
         ]
     
+    # 由报名流程（registrations/counters.py）和点击计数器以 F() 增量维护的字段
+    COUNTER_FIELDS = ('current_participants', 'approved_count', 'view_count')
+
     def __str__(self):
         """字符串表示：返回赛事标题"""
         return self.title
 
+    def save(self, *args, **kwargs):
+        """
+        保存赛事时按时间推进状态
+
+        保证新写入的状态与时间一致，定时推进只需处理之后跨过时间边界的赛事；
+        修改已有赛事时不写回 COUNTER_FIELDS，避免用内存中的旧值覆盖并发的 F() 增量，
+        需要修改计数时显式传入 update_fields
+        """
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or 'status' in update_fields:
+            self.status = resolve_status(self.status, self.start_time, self.end_time)
+        if update_fields is None and not self._state.adding and not args and not kwargs.get('force_insert'):
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
 
 class EventAssignment(models.Model):
     """
@@ -0,0 +1,73 @@
+"""
+裁判可访问赛事缓存
+
+成绩、报名的裁判接口在一次请求中可能多次需要当前裁判被分配的赛事ID
+（权限校验、查询过滤、导出等），每次都查询 RefereeEventAccess 代价不小：
+    - 同一请求内只计算一次（记录在 request 对象上）
+    - 跨请求按裁判缓存 REFEREE_ACCESS_CACHE_TTL 秒
+    - 分配关系变化时（信号、RefereeEventAccessViewSet.assign）立即失效
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from .models import RefereeEventAccess
+
+
+REFEREE_EVENTS_KEY = 'events:referee:{referee_id}:event_ids'
+REQUEST_MEMO_ATTR = '_referee_event_ids'
+
+
+def get_referee_access_ttl():
+    """跨请求缓存时间（秒）"""
+    return getattr(settings, 'REFEREE_ACCESS_CACHE_TTL', 300)
+
+
+def referee_events_key(referee_id):
+    return REFEREE_EVENTS_KEY.format(referee_id=referee_id)
+
+
+def get_referee_event_ids(user, request=None):
+    """
+    获取裁判被分配的赛事ID列表
+
+    参数:
+        user: 当前用户
+        request: 当前请求（可选），提供时在请求内复用结果
+
+    返回:
+        list: 赛事ID列表；用户不是裁判时返回 None（不受限制）
+    """
+    if not (user and user.is_authenticated and user.user_type == 'referee'):
+        return None
+
+    memo = getattr(request, REQUEST_MEMO_ATTR, None) if request is not None else None
+    if memo is not None and memo[0] == user.id:
+        return list(memo[1])
+
+    key = referee_events_key(user.id)
+    event_ids = cache.get(key)
+    if event_ids is None:
+        event_ids = list(RefereeEventAccess.objects.filter(referee=user).values_list('event_id', flat=True))
+        cache.set(key, event_ids, timeout=get_referee_access_ttl())
+
+    if request is not None:
+        setattr(request, REQUEST_MEMO_ATTR, (user.id, event_ids))
+    return list(event_ids)
+
+
+def invalidate_referee_event_ids(referee_ids):
+    """
+    使裁判的可访问赛事缓存失效
+
+    参数:
+        referee_ids: 裁判ID或裁判ID集合
+    """
+    if isinstance(referee_ids, int):
+        referee_ids = [referee_ids]
+    keys = [referee_events_key(referee_id) for referee_id in set(referee_ids)]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    # 事务提交前其他请求可能读到旧的分配关系并重新写入缓存，提交后再删除一次
+    transaction.on_commit(lambda: cache.delete_many(keys))
@@ -3,10 +3,12 @@
 """
 from rest_framework import serializers
 from .models import Event, EventAssignment, RefereeEventAccess
-from apps.interactions.models import Favorite
+from .user_flags import USER_FLAGS_CONTEXT_KEY, resolve_event_user_flags
+from utils.fieldsets import SparseFieldsetSerializerMixin
+from utils.images import ImageVariantsField
 
 
-class EventSerializer(serializers.ModelSerializer):
+class EventSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """
     赛事基础序列化器
     
@@ -16,6 +18,7 @@ class EventSerializer(serializers.ModelSerializer):
     额外字段:
         - organizer_name: 组织者真实姓名（只读）
         - organizer_username: 组织者用户名（只读）
+        - cover_image_variants: 封面各尺寸缩略图地址（只读，尚未生成时为 null）
     
     只读字段:
         - id: 赛事ID，系统自动生成
@@ -27,16 +30,18 @@ class EventSerializer(serializers.ModelSerializer):
     """
     organizer_name = serializers.CharField(source='organizer.real_name', read_only=True)
     organizer_username = serializers.CharField(source='organizer.username', read_only=True)
+    cover_image_variants = ImageVariantsField(source='cover_image')
 
     class Meta:
         model = Event
         fields = [
-            'id', 'title', 'description', 'cover_image', 'event_type', 'level',
+            'id', 'title', 'description', 'cover_image', 'cover_image_variants', 'event_type', 'level',
             'status', 'location', 'start_time', 'end_time', 'registration_start',
             'registration_end', 'max_participants', 'current_participants',
             'registration_fee', 'rules', 'requirements', 'prizes', 'organizer',
             'organizer_name', 'organizer_username', 'contact_person',
             'contact_phone', 'contact_email', 'view_count', 'is_featured',
+            'queue_registrations',
             'created_at', 'updated_at'
         ]
         read_only_fields = [
@@ -58,7 +63,63 @@ class EventSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class EventListSerializer(serializers.ModelSerializer):
+class EventUserFlagsMixin:
+    """
+    赛事用户状态字段混入类
+
+    为列表和详情序列化器提供 is_registered、is_liked、is_favorited 的取值逻辑
+    视图会预先按页面批量解析状态并放入 context[USER_FLAGS_CONTEXT_KEY]，
+    这里只做集合查找；未提供时（如其他模块直接使用序列化器）
+    才回退为针对单个赛事的查询
+    """
+
+    def get_user_flags(self, obj):
+        """
+        获取当前用户的交互状态
+
+        返回:
+            EventUserFlags: 预先解析的批量结果，或单个赛事的回退结果
+        """
+        flags = self.context.get(USER_FLAGS_CONTEXT_KEY)
+        if flags is not None:
+            return flags
+        # 回退结果按赛事缓存，保证三个字段共用同一次解析
+        fallback = self.__dict__.setdefault('_fallback_user_flags', {})
+        if obj.id not in fallback:
+            request = self.context.get('request')
+            user = request.user if request else None
+            fallback[obj.id] = resolve_event_user_flags(user, [obj.id])
+        return fallback[obj.id]
+
+    def get_is_registered(self, obj):
+        """
+        判断当前用户是否已报名该赛事（待审核或已通过）
+
+        返回:
+            bool: 已报名返回True，否则返回False
+        """
+        return self.get_user_flags(obj).is_registered(obj.id)
+
+    def get_is_liked(self, obj):
+        """
+        判断当前用户是否已点赞该赛事
+
+        返回:
+            bool: 已点赞返回True，否则返回False
+        """
+        return self.get_user_flags(obj).is_liked(obj.id)
+
+    def get_is_favorited(self, obj):
+        """
+        判断当前用户是否已收藏该赛事
+
+        返回:
+            bool: 已收藏返回True，否则返回False
+        """
+        return self.get_user_flags(obj).is_favorited(obj.id)
+
+
+class EventListSerializer(SparseFieldsetSerializerMixin, EventUserFlagsMixin, serializers.ModelSerializer):
     """
     赛事列表序列化器（简化版）
     
@@ -73,9 +134,9 @@ class EventListSerializer(serializers.ModelSerializer):
         - is_liked: 当前用户是否已点赞
         - is_favorited: 当前用户是否已收藏
         - display_status: 动态展示状态（根据时间自动判断）
-        - registration_count: 已审核通过的报名人数
         
     字段别名（为兼容前端）:
+        - registration_count -> approved_count（已审核通过的报名人数）
         - name -> title
         - image -> cover_image
         - event_time -> start_time
@@ -92,17 +153,26 @@ class EventListSerializer(serializers.ModelSerializer):
     # 添加字段别名以兼容前端
     name = serializers.CharField(source='title', read_only=True)
     image = serializers.CharField(source='cover_image', read_only=True)
+    cover_image_variants = ImageVariantsField(source='cover_image')
     event_time = serializers.DateTimeField(source='start_time', read_only=True)
     registration_start_time = serializers.DateTimeField(source='registration_start', read_only=True)
     registration_end_time = serializers.DateTimeField(source='registration_end', read_only=True)
-    registration_count = serializers.SerializerMethodField()
+    registration_count = serializers.IntegerField(source='approved_count', read_only=True)
     click_count = serializers.IntegerField(source='view_count', read_only=True)
 
+    # 稀疏字段集：方法字段依赖的模型字段（用户状态只依赖主键）
+    field_dependencies = {
+        'display_status': ('status', 'start_time', 'end_time'),
+        'is_registered': (),
+        'is_liked': (),
+        'is_favorited': (),
+    }
+
     class Meta:
         model = Event
         fields = [
             # 原有字段
-            'id', 'title', 'cover_image', 'event_type', 'level', 'status',
+            'id', 'title', 'cover_image', 'cover_image_variants', 'event_type', 'level', 'status',
             'location', 'start_time', 'end_time', 'registration_start',
             'registration_end', 'max_participants', 'current_participants',
             'registration_fee', 'organizer_name', 'view_count', 'is_featured',
@@ -119,65 +189,6 @@ class EventListSerializer(serializers.ModelSerializer):
             'display_status'
         ]
 
-    def get_is_registered(self, obj):
-        """
-        判断当前用户是否已报名该赛事
-        
-        检查当前用户是否有pending或approved状态的报名记录
-        
-        返回:
-            bool: 已报名返回True，否则返回False
-        """
-        request = self.context.get('request')
-        if not request or not request.user.is_authenticated:
-            return False
-
-        from apps.registrations.models import Registration
-        return Registration.objects.filter(
-            event=obj,
-            user=request.user,
-            status__in=['pending', 'approved']  # 只统计待审核和已通过的报名
-        ).exists()
-
-    def get_is_liked(self, obj):
-        """
-        判断当前用户是否已点赞该赛事
-        
-        通过查询Like表判断用户是否对该赛事点过赞
-        
-        返回:
-            bool: 已点赞返回True，否则返回False
-        """
-        request = self.context.get('request')
-        if not request or not request.user.is_authenticated:
-            return False
-
-        from apps.interactions.models import Like
-        return Like.objects.filter(
-            user=request.user,
-            content_type__model='event',
-            object_id=obj.id
-        ).exists()
-
-    def get_is_favorited(self, obj):
-        """
-        判断当前用户是否已收藏该赛事
-        
-        通过查询Favorite表判断用户是否收藏了该赛事
-        
-        返回:
-            bool: 已收藏返回True，否则返回False
-        """
-        request = self.context.get('request')
-        if not request or not request.user.is_authenticated:
-            return False
-
-        return Favorite.objects.filter(
-            user=request.user,
-            content_type__model='event',
-            object_id=obj.id
-        ).exists()
-
     def get_display_status(self, obj):
         """
         获取动态展示状态
@@ -190,23 +201,8 @@ class EventListSerializer(serializers.ModelSerializer):
         """
         return obj.display_status
 
-    def get_registration_count(self, obj):
-        """
-        获取已审核通过的报名人数
-        
-        优先使用查询集中预加载的计数（annotate），
-        如果没有则查询数据库统计approved状态的报名数
-        
-        返回:
-            int: 已通过审核的报名人数
-        """
-        count = getattr(obj, 'approved_registration_count', None)
-        if count is not None:
-            return count
-        return obj.registrations.filter(status='approved').count()
-
 
-class EventDetailSerializer(serializers.ModelSerializer):
+class EventDetailSerializer(SparseFieldsetSerializerMixin, EventUserFlagsMixin, serializers.ModelSerializer):
     """
     赛事详情序列化器（完整版）
     
@@ -215,12 +211,13 @@ class EventDetailSerializer(serializers.ModelSerializer):
     
     额外字段说明:
         - organizer_info: 组织者的完整信息（ID、用户名、真实姓名、所属组织）
-        - registration_count: 已通过审核的报名人数
+        - registration_count: 已通过审核的报名人数（读取冗余字段 approved_count）
         - can_register: 当前是否可以报名（综合时间、状态、人数限制判断）
         - is_registered: 当前用户是否已报名
         - is_liked: 当前用户是否已点赞
         - is_favorited: 当前用户是否已收藏
         - display_status: 动态展示状态
+        - cover_image_variants: 封面各尺寸缩略图地址（尚未生成时为 null）
     
     can_register判断逻辑:
         1. 当前时间在报名时间范围内
@@ -228,7 +225,7 @@ class EventDetailSerializer(serializers.ModelSerializer):
         3. 未达到最大参赛人数限制（0表示不限制）
     """
     organizer_info = serializers.SerializerMethodField()
-    registration_count = serializers.SerializerMethodField()
+    registration_count = serializers.IntegerField(source='approved_count', read_only=True)
     can_register = serializers.SerializerMethodField()
     is_registered = serializers.SerializerMethodField()
     is_liked = serializers.SerializerMethodField()
@@ -238,19 +235,34 @@ class EventDetailSerializer(serializers.ModelSerializer):
     # 添加字段别名以兼容前端
     name = serializers.CharField(source='title', read_only=True)
     image = serializers.CharField(source='cover_image', read_only=True)
+    cover_image_variants = ImageVariantsField(source='cover_image')
     registration_start_time = serializers.DateTimeField(source='registration_start', read_only=True)
     registration_end_time = serializers.DateTimeField(source='registration_end', read_only=True)
     click_count = serializers.IntegerField(source='view_count', read_only=True)
 
+    # 稀疏字段集：方法字段依赖的模型字段
+    field_dependencies = {
+        'organizer_info': ('organizer__username', 'organizer__real_name', 'organizer__organization'),
+        'can_register': (
+            'registration_start', 'registration_end', 'status',
+            'max_participants', 'current_participants',
+        ),
+        'display_status': ('status', 'start_time', 'end_time'),
+        'is_registered': (),
+        'is_liked': (),
+        'is_favorited': (),
+    }
+
     class Meta:
         model = Event
         fields = [
-            'id', 'title', 'description', 'cover_image', 'event_type', 'level',
+            'id', 'title', 'description', 'cover_image', 'cover_image_variants', 'event_type', 'level',
             'status', 'location', 'start_time', 'end_time', 'registration_start',
             'registration_end', 'max_participants', 'current_participants',
             'registration_count', 'registration_fee', 'rules', 'requirements',
             'prizes', 'organizer', 'organizer_info', 'contact_person',
             'contact_phone', 'contact_email', 'view_count', 'is_featured',
+            'queue_registrations',
             'can_register', 'is_registered', 'is_liked', 'is_favorited',
             'created_at', 'updated_at',
             # 字段别名
@@ -301,59 +313,6 @@ class EventDetailSerializer(serializers.ModelSerializer):
 
         return True
 
-    def get_is_registered(self, obj):
-        """
-        判断当前用户是否已报名
-        
-        返回:
-            bool: 已报名返回True，否则返回False
-        """
-        request = self.context.get('request')
-        if not request or not request.user.is_authenticated:
-            return False
-
-        from apps.registrations.models import Registration
-        return Registration.objects.filter(
-            event=obj,
-            user=request.user,
-            status__in=['pending', 'approved']
-        ).exists()
-
-    def get_is_liked(self, obj):
-        """
-        判断当前用户是否已点赞
-        
-        返回:
-            bool: 已点赞返回True，否则返回False
-        """
-        request = self.context.get('request')
-        if not request or not request.user.is_authenticated:
-            return False
-
-        from apps.interactions.models import Like
-        return Like.objects.filter(
-            user=request.user,
-            content_type__model='event',
-            object_id=obj.id
-        ).exists()
-
-    def get_is_favorited(self, obj):
-        """
-        判断当前用户是否已收藏
-        
-        返回:
-            bool: 已收藏返回True，否则返回False
-        """
-        request = self.context.get('request')
-        if not request or not request.user.is_authenticated:
-            return False
-
-        return Favorite.objects.filter(
-            user=request.user,
-            content_type__model='event',
-            object_id=obj.id
-        ).exists()
-
     def get_display_status(self, obj):
         """
         获取动态展示状态
@@ -363,18 +322,6 @@ class EventDetailSerializer(serializers.ModelSerializer):
         """
         return obj.display_status
 
-    def get_registration_count(self, obj):
-        """
-        获取已审核通过的报名人数
-        
-        返回:
-            int: 已通过审核的报名人数
-        """
-        count = getattr(obj, 'approved_registration_count', None)
-        if count is not None:
-            return count
-        return obj.registrations.filter(status='approved').count()
-
 
 class EventAssignmentSerializer(serializers.ModelSerializer):
     """
@@ -0,0 +1,33 @@
+"""
+赛事信号处理模块
+
+赛事或报名记录发生变化时，使公开赛事列表快照失效；
+裁判分配关系变化时，使裁判可访问赛事缓存失效
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Event, RefereeEventAccess
+from .list_cache import invalidate_event_snapshots
+from .referee_access import invalidate_referee_event_ids
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def handle_event_change(sender, instance, **kwargs):
+    """赛事创建、更新或删除后，使列表快照失效"""
+    invalidate_event_snapshots()
+
+
+@receiver(post_save, sender='registrations.Registration')
+@receiver(post_delete, sender='registrations.Registration')
+def handle_registration_change(sender, instance, **kwargs):
+    """报名变化会影响报名人数，使列表快照失效"""
+    invalidate_event_snapshots()
+
+
+@receiver(post_save, sender=RefereeEventAccess)
+@receiver(post_delete, sender=RefereeEventAccess)
+def handle_referee_access_change(sender, instance, **kwargs):
+    """裁判分配创建、修改或删除后，使该裁判的可访问赛事缓存失效"""
+    invalidate_referee_event_ids(instance.referee_id)
@@ -0,0 +1,122 @@
+"""
+赛事状态推进
+
+赛事状态按时间推进：published（已发布）→ ongoing（进行中）→ finished（已结束）。
+原先"已结束"靠 end_time < now() 加状态的 OR 条件实时计算，无法利用 (status, ...) 索引；
+本模块把时间推进的结果写回 status 字段：
+    - sweep_event_statuses() 用两条 UPDATE 批量推进状态，并记录本次推进时间
+    - 由 `python manage.py sweep_event_statuses` 定时执行，
+      或在赛事接口请求中按 EVENT_STATUS_SWEEP_INTERVAL 节流顺带执行
+    - 查询时以存储的状态为准，只对"上次推进之后才跨过时间边界"的少量记录做兜底修正
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils import timezone
+
+from .list_cache import invalidate_event_snapshots
+
+
+LAST_SWEEP_KEY = 'events:status-sweep:last'
+SWEEP_LOCK_KEY = 'events:status-sweep:lock'
+# 会随时间自动推进的状态
+ACTIVE_STATUSES = ('published', 'ongoing')
+
+
+def resolve_status(status, start_time, end_time, now=None):
+    """
+    根据时间计算赛事应处的状态
+
+    草稿、已取消、已结束等非活动状态保持不变
+
+    参数:
+        status: 当前存储的状态
+        start_time: 开始时间
+        end_time: 结束时间
+        now: 当前时间，默认为 timezone.now()
+
+    返回:
+        str: 推进后的状态
+    """
+    if status not in ACTIVE_STATUSES:
+        return status
+    now = now or timezone.now()
+    if end_time and end_time < now:
+        return 'finished'
+    if status == 'published' and start_time and start_time <= now:
+        return 'ongoing'
+    return status
+
+
+def get_last_sweep():
+    """获取上次推进的时间，从未推进或缓存已丢失时返回 None"""
+    return cache.get(LAST_SWEEP_KEY)
+
+
+def sweep_event_statuses(now=None):
+    """
+    批量推进赛事状态
+
+    参数:
+        now: 当前时间，默认为 timezone.now()
+
+    返回:
+        dict: {'ongoing': 转为进行中的数量, 'finished': 转为已结束的数量}
+    """
+    from .models import Event
+
+    now = now or timezone.now()
+    finished = Event.objects.filter(status__in=ACTIVE_STATUSES, end_time__lt=now)\
+        .update(status='finished', updated_at=now)
+    ongoing = Event.objects.filter(status='published', start_time__lte=now)\
+        .update(status='ongoing', updated_at=now)
+    cache.set(LAST_SWEEP_KEY, now, timeout=None)
+
+    if ongoing or finished:
+        # update() 不会触发信号，需要手动使列表快照失效
+        invalidate_event_snapshots()
+    return {'ongoing': ongoing, 'finished': finished}
+
+
+def maybe_sweep_event_statuses():
+    """
+    按 EVENT_STATUS_SWEEP_INTERVAL 节流的顺带推进
+
+    每个时间窗口内只有第一个请求会执行；间隔为 0 时关闭，完全依赖管理命令
+    """
+    interval = getattr(settings, 'EVENT_STATUS_SWEEP_INTERVAL', 60)
+    if interval and cache.add(SWEEP_LOCK_KEY, 1, timeout=interval):
+        sweep_event_statuses()
+
+
+def effective_status_q(status, now=None):
+    """
+    构造按"实际状态"过滤的查询条件
+
+    以存储的 status 为准；上次推进之后才到达开始/结束时间的记录尚未被推进，
+    只对这一小段时间窗口 (last_sweep, now] 内的记录按时间修正。
+    从未推进过时窗口不设下界，等价于完全按时间计算
+
+    参数:
+        status: 要过滤的状态
+        now: 当前时间，默认为 timezone.now()
+
+    返回:
+        Q: 查询条件
+    """
+    now = now or timezone.now()
+    last_sweep = get_last_sweep()
+
+    ended = Q(end_time__lt=now)
+    started = Q(start_time__lte=now)
+    if last_sweep:
+        ended &= Q(end_time__gte=last_sweep)
+        started &= Q(start_time__gt=last_sweep)
+
+    if status == 'finished':
+        return Q(status='finished') | (Q(status__in=ACTIVE_STATUSES) & ended)
+    if status == 'ongoing':
+        return (Q(status='ongoing') | (Q(status='published') & started)) & ~ended
+    if status == 'published':
+        return Q(status='published') & ~started & ~ended
+    return Q(status=status)
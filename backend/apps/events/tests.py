@@ -1,12 +1,34 @@
+import io
+import os
+import shutil
+import tempfile
 from datetime import timedelta
+from unittest import mock
 
 from django.contrib.auth import get_user_model
-from django.test import TestCase
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.http import http_date
+from openpyxl import load_workbook
+from PIL import Image
 from rest_framework.test import APIClient
 
-from .models import Event
+from utils import hit_counter
+from utils.hit_counter import HitCounter, flush_all
+from apps.registrations.models import Registration
+from apps.results.models import Result
+from utils.images import image_variant_urls
+from .archive import ARCHIVE_DIR
+from .models import Event, RefereeEventAccess
+from .views import EventViewSet
+from .status_sweeper import effective_status_q, sweep_event_statuses
 
 
 User = get_user_model()
@@ -14,6 +36,7 @@ User = get_user_model()
 
 class EventStatusTests(TestCase):
     def setUp(self):
+        cache.clear()
         self.user = User.objects.create_user(
             username='admin',
             password='password123',
@@ -70,3 +93,763 @@ class EventStatusTests(TestCase):
         self.assertEqual(response.status_code, 200)
         ids = {item['id'] for item in response.json().get('results', [])}
         self.assertSetEqual(ids, {finished_event.id, already_finished_event.id})
+
+    def test_save_normalizes_status(self):
+        now = timezone.now()
+        ongoing = self._create_event(start_time=now - timedelta(hours=1), status='published')
+        finished = self._create_event(end_time=now - timedelta(hours=1), status='ongoing')
+        draft = self._create_event(end_time=now - timedelta(hours=1), status='draft')
+        self.assertEqual(ongoing.status, 'ongoing')
+        self.assertEqual(finished.status, 'finished')
+        self.assertEqual(draft.status, 'draft')
+
+    def test_update_keeps_concurrent_counter_increments(self):
+        event = self._create_event(max_participants=10)
+        get_object = EventViewSet.get_object
+
+        def get_object_then_register(view):
+            instance = get_object(view)
+            # 读取赛事之后、保存之前，其他请求通过了一条报名
+            Event.objects.filter(pk=instance.pk).update(
+                approved_count=F('approved_count') + 1,
+                current_participants=F('current_participants') + 1,
+                view_count=F('view_count') + 1
+            )
+            return instance
+
+        self.user.is_superuser = True
+        self.user.save()
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        with mock.patch.object(EventViewSet, 'get_object', get_object_then_register):
+            response = client.patch(reverse('event-detail', args=[event.id]), {'title': '新标题'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        event.refresh_from_db()
+        self.assertEqual(event.title, '新标题')
+        self.assertEqual((event.approved_count, event.current_participants, event.view_count), (1, 1, 1))
+
+    def test_sweep_moves_statuses_forward(self):
+        now = timezone.now()
+        upcoming = self._create_event(start_time=now + timedelta(hours=1), end_time=now + timedelta(hours=2))
+        started = self._create_event(start_time=now + timedelta(hours=1), end_time=now + timedelta(days=1))
+
+        later = now + timedelta(hours=3)
+        self.assertEqual(sweep_event_statuses(now=later), {'ongoing': 1, 'finished': 1})
+        self.assertEqual(Event.objects.get(pk=upcoming.pk).status, 'finished')
+        self.assertEqual(Event.objects.get(pk=started.pk).status, 'ongoing')
+
+    def test_unswept_rows_use_fallback_window(self):
+        now = timezone.now()
+        event = self._create_event(start_time=now - timedelta(hours=3), end_time=now + timedelta(minutes=5))
+        sweep_event_statuses(now=now)
+        self.assertEqual(Event.objects.get(pk=event.pk).status, 'ongoing')
+
+        # 结束时间已过但尚未推进：存储状态仍为 ongoing，过滤结果按时间修正
+        Event.objects.filter(pk=event.pk).update(end_time=now + timedelta(seconds=1))
+        later = now + timedelta(minutes=1)
+        finished_ids = set(Event.objects.filter(effective_status_q('finished', now=later)).values_list('id', flat=True))
+        ongoing_ids = set(Event.objects.filter(effective_status_q('ongoing', now=later)).values_list('id', flat=True))
+        self.assertIn(event.id, finished_ids)
+        self.assertNotIn(event.id, ongoing_ids)
+
+
+# 关闭顺带的状态推进，只统计接口本身的查询
+@override_settings(EVENT_STATUS_SWEEP_INTERVAL=0)
+class EventUserFlagsQueryBudgetTests(TestCase):
+    """赛事列表的用户交互状态应按页批量解析，查询次数不随赛事数量增长"""
+
+    QUERY_BUDGET = 6
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='athlete',
+            password='password123',
+            real_name='运动员',
+            phone='13800000010'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def _create_events(self, count):
+        now = timezone.now()
+        return [
+            Event.objects.create(
+                title=f'赛事{index}',
+                description='描述',
+                location='上海',
+                event_type='athletics',
+                start_time=now + timedelta(days=2),
+                end_time=now + timedelta(days=3),
+                registration_start=now - timedelta(days=1),
+                registration_end=now + timedelta(days=1),
+                status='published',
+                organizer=self.user,
+                contact_person='李四',
+                contact_phone='13900000001'
+            )
+            for index in range(count)
+        ]
+
+    def _count_list_queries(self, page_size):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('event-list'), {'page_size': page_size})
+        self.assertEqual(response.status_code, 200)
+        return len(ctx.captured_queries), response.json()['results']
+
+    def test_list_query_count_is_constant(self):
+        from apps.interactions.models import Like, Favorite
+        from apps.registrations.models import Registration
+
+        events = self._create_events(20)
+        content_type = ContentType.objects.get_for_model(Event)
+        Registration.objects.create(
+            event=events[0],
+            user=self.user,
+            registration_number='REG-TEST-1',
+            participant_name='运动员',
+            participant_phone='13800000010',
+            participant_id_card='110101199001011234',
+            participant_gender='M',
+            participant_birth_date='1990-01-01',
+            emergency_contact='家属',
+            emergency_phone='13800000011'
+        )
+        Like.objects.create(user=self.user, content_type=content_type, object_id=events[1].id)
+        Favorite.objects.create(user=self.user, content_type=content_type, object_id=events[2].id)
+
+        small_count, _ = self._count_list_queries(5)
+        full_count, results = self._count_list_queries(20)
+
+        self.assertEqual(small_count, full_count)
+        self.assertLessEqual(full_count, self.QUERY_BUDGET)
+
+        flags = {item['id']: (item['is_registered'], item['is_liked'], item['is_favorited']) for item in results}
+        self.assertEqual(flags[events[0].id], (True, False, False))
+        self.assertEqual(flags[events[1].id], (False, True, False))
+        self.assertEqual(flags[events[2].id], (False, False, True))
+        self.assertEqual(flags[events[3].id], (False, False, False))
+
+    def test_detail_uses_batched_flags(self):
+        event = self._create_events(1)[0]
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse('event-detail', args=[event.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(ctx.captured_queries), self.QUERY_BUDGET)
+        self.assertFalse(response.json()['is_registered'])
+
+
+@override_settings(HIT_COUNTER_FLUSH_INTERVAL=0)
+class EventClickCounterTests(TestCase):
+    """点击计数先写入缓冲，读取时合并增量，刷新时批量写回数据库"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='organizer',
+            password='password123',
+            real_name='组织者',
+            phone='13800000020'
+        )
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title='点击统计赛事',
+            description='描述',
+            location='广州',
+            event_type='athletics',
+            start_time=now + timedelta(days=2),
+            end_time=now + timedelta(days=3),
+            registration_start=now - timedelta(days=1),
+            registration_end=now + timedelta(days=1),
+            status='published',
+            organizer=self.user,
+            contact_person='王五',
+            contact_phone='13900000002',
+            view_count=5
+        )
+        self.client = APIClient()
+
+    def test_clicks_are_buffered_and_flushed(self):
+        url = reverse('event-click', args=[self.event.id])
+        for expected in (6, 7, 8):
+            response = self.client.post(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.json()['view_count'], expected)
+
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.view_count, 5)
+
+        detail = self.client.get(reverse('event-detail', args=[self.event.id]))
+        self.assertEqual(detail.json()['view_count'], 8)
+
+        self.assertEqual(flush_all(), {'events.event.view_count': 3})
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.view_count, 8)
+        self.assertEqual(flush_all(), {})
+
+        response = self.client.post(url)
+        self.assertEqual(response.json()['view_count'], 9)
+
+    def test_late_log_entry_is_flushed(self):
+        # 模拟另一个进程已取得序号、尚未写入日志时发生刷新
+        counter = HitCounter(Event, 'view_count')
+        cache.set(counter._delta_key(self.event.pk), 2, timeout=None)
+        cache.add(counter._marker_key(self.event.pk), 1)
+        seq = hit_counter._incr(hit_counter.LOG_SEQ_KEY)
+        self.assertEqual(flush_all(), {})
+
+        cache.set(hit_counter.log_key(seq), (counter.name, self.event.pk))
+        self.assertEqual(flush_all(), {counter.name: 2})
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.view_count, 7)
+
+    def test_concurrent_flush_is_skipped(self):
+        self.client.post(reverse('event-click', args=[self.event.id]))
+        cache.add(hit_counter.FLUSH_RUNNING_KEY, 1)
+        self.assertEqual(flush_all(), {})
+
+        cache.delete(hit_counter.FLUSH_RUNNING_KEY)
+        self.assertEqual(flush_all(), {'events.event.view_count': 1})
+
+
+class EventSnapshotCacheTests(TestCase):
+    """首页公开列表使用缓存快照，赛事或报名变化后立即失效"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='organizer',
+            password='password123',
+            real_name='组织者',
+            phone='13800000030'
+        )
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title='快照赛事',
+            description='描述',
+            location='深圳',
+            event_type='athletics',
+            start_time=now + timedelta(days=2),
+            end_time=now + timedelta(days=3),
+            registration_start=now - timedelta(days=1),
+            registration_end=now + timedelta(days=1),
+            status='published',
+            is_featured=True,
+            organizer=self.user,
+            contact_person='赵六',
+            contact_phone='13900000003'
+        )
+        self.client = APIClient()
+
+    def test_snapshot_is_reused_until_invalidated(self):
+        url = reverse('event-featured')
+        first = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual([item['id'] for item in first.json()], [self.event.id])
+
+        with CaptureQueriesContext(connection) as ctx:
+            cached = self.client.get(url)
+        self.assertEqual(len(ctx.captured_queries), 0)
+        self.assertEqual(cached.json(), first.json())
+
+        # 保存赛事触发 post_save 信号，快照失效
+        self.event.is_featured = False
+        self.event.save()
+        self.assertEqual(self.client.get(url).json(), [])
+
+    def test_registration_change_invalidates_snapshot(self):
+        from apps.registrations.models import Registration
+
+        url = reverse('event-can-register')
+        first = self.client.get(url).json()
+        self.assertEqual(first[0]['registration_count'], 0)
+
+        # 计数字段通过 update() 修改不会触发信号，创建报名时的信号使快照失效
+        Event.objects.filter(pk=self.event.pk).update(approved_count=1)
+        Registration.objects.create(
+            event=self.event,
+            user=self.user,
+            participant_name='组织者',
+            participant_phone='13800000030',
+            participant_id_card='110101199001011234',
+            participant_gender='male',
+            participant_birth_date='1990-01-01',
+            emergency_contact='家属',
+            emergency_phone='13800000031',
+            status='approved'
+        )
+        second = self.client.get(url).json()
+        self.assertEqual(second[0]['registration_count'], 1)
+
+    def test_snapshot_expires_at_next_boundary(self):
+        from .list_cache import seconds_until_next_boundary
+
+        now = timezone.now()
+        remaining = seconds_until_next_boundary(now)
+        # 最近的边界是报名截止时间（1 天后）
+        self.assertEqual(remaining, int((self.event.registration_end - now).total_seconds()) + 1)
+
+        self.event.registration_end = now + timedelta(seconds=30)
+        self.event.save()
+        self.assertLessEqual(seconds_until_next_boundary(now), 30)
+
+
+class EventCursorPaginationTests(TestCase):
+    """?cursor= 切换为键集分页，按 (created_at, id) 稳定翻页且不执行 COUNT"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='organizer',
+            password='password123',
+            real_name='组织者',
+            phone='13800000040'
+        )
+        now = timezone.now()
+        for index in range(25):
+            Event.objects.create(
+                title=f'分页赛事{index}',
+                description='描述',
+                location='杭州',
+                event_type='athletics',
+                start_time=now + timedelta(days=2),
+                end_time=now + timedelta(days=3),
+                registration_start=now - timedelta(days=1),
+                registration_end=now + timedelta(days=1),
+                status='published',
+                organizer=self.user,
+                contact_person='孙七',
+                contact_phone='13900000004'
+            )
+        # 制造相同的创建时间，验证 id 作为第二排序键
+        Event.objects.filter(title__in=['分页赛事3', '分页赛事4', '分页赛事5']).update(created_at=now)
+        self.expected = list(Event.objects.order_by('-created_at', '-id').values_list('id', flat=True))
+        self.client = APIClient()
+
+    def test_walk_forward_and_back(self):
+        url = reverse('event-list')
+        response = self.client.get(url, {'cursor': '', 'page_size': 10})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('count', response.json())
+
+        seen, pages = [], []
+        next_url = f'{url}?cursor=&page_size=10'
+        while next_url:
+            with CaptureQueriesContext(connection) as ctx:
+                data = self.client.get(next_url).json()
+            self.assertFalse(any('COUNT(' in query['sql'] and 'GROUP BY' not in query['sql']
+                                 for query in ctx.captured_queries))
+            pages.append(data)
+            seen.extend(item['id'] for item in data['results'])
+            next_url = data['next']
+        self.assertEqual(seen, self.expected)
+        self.assertEqual(len(pages), 3)
+        self.assertIsNone(pages[0]['previous'])
+
+        back = self.client.get(pages[2]['previous']).json()
+        self.assertEqual([item['id'] for item in back['results']], self.expected[10:20])
+        first = self.client.get(back['previous']).json()
+        self.assertEqual([item['id'] for item in first['results']], self.expected[:10])
+        self.assertIsNone(first['previous'])
+
+    def test_page_number_mode_unchanged(self):
+        data = self.client.get(reverse('event-list'), {'page': 3, 'page_size': 10}).json()
+        self.assertEqual(data['count'], 25)
+        # 页码分页只按 created_at 排序，相同时间的记录顺序不固定
+        self.assertEqual({item['id'] for item in data['results']}, set(self.expected[20:]))
+
+    def test_invalid_cursor(self):
+        response = self.client.get(reverse('event-list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 404)
+
+
+@override_settings(EVENT_STATUS_SWEEP_INTERVAL=0)
+class EventConditionalGetTests(TestCase):
+    """公开只读接口支持 ETag / Last-Modified 条件请求"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='organizer',
+            password='password123',
+            real_name='组织者',
+            phone='13800000070'
+        )
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title='条件请求赛事',
+            description='描述',
+            location='南京',
+            event_type='athletics',
+            start_time=now + timedelta(days=2),
+            end_time=now + timedelta(days=3),
+            registration_start=now - timedelta(days=1),
+            registration_end=now + timedelta(days=1),
+            status='published',
+            organizer=self.user,
+            contact_person='郑十',
+            contact_phone='13900000007'
+        )
+        self.client = APIClient()
+        self.url = reverse('event-detail', args=[self.event.id])
+
+    def test_not_modified_until_event_changes(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        self.assertIn('public', first['Cache-Control'])
+        # 计数字段不修改 updated_at，详情只通过 ETag 校验
+        self.assertNotIn('Last-Modified', first)
+        etag = first['ETag']
+
+        with CaptureQueriesContext(connection) as ctx:
+            cached = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(cached.status_code, 304)
+        self.assertEqual(len(ctx.captured_queries), 1)
+
+        # 报名人数通过 F() 更新，不修改 updated_at，也会使 ETag 变化
+        Event.objects.filter(pk=self.event.pk).update(approved_count=1)
+        changed = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(changed.status_code, 200)
+        self.assertNotEqual(changed['ETag'], etag)
+
+    def test_authenticated_responses_are_private(self):
+        anonymous_etag = self.client.get(self.url)['ETag']
+        self.client.force_authenticate(self.user)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=anonymous_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        self.assertIn('Authorization', response['Vary'])
+
+    def test_results_endpoint(self):
+        url = reverse('event-results', args=[self.event.id])
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+    def test_deleting_older_result_is_not_hidden_by_if_modified_since(self):
+        results = []
+        for index in range(2):
+            athlete = User.objects.create_user(
+                username=f'conditional-athlete{index}',
+                password='password123',
+                real_name=f'运动员{index}',
+                phone=f'1370000030{index}'
+            )
+            registration = Registration.objects.create(
+                event=self.event,
+                user=athlete,
+                participant_name=athlete.real_name,
+                participant_phone=athlete.phone,
+                participant_id_card=f'32010119900102{index:04d}',
+                participant_gender='M',
+                participant_birth_date='1990-01-01',
+                emergency_contact='家属',
+                emergency_phone='13800009999',
+                registration_number=f'REG-CONDITIONAL-{index}',
+                status='approved'
+            )
+            results.append(Result.objects.create(
+                event=self.event,
+                registration=registration,
+                user=athlete,
+                score=f'1{index}.0',
+                is_published=True
+            ))
+
+        url = reverse('event-results', args=[self.event.id])
+        first = self.client.get(url)
+        self.assertEqual(len(first.json()), 2)
+        self.assertNotIn('Last-Modified', first)
+
+        # 删除较早的成绩，Max('updated_at') 不变；只携带 If-Modified-Since 的客户端仍需拿到新数据
+        results[0].delete()
+        since = http_date(timezone.now().timestamp() + 60)
+        response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.json()], [results[1].id])
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 200)
+
+
+@override_settings(EVENT_STATUS_SWEEP_INTERVAL=0)
+class EventSparseFieldsetTests(TestCase):
+    """?fields= / ?omit= 同时裁剪输出和查询"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='organizer',
+            password='password123',
+            real_name='组织者',
+            phone='13800000080'
+        )
+        now = timezone.now()
+        for index in range(3):
+            Event.objects.create(
+                title=f'字段裁剪赛事{index}',
+                description='很长的赛事描述' * 50,
+                location='苏州',
+                event_type='athletics',
+                start_time=now + timedelta(days=2),
+                end_time=now + timedelta(days=3),
+                registration_start=now - timedelta(days=1),
+                registration_end=now + timedelta(days=1),
+                status='published',
+                organizer=self.user,
+                contact_person='王十一',
+                contact_phone='13900000008'
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.url = reverse('event-list')
+
+    def test_fields_trims_output_and_columns(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {'fields': 'id,title,display_status'})
+        self.assertEqual(response.status_code, 200)
+        for item in response.data['results']:
+            self.assertEqual(set(item), {'id', 'title', 'display_status'})
+            self.assertEqual(item['display_status'], 'published')
+
+        sql = '\n'.join(query['sql'] for query in ctx.captured_queries)
+        self.assertNotIn('"description"', sql)
+        # 未请求用户状态字段时不再查询报名、点赞、收藏
+        self.assertNotIn('registration', sql)
+        self.assertNotIn('interaction', sql)
+
+    def test_omit_and_related_fields(self):
+        response = self.client.get(self.url, {'omit': 'description', 'fields': 'title,organizer_name,description'})
+        self.assertEqual(response.status_code, 200)
+        item = response.data['results'][0]
+        self.assertEqual(set(item), {'title', 'organizer_name'})
+        self.assertEqual(item['organizer_name'], '组织者')
+
+    def test_unknown_fields_return_full_representation(self):
+        full = self.client.get(self.url).data['results'][0]
+        response = self.client.get(self.url, {'fields': 'no_such_field'})
+        self.assertEqual(set(response.data['results'][0]), set(full))
+
+    def test_detail_with_cursor_pagination_fields(self):
+        event = Event.objects.first()
+        response = self.client.get(
+            reverse('event-detail', args=[event.id]),
+            {'fields': 'id,organizer_info,can_register'}
+        )
+        self.assertEqual(set(response.data), {'id', 'organizer_info', 'can_register'})
+        self.assertEqual(response.data['organizer_info']['real_name'], '组织者')
+        self.assertTrue(response.data['can_register'])
+
+        page = self.client.get(self.url, {'cursor': '', 'page_size': 2, 'fields': 'id'})
+        self.assertEqual(len(page.data['results']), 2)
+        self.assertIsNotNone(page.data['next'])
+
+
+class EventImagePipelineTests(TestCase):
+    """上传图片按内容哈希去重，并生成缩略图"""
+
+    def setUp(self):
+        self.public_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.public_dir, ignore_errors=True)
+        settings_override = override_settings(FRONTEND_PUBLIC_DIR=self.public_dir, BACKGROUND_TASKS_EAGER=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='image-admin',
+            password='password123',
+            real_name='管理员',
+            phone='13800000100',
+            is_superuser=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def _upload(self, color='red', size=(1200, 800), fmt='PNG', content_type='image/png'):
+        buffer = io.BytesIO()
+        Image.new('RGBA', size, color).save(buffer, fmt)
+        upload = SimpleUploadedFile(f'cover.{fmt.lower()}', buffer.getvalue(), content_type=content_type)
+        return self.client.post(reverse('event-upload-image'), {'file': upload}, format='multipart')
+
+    def test_duplicate_uploads_share_file_and_variants(self):
+        first = self._upload()
+        second = self._upload()
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.data['image'], second.data['image'])
+        self.assertTrue(first.data['image'].startswith('/images/events/event_'))
+        self.assertEqual(len(os.listdir(os.path.join(self.public_dir, 'images', 'events'))), 2)
+
+        variants = image_variant_urls(first.data['image'])
+        self.assertEqual(set(variants), {'thumbnail', 'card', 'hero'})
+        thumbnail_path = os.path.join(self.public_dir, variants['thumbnail']['jpg'].lstrip('/'))
+        with Image.open(thumbnail_path) as thumbnail:
+            self.assertEqual(thumbnail.format, 'JPEG')
+            self.assertLessEqual(max(thumbnail.size), 200)
+        self.assertTrue(os.path.exists(os.path.join(self.public_dir, variants['hero']['webp'].lstrip('/'))))
+
+        self.assertNotEqual(self._upload(color='blue').data['image'], first.data['image'])
+
+    def test_serializer_exposes_variants(self):
+        image = self._upload().data['image']
+        now = timezone.now()
+        event = Event.objects.create(
+            title='图片赛事',
+            description='描述',
+            location='武汉',
+            event_type='athletics',
+            cover_image=image,
+            start_time=now + timedelta(days=2),
+            end_time=now + timedelta(days=3),
+            registration_start=now - timedelta(days=1),
+            registration_end=now + timedelta(days=1),
+            status='published',
+            organizer=self.admin,
+            contact_person='孙十三',
+            contact_phone='13900000010'
+        )
+        response = self.client.get(reverse('event-detail', args=[event.id]))
+        self.assertEqual(
+            response.data['cover_image_variants']['card']['webp'],
+            image_variant_urls(image)['card']['webp']
+        )
+
+        # 外部链接和尚未生成缩略图的图片返回 None，前端使用原图
+        Event.objects.filter(pk=event.pk).update(cover_image='https://example.com/a.png')
+        self.assertIsNone(self.client.get(reverse('event-detail', args=[event.id])).data['cover_image_variants'])
+
+
+class EventArchiveTests(TestCase):
+    """赛事归档：多工作表 xlsx，数据未变化时复用已生成的文件"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='archive-admin',
+            password='password123',
+            real_name='管理员',
+            phone='13800000200',
+            is_superuser=True
+        )
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title='归档赛事',
+            description='描述',
+            location='南京',
+            event_type='athletics',
+            start_time=now - timedelta(days=2),
+            end_time=now - timedelta(days=1),
+            registration_start=now - timedelta(days=5),
+            registration_end=now - timedelta(days=3),
+            status='published',
+            organizer=self.admin,
+            contact_person='周十四',
+            contact_phone='13900000020'
+        )
+        self.results = []
+        for index, score in enumerate(['12.5', '11.9']):
+            athlete = User.objects.create_user(
+                username=f'archive-athlete-{index}',
+                password='password123',
+                real_name=f'运动员{index}',
+                phone=f'1370000020{index}'
+            )
+            registration = Registration.objects.create(
+                event=self.event,
+                user=athlete,
+                participant_name=athlete.real_name,
+                participant_phone=athlete.phone,
+                participant_id_card=f'32010119900101{index:04d}',
+                participant_gender='M',
+                participant_birth_date='1990-01-01',
+                emergency_contact='家属',
+                emergency_phone='13800009999',
+                registration_number=f'REG-ARCHIVE-{index}',
+                status='approved'
+            )
+            self.results.append(Result.objects.create(
+                event=self.event,
+                registration=registration,
+                user=athlete,
+                round_type='final',
+                score=score,
+                score_unit='秒',
+                rank=index + 1
+            ))
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('event-archive', args=[self.event.id])
+
+    def _archive_files(self):
+        return sorted(os.listdir(os.path.join(self.media_root, ARCHIVE_DIR)))
+
+    def test_archive_contains_registration_and_round_sheets(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+
+        workbook = load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True)
+        self.assertEqual(workbook.sheetnames, ['报名名单', '初赛', '半决赛', '决赛'])
+        registrations = list(workbook['报名名单'].iter_rows(values_only=True))
+        self.assertEqual(len(registrations), 3)
+        finals = list(workbook['决赛'].iter_rows(values_only=True))
+        self.assertEqual([row[1] for row in finals[1:]], ['REG-ARCHIVE-0', 'REG-ARCHIVE-1'])
+        self.assertEqual(len(list(workbook['初赛'].iter_rows(values_only=True))), 1)
+        workbook.close()
+
+    def test_archive_reused_until_data_changes(self):
+        self.client.get(self.url).close()
+        first = self._archive_files()
+        self.assertEqual(len(first), 1)
+
+        # 数据未变化时不重新生成
+        with self.assertNumQueries(3):
+            self.client.get(self.url).close()
+        self.assertEqual(self._archive_files(), first)
+
+        result = self.results[0]
+        result.score = '11.5'
+        result.save()
+        self.client.get(self.url).close()
+        second = self._archive_files()
+        self.assertEqual(len(second), 1)
+        self.assertNotEqual(second, first)
+
+    def test_bulk_review_regenerates_archive(self):
+        self.client.get(self.url).close()
+        first = self._archive_files()
+
+        response = self.client.post(
+            reverse('registration-bulk-reject'),
+            {'ids': list(Registration.objects.values_list('id', flat=True))},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(self.url)
+        workbook = load_workbook(io.BytesIO(b''.join(response.streaming_content)), read_only=True)
+        statuses = [row[8] for row in list(workbook['报名名单'].iter_rows(values_only=True))[1:]]
+        workbook.close()
+        self.assertNotEqual(self._archive_files(), first)
+        self.assertEqual(len(self._archive_files()), 1)
+        self.assertEqual(set(statuses), {'rejected'})
+
+    def test_referee_limited_to_assigned_events(self):
+        referee = User.objects.create_user(
+            username='archive-referee',
+            password='password123',
+            real_name='裁判',
+            phone='13800000201',
+            user_type='referee'
+        )
+        self.client.force_authenticate(referee)
+        self.assertEqual(self.client.get(self.url).status_code, 403)
+
+        # 分配后裁判的可访问赛事缓存立即失效
+        RefereeEventAccess.objects.create(referee=referee, event=self.event)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        response.close()
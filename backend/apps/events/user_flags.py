@@ -0,0 +1,81 @@
+"""
+赛事用户状态批量解析
+
+列表页每个赛事都需要展示当前用户的报名、点赞、收藏状态，
+逐条调用 .exists() 会产生 3*N 次查询。本模块按页面一次性解析：
+每种状态只查询一次，结果通过序列化器 context 传入。
+"""
+from django.contrib.contenttypes.models import ContentType
+
+
+# 序列化器 context 中保存批量结果的键名
+USER_FLAGS_CONTEXT_KEY = 'event_user_flags'
+
+# 视为“已报名”的报名状态
+ACTIVE_REGISTRATION_STATUSES = ('pending', 'approved')
+
+
+class EventUserFlags:
+    """
+    当前用户在一组赛事上的交互状态
+
+    属性:
+        registered: 已报名（待审核或已通过）的赛事ID集合
+        liked: 已点赞的赛事ID集合
+        favorited: 已收藏的赛事ID集合
+    """
+
+    def __init__(self, registered=None, liked=None, favorited=None):
+        self.registered = set(registered or ())
+        self.liked = set(liked or ())
+        self.favorited = set(favorited or ())
+
+    def is_registered(self, event_id):
+        return event_id in self.registered
+
+    def is_liked(self, event_id):
+        return event_id in self.liked
+
+    def is_favorited(self, event_id):
+        return event_id in self.favorited
+
+
+def resolve_event_user_flags(user, event_ids):
+    """
+    批量解析用户在多个赛事上的报名、点赞、收藏状态
+
+    参数:
+        user: 当前请求用户，未登录时直接返回空结果
+        event_ids: 当前页面的赛事ID列表
+
+    返回:
+        EventUserFlags: 每种状态最多一次查询
+    """
+    event_ids = [event_id for event_id in event_ids if event_id is not None]
+    if not event_ids or not user or not user.is_authenticated:
+        return EventUserFlags()
+
+    from apps.registrations.models import Registration
+    from apps.interactions.models import Like, Favorite
+    from .models import Event
+
+    # get_for_model 自带进程内缓存，避免每次都关联 content_type 表
+    content_type = ContentType.objects.get_for_model(Event)
+
+    registered = Registration.objects.filter(
+        user=user,
+        event_id__in=event_ids,
+        status__in=ACTIVE_REGISTRATION_STATUSES
+    ).values_list('event_id', flat=True)
+    liked = Like.objects.filter(
+        user=user,
+        content_type=content_type,
+        object_id__in=event_ids
+    ).values_list('object_id', flat=True)
+    favorited = Favorite.objects.filter(
+        user=user,
+        content_type=content_type,
+        object_id__in=event_ids
+    ).values_list('object_id', flat=True)
+
+    return EventUserFlags(registered, liked, favorited)
@@ -1,6 +1,8 @@
 """
 赛事应用视图
 """
+from datetime import datetime
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
@@ -8,37 +10,58 @@ from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.filters import SearchFilter, OrderingFilter
 from rest_framework.exceptions import PermissionDenied
 from django.utils import timezone
-from django.db.models import Q, Count
 from django.db import transaction
+from django.core.files.storage import default_storage
+from django.http import FileResponse
 from rest_framework.permissions import AllowAny, IsAuthenticated
 
 from .models import Event, EventAssignment, RefereeEventAccess
 from .serializers import EventSerializer, EventListSerializer, EventDetailSerializer, EventAssignmentSerializer, RefereeEventAccessSerializer
+from .user_flags import USER_FLAGS_CONTEXT_KEY, resolve_event_user_flags
+from .list_cache import get_event_snapshot
+from .referee_access import get_referee_event_ids, invalidate_referee_event_ids
+from .archive import get_event_archive
+from .status_sweeper import effective_status_q, maybe_sweep_event_statuses, resolve_status
 from utils.permissions import IsAdmin, IsOwnerOrAdmin, IsAuthenticatedOrReadOnly, IsAdminOrReferee, IsSuperAdminOrAdminRole
-from utils.export import export_results
+from utils.export import XLSX_CONTENT_TYPE, build_filename, export_results
+from utils.hit_counter import HitCounter
+from utils.conditional import conditional_get, queryset_validators
+from utils.pagination import CursorOrPageNumberPagination
+from utils.fieldsets import SparseFieldsetViewSetMixin
+from utils.images import save_public_image
+from apps.search.filters import RankedSearchFilter
+from apps.results.models import Result
+
+
+# 需要批量解析当前用户交互状态的字段
+USER_FLAG_FIELDS = ('is_registered', 'is_liked', 'is_favorited')
 
 
-class EventViewSet(viewsets.ModelViewSet):
+class EventViewSet(SparseFieldsetViewSetMixin, viewsets.ModelViewSet):
     """
     赛事视图集
     提供赛事的CRUD操作
     """
-    queryset = Event.objects.select_related('organizer')\
-        .annotate(approved_registration_count=Count(
-            'registrations', filter=Q(registrations__status='approved')
-        ))\
-        .all()
+    # 已通过报名人数读取冗余字段 approved_count，不再逐次聚合
+    queryset = Event.objects.select_related('organizer').all()
     serializer_class = EventSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    # 排序过滤器在前，搜索时按相关度排序（指定 ?ordering= 时除外）
+    filter_backends = [DjangoFilterBackend, OrderingFilter, RankedSearchFilter]
     filterset_fields = ['event_type', 'level', 'is_featured']
     search_fields = ['title', 'description', 'location', 'event_type']
     ordering_fields = ['created_at', 'start_time', 'view_count']
     ordering = ['-created_at']
+    pagination_class = CursorOrPageNumberPagination  # 支持 ?cursor= 键集分页
+
+    def initial(self, request, *args, **kwargs):
+        """处理请求前按节流间隔顺带推进赛事状态"""
+        super().initial(request, *args, **kwargs)
+        maybe_sweep_event_statuses()
 
     def get_permissions(self):
         """设置权限"""
-        if self.action in ['list', 'retrieve', 'featured', 'upcoming']:
-            # 列表、详情、推荐、即将开始的赛事允许任何人访问
+        if self.action in ['list', 'retrieve', 'featured', 'upcoming', 'ongoing', 'can_register', 'results']:
+            # 列表、详情、首页公开列表（推荐、即将开始、进行中、可报名）以及已公开成绩允许任何人访问
             permission_classes = [AllowAny]
         elif self.action == 'click':
             # 点击统计允许任何人访问
@@ -46,8 +69,8 @@ class EventViewSet(viewsets.ModelViewSet):
         elif self.action == 'create':
             # 创建赛事需要认证
             permission_classes = [IsAuthenticated]
-        elif self.action == 'registrations':
-            # 报名列表需管理员或裁判
+        elif self.action in ['registrations', 'archive']:
+            # 报名列表和赛事归档需管理员或裁判
             permission_classes = [IsAdminOrReferee]
         elif self.action == 'referee_access':
             # 裁判权限管理需超级管理员或管理员角色
@@ -68,10 +91,77 @@ class EventViewSet(viewsets.ModelViewSet):
             return EventDetailSerializer
         return EventSerializer
 
+    def get_user_flags_context(self, events, flags=None):
+        """
+        构建包含当前用户交互状态的序列化器上下文
+
+        对整页赛事一次性解析报名、点赞、收藏状态，
+        每种状态只查询一次，避免序列化时逐条查询
+
+        参数:
+            events: 当前页面的赛事对象列表
+            flags: 已解析的交互状态（如条件请求校验时已查询），为空时重新解析
+
+        说明:
+            通过 ?fields= / ?omit= 去掉了全部状态字段时不再解析
+        """
+        context = self.get_serializer_context()
+        if not self.wants_fields(*USER_FLAG_FIELDS):
+            return context
+        context[USER_FLAGS_CONTEXT_KEY] = flags or resolve_event_user_flags(
+            self.request.user, [event.id for event in events]
+        )
+        return context
+
+    def list(self, request, *args, **kwargs):
+        """获取赛事列表（按页批量解析用户交互状态）"""
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        events = page if page is not None else list(queryset)
+        serializer = self.get_serializer(events, many=True, context=self.get_user_flags_context(events))
+        if page is not None:
+            return self.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+    def get_detail_validators(self, request, pk=None, **kwargs):
+        """
+        赛事详情的条件请求校验值
+
+        报名人数、浏览次数通过 F() 或缓冲计数更新，不会修改 updated_at，
+        因此与展示状态一起计入 ETag；登录用户额外计入个人交互状态
+        """
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            return None
+        row = Event.objects.filter(pk=pk).values_list(
+            'updated_at', 'status', 'start_time', 'end_time',
+            'approved_count', 'current_participants', 'view_count'
+        ).first()
+        if row is None:
+            return None
+        stored_status, start_time, end_time = row[1:4]
+        parts = [
+            *row, resolve_status(stored_status, start_time, end_time),
+            HitCounter(Event, 'view_count').pending(pk),
+        ]
+        if request.user.is_authenticated and self.wants_fields(*USER_FLAG_FIELDS):
+            flags = resolve_event_user_flags(request.user, [pk])
+            # 校验未命中时详情序列化复用该结果
+            self.detail_user_flags = flags
+            parts.extend(flag(pk) for flag in (flags.is_registered, flags.is_liked, flags.is_favorited))
+        # 报名人数、浏览数通过 F() 更新，不修改 updated_at，只通过 ETag 校验
+        return None, parts
+
+    @conditional_get('get_detail_validators', max_age=30)
     def retrieve(self, request, *args, **kwargs):
         """获取赛事详情（不增加浏览次数）"""
         instance = self.get_object()
-        serializer = self.get_serializer(instance)
+        if self.wants_fields('view_count', 'click_count'):
+            # 合并尚未刷新的浏览增量，返回接近实时的浏览次数
+            instance.view_count = HitCounter(Event, 'view_count').total(instance)
+        context = self.get_user_flags_context([instance], flags=getattr(self, 'detail_user_flags', None))
+        serializer = self.get_serializer(instance, context=context)
         return Response(serializer.data)
 
     @action(detail=True, methods=['post'])
@@ -81,11 +171,12 @@ class EventViewSet(viewsets.ModelViewSet):
         POST /api/events/{id}/click/
         """
         event = self.get_object()
-        event.view_count += 1
-        event.save(update_fields=['view_count'])
+        # 增量先写入缓冲计数器，由后台批量刷新，避免热点行锁
+        counter = HitCounter(Event, 'view_count')
+        counter.increment(event.pk)
         return Response({
             'message': '浏览次数已更新',
-            'view_count': event.view_count
+            'view_count': counter.total(event)
         })
 
     @action(detail=False, methods=['get'])
@@ -94,9 +185,14 @@ class EventViewSet(viewsets.ModelViewSet):
         获取推荐赛事
         GET /api/events/featured/
         """
-        events = self.queryset.filter(is_featured=True, status='published')
-        serializer = EventListSerializer(events, many=True)
-        return Response(serializer.data)
+        def build():
+            # 推荐赛事开始后仍保留展示，直到结束
+            events = self.queryset.filter(is_featured=True).filter(
+                effective_status_q('published') | effective_status_q('ongoing')
+            )
+            return EventListSerializer(events, many=True).data
+
+        return Response(get_event_snapshot('featured', build))
 
     @action(detail=False, methods=['get'])
     def upcoming(self, request):
@@ -104,13 +200,14 @@ class EventViewSet(viewsets.ModelViewSet):
         获取即将开始的赛事
         GET /api/events/upcoming/
         """
-        now = timezone.now()
-        events = self.queryset.filter(
-            status='published',
-            start_time__gte=now
-        ).order_by('start_time')[:10]
-        serializer = EventListSerializer(events, many=True)
-        return Response(serializer.data)
+        def build():
+            events = self.queryset.filter(
+                status='published',
+                start_time__gte=timezone.now()
+            ).order_by('start_time')[:10]
+            return EventListSerializer(events, many=True).data
+
+        return Response(get_event_snapshot('upcoming', build))
 
     @action(detail=False, methods=['get'])
     def ongoing(self, request):
@@ -118,13 +215,11 @@ class EventViewSet(viewsets.ModelViewSet):
         获取正在进行的赛事
         GET /api/events/ongoing/
         """
-        now = timezone.now()
-        events = self.queryset.filter(
-            Q(status='ongoing') |
-            Q(status='published', start_time__lte=now, end_time__gte=now)
-        )
-        serializer = EventListSerializer(events, many=True)
-        return Response(serializer.data)
+        def build():
+            events = self.queryset.filter(effective_status_q('ongoing'))
+            return EventListSerializer(events, many=True).data
+
+        return Response(get_event_snapshot('ongoing', build))
 
     @action(detail=False, methods=['post'])
     def upload_image(self, request):
@@ -132,9 +227,6 @@ class EventViewSet(viewsets.ModelViewSet):
         上传赛事图片到前端public目录
         POST /api/events/upload_image/
         """
-        import os
-        from django.conf import settings
-
         # el-upload 默认使用 'file' 字段名
         if 'file' not in request.FILES and 'image' not in request.FILES:
             return Response({
@@ -156,26 +248,8 @@ class EventViewSet(viewsets.ModelViewSet):
                 'error': '图片大小不能超过 2MB'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        # 生成唯一文件名
-        import uuid
-        from datetime import datetime
-        timestamp = datetime.now().strftime('%Y%m%d%H%M%S')
-        random_str = str(uuid.uuid4())[:8]
-        extension = image_file.name.split('.')[-1]
-        filename = f'event_{timestamp}_{random_str}.{extension}'
-
-        # 前端 public 目录路径
-        frontend_public_dir = os.path.join(settings.BASE_DIR, '..', 'frontend', 'public', 'images', 'events')
-        os.makedirs(frontend_public_dir, exist_ok=True)
-
-        # 保存文件
-        file_path = os.path.join(frontend_public_dir, filename)
-        with open(file_path, 'wb+') as destination:
-            for chunk in image_file.chunks():
-                destination.write(chunk)
-
-        # 返回相对路径
-        relative_path = f'/images/events/{filename}'
+        # 按内容哈希命名保存到前端 public 目录，缩略图在后台生成
+        relative_path = save_public_image(image_file, 'events', 'event')
 
         return Response({
             'message': '图片上传成功',
@@ -188,14 +262,16 @@ class EventViewSet(viewsets.ModelViewSet):
         获取可以报名的赛事
         GET /api/events/can_register/
         """
-        now = timezone.now()
-        events = self.queryset.filter(
-            status__in=['published', 'ongoing'],
-            registration_start__lte=now,
-            registration_end__gte=now
-        )
-        serializer = EventListSerializer(events, many=True)
-        return Response(serializer.data)
+        def build():
+            now = timezone.now()
+            events = self.queryset.filter(
+                status__in=['published', 'ongoing'],
+                registration_start__lte=now,
+                registration_end__gte=now
+            )
+            return EventListSerializer(events, many=True).data
+
+        return Response(get_event_snapshot('can_register', build))
 
     @action(detail=True, methods=['get'])
     def registrations(self, request, pk=None):
@@ -210,7 +286,14 @@ class EventViewSet(viewsets.ModelViewSet):
         serializer = RegistrationSerializer(registrations, many=True)
         return Response(serializer.data)
 
+    def get_results_validators(self, request, pk=None):
+        """赛事已公开成绩的条件请求校验值"""
+        if not str(pk).isdigit():
+            return None
+        return queryset_validators(Result.objects.filter(event_id=pk, is_published=True))
+
     @action(detail=True, methods=['get'])
+    @conditional_get('get_results_validators', max_age=15)
     def results(self, request, pk=None):
         """
         获取赛事的成绩列表
@@ -225,6 +308,26 @@ class EventViewSet(viewsets.ModelViewSet):
         serializer = ResultSerializer(results, many=True)
         return Response(serializer.data)
 
+    @action(detail=True, methods=['get'])
+    def archive(self, request, pk=None):
+        """
+        导出赛事归档
+        GET /api/events/{id}/archive/
+
+        一个 xlsx 文件包含报名名单和初赛、半决赛、决赛成绩各一个工作表；
+        赛事、报名或成绩没有变化时直接返回上次生成的文件
+        """
+        event = self.get_object()
+        referee_ids = get_referee_event_ids(request.user, request)
+        if referee_ids is not None and event.id not in referee_ids:
+            raise PermissionDenied('您没有权限导出该赛事')
+
+        name = get_event_archive(event)
+        filename = f"{build_filename('event_archive', datetime.now(), event.title)}.xlsx"
+        return FileResponse(
+            default_storage.open(name, 'rb'), as_attachment=True, filename=filename, content_type=XLSX_CONTENT_TYPE
+        )
+
     @action(detail=True, methods=['get'])
     def announcements(self, request, pk=None):
         """
@@ -259,15 +362,8 @@ class EventViewSet(viewsets.ModelViewSet):
         if not status_param:
             return queryset
 
-        now = timezone.now()
-        if status_param == 'finished':
-            finished_filter = (
-                Q(status='finished') |
-                (Q(status__in=['published', 'ongoing']) & Q(end_time__lt=now))
-            )
-            return queryset.filter(finished_filter)
-
-        return queryset.filter(status=status_param)
+        # 以存储的状态为准，只对上次推进后跨过时间边界的赛事兜底修正
+        return queryset.filter(effective_status_q(status_param))
 
 
 class EventAssignmentViewSet(viewsets.ModelViewSet):
@@ -368,6 +464,8 @@ class RefereeEventAccessViewSet(viewsets.ModelViewSet):  # 必须是ModelViewSet
             existing_ids = set(RefereeEventAccess.objects.filter(referee_id=referee_id).values_list('event_id', flat=True))
             to_create = [RefereeEventAccess(referee_id=referee_id, event_id=event_id) for event_id in event_ids if event_id not in existing_ids]
             RefereeEventAccess.objects.bulk_create(to_create)
+            # bulk_create 不发送 post_save 信号，手动使缓存失效
+            invalidate_referee_event_ids([referee_id])
 
         queryset = RefereeEventAccess.objects.filter(referee_id=referee_id).select_related('event')
         serializer = self.get_serializer(queryset, many=True)
@@ -380,7 +478,11 @@ class RefereeEventAccessViewSet(viewsets.ModelViewSet):  # 必须是ModelViewSet
         if not user.is_authenticated or user.user_type != 'referee':
             return Response([], status=status.HTTP_200_OK)
 
-        accesses = RefereeEventAccess.objects.filter(referee=user).select_related('event')
+        accesses = RefereeEventAccess.objects.filter(referee=user).select_related('event__organizer')
         events = [access.event for access in accesses]
-        serializer = EventListSerializer(events, many=True, context={'request': request})
+        context = {
+            'request': request,
+            USER_FLAGS_CONTEXT_KEY: resolve_event_user_flags(user, [event.id for event in events]),
+        }
+        serializer = EventListSerializer(events, many=True, context=context)
         return Response(serializer.data)
@@ -0,0 +1,205 @@
+"""
+后台导出任务
+
+流程:
+    1. request_export() 根据导出类型、数据范围、筛选参数、文件格式和数据版本计算 cache_key，
+       存在未过期的相同任务时直接复用，否则登记新任务；
+       等待或运行超过 STALE_JOB_SECONDS 的任务视为已中断（进程退出、重启丢失了线程池任务），不再复用
+    2. 任务由 Web 进程的后台线程池（EXPORT_JOBS_IN_PROCESS=True）或独立工作进程
+       （python manage.py process_export_jobs --loop）领取执行，
+       领取通过条件 UPDATE 完成，多个工作者不会重复执行同一任务
+    3. 文件保存在 MEDIA_ROOT/exports/<cache_key>.<格式>，保留 EXPORT_ARTIFACT_TTL 秒
+    4. process_export_jobs 命令把中断的运行中任务标记为失败，并执行遗留的等待中任务
+
+数据版本取自查询结果的行数、最大ID和最近修改时间，
+报名或成绩发生新增、修改、删除后，相同的筛选参数会生成新文件
+"""
+import hashlib
+import json
+import logging
+import tempfile
+from datetime import timedelta
+from importlib import import_module
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Count, Max, Q
+from django.utils import timezone
+
+from utils.background import submit
+from utils.export import write_export_file
+from .models import ExportJob
+
+
+logger = logging.getLogger(__name__)
+
+# 导出类型 -> 定义导出内容的模块（EXPORT_FIELDS、EXPORT_HEADERS、EXPORT_PARAMS、
+# get_export_scope、build_export_queryset、get_export_filename）
+EXPORTERS = {
+    'registrations': 'apps.registrations.exports',
+    'results': 'apps.results.exports',
+}
+EXPORT_DIR = 'exports'
+# 等待或运行超过该时间（秒）的任务视为已中断
+STALE_JOB_SECONDS = 600
+
+
+def get_exporter(kind):
+    """获取导出类型对应的模块"""
+    return import_module(EXPORTERS[kind])
+
+
+def get_artifact_ttl():
+    """导出文件的保留时间（秒）"""
+    return getattr(settings, 'EXPORT_ARTIFACT_TTL', 86400)
+
+
+def can_view_all_jobs(user):
+    """管理员和组织者可以查看所有导出任务"""
+    return user.is_superuser or user.user_type in ['admin', 'organizer']
+
+
+def get_data_version(queryset):
+    """
+    计算查询结果的数据版本
+
+    返回:
+        list: [行数, 最大ID, 最近修改时间]
+    """
+    version = queryset.order_by().aggregate(count=Count('pk'), last_id=Max('pk'), updated=Max('updated_at'))
+    return [version['count'], version['last_id'], version['updated']]
+
+
+def build_cache_key(kind, scope, params, file_type, version):
+    """由导出内容的全部决定因素计算缓存键"""
+    raw = json.dumps([kind, scope, sorted(params.items()), file_type, version], default=str)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+def request_export(kind, user, params, file_type='xlsx'):
+    """
+    提交导出任务
+
+    参数:
+        kind: 导出类型，'registrations' 或 'results'
+        user: 发起导出的用户
+        params: 请求中的筛选参数，只保留影响导出内容的部分
+        file_type: 'xlsx' 或 'csv'
+
+    返回:
+        ExportJob: 新登记或复用的任务
+    """
+    exporter = get_exporter(kind)
+    params = {name: str(params[name]) for name in exporter.EXPORT_PARAMS if params.get(name)}
+    version = get_data_version(exporter.build_export_queryset(user, params))
+    cache_key = build_cache_key(kind, exporter.get_export_scope(user), params, file_type, version)
+
+    now = timezone.now()
+    stale_before = now - timedelta(seconds=STALE_JOB_SECONDS)
+    reusable = ExportJob.objects.filter(cache_key=cache_key).filter(
+        Q(status='pending', created_at__gte=stale_before)
+        | Q(status='running', started_at__gte=stale_before)
+        | Q(status='succeeded', expires_at__gt=now)
+    )
+    if not can_view_all_jobs(user):
+        reusable = reusable.filter(created_by=user)
+    job = reusable.order_by('-id').first()
+    if job is not None:
+        return job
+
+    job = ExportJob.objects.create(
+        kind=kind, file_type=file_type, params=params, cache_key=cache_key, created_by=user
+    )
+    if getattr(settings, 'EXPORT_JOBS_IN_PROCESS', True):
+        transaction.on_commit(lambda: submit(run_export_job, job.id))
+    return job
+
+
+def claim_job(job_id):
+    """领取任务，已被其他工作者领取时返回 False"""
+    return ExportJob.objects.filter(pk=job_id, status='pending')\
+        .update(status='running', started_at=timezone.now()) == 1
+
+
+def run_export_job(job_id):
+    """
+    执行导出任务
+
+    返回:
+        bool: 是否执行了该任务
+    """
+    if not claim_job(job_id):
+        return False
+    job = ExportJob.objects.select_related('created_by').get(pk=job_id)
+    try:
+        exporter = get_exporter(job.kind)
+        queryset = exporter.build_export_queryset(job.created_by, job.params)
+        name = f'{EXPORT_DIR}/{job.cache_key}.{job.file_type}'
+        with tempfile.TemporaryFile() as file:
+            write_export_file(queryset, exporter.EXPORT_FIELDS, exporter.EXPORT_HEADERS, file, job.file_type)
+            file.seek(0)
+            # 相同缓存键的旧文件（已过期或上次生成失败）直接覆盖
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            job.file.name = default_storage.save(name, File(file))
+        job.filename = f'{exporter.get_export_filename(job.params)}.{job.file_type}'
+        job.status = 'succeeded'
+        job.expires_at = timezone.now() + timedelta(seconds=get_artifact_ttl())
+    except Exception as exc:
+        logger.exception('导出任务执行失败: %s', job_id)
+        job.status = 'failed'
+        job.error = str(exc)[:500]
+    job.finished_at = timezone.now()
+    job.save(update_fields=['file', 'filename', 'status', 'expires_at', 'error', 'finished_at'])
+    return True
+
+
+def fail_stale_jobs():
+    """
+    把中断的运行中任务标记为失败
+
+    返回:
+        int: 标记的任务数量
+    """
+    stale_before = timezone.now() - timedelta(seconds=STALE_JOB_SECONDS)
+    return ExportJob.objects.filter(status='running', started_at__lt=stale_before).update(
+        status='failed', error='任务执行中断', finished_at=timezone.now()
+    )
+
+
+def process_pending_jobs(limit=None):
+    """
+    按提交顺序执行等待中的任务
+
+    包括 Web 进程重启后线程池中丢失、无人执行的任务；
+    领取通过条件 UPDATE 完成，不会与仍在执行的线程池重复
+
+    返回:
+        int: 执行的任务数量
+    """
+    job_ids = ExportJob.objects.filter(status='pending').order_by('id').values_list('id', flat=True)
+    if limit:
+        job_ids = job_ids[:limit]
+    return sum(1 for job_id in list(job_ids) if run_export_job(job_id))
+
+
+def purge_expired_exports():
+    """
+    删除过期的导出文件
+
+    返回:
+        int: 清理的任务数量
+    """
+    expired = ExportJob.objects.filter(status='succeeded', expires_at__lte=timezone.now())
+    purged = 0
+    for job in expired:
+        if job.file and not ExportJob.objects.filter(
+            file=job.file.name, status='succeeded', expires_at__gt=timezone.now()
+        ).exists():
+            default_storage.delete(job.file.name)
+        job.status = 'expired'
+        job.save(update_fields=['status'])
+        purged += 1
+    return purged
@@ -0,0 +1,39 @@
+"""
+导出任务工作进程
+
+执行等待中的导出任务，把中断的运行中任务标记为失败，并清理过期文件：
+    python manage.py process_export_jobs           # 处理一轮后退出
+    python manage.py process_export_jobs --loop    # 作为独立工作进程持续运行
+
+设置 EXPORT_JOBS_IN_PROCESS=False 时，导出任务只由该工作进程执行；
+默认在 Web 进程中执行时，也建议定期运行一轮，处理进程重启后遗留的任务
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.exports.jobs import fail_stale_jobs, process_pending_jobs, purge_expired_exports
+
+
+class Command(BaseCommand):
+    help = '执行等待中的导出任务并清理过期的导出文件'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='持续运行，定期检查新任务')
+        parser.add_argument('--interval', type=float, default=2, help='持续运行时的检查间隔（秒），默认2')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            failed = fail_stale_jobs()
+            processed = process_pending_jobs()
+            purged = purge_expired_exports()
+            if failed:
+                self.stdout.write(f'{failed} 个导出任务执行中断，已标记为失败')
+            if processed or purged or not options['loop']:
+                self.stdout.write(f'执行 {processed} 个导出任务，清理 {purged} 个过期文件')
+            if not options['loop']:
+                return
+            if not processed:
+                time.sleep(options['interval'])
@@ -0,0 +1,43 @@
+# Generated by Django 5.0 on 2026-10-18 16:52
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('registrations', '报名名单'), ('results', '成绩表')], max_length=20, verbose_name='导出类型')),
+                ('file_type', models.CharField(default='xlsx', max_length=10, verbose_name='文件格式')),
+                ('params', models.JSONField(blank=True, default=dict, verbose_name='筛选参数')),
+                ('cache_key', models.CharField(max_length=64, verbose_name='缓存键')),
+                ('status', models.CharField(choices=[('pending', '等待中'), ('running', '生成中'), ('succeeded', '已完成'), ('failed', '失败'), ('expired', '已过期')], default='pending', max_length=20, verbose_name='状态')),
+                ('file', models.FileField(blank=True, upload_to='exports/', verbose_name='导出文件')),
+                ('filename', models.CharField(blank=True, max_length=200, verbose_name='下载文件名')),
+                ('error', models.TextField(blank=True, verbose_name='错误信息')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='开始时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+                ('expires_at', models.DateTimeField(blank=True, null=True, verbose_name='过期时间')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='export_jobs', to=settings.AUTH_USER_MODEL, verbose_name='发起人')),
+            ],
+            options={
+                'verbose_name': '导出任务',
+                'verbose_name_plural': '导出任务',
+                'db_table': 'export_job',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['cache_key', 'status'], name='export_job_cache_k_aec4d2_idx'), models.Index(fields=['status', 'id'], name='export_job_status_38943f_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.db import models
+
+
+class ExportJob(models.Model):
+    """
+    后台导出任务模型
+
+    大批量导出不占用 Web 进程：请求只登记任务并返回任务ID，
+    由后台工作者生成文件保存到 MEDIA_ROOT/exports/，客户端轮询任务状态后下载
+
+    关键字段说明:
+        - kind: 导出类型（报名名单/成绩表）
+        - params: 影响导出内容的筛选参数
+        - cache_key: 由导出类型、数据范围、筛选参数、文件格式和数据版本计算的哈希，
+          相同请求在文件过期前直接复用已生成的文件
+        - expires_at: 文件过期时间，过期后文件被清理
+
+    数据表名: export_job
+    """
+    KIND_CHOICES = (
+        ('registrations', '报名名单'),
+        ('results', '成绩表'),
+    )
+
+    STATUS_CHOICES = (
+        ('pending', '等待中'),
+        ('running', '生成中'),
+        ('succeeded', '已完成'),
+        ('failed', '失败'),
+        ('expired', '已过期'),
+    )
+
+    kind = models.CharField(
+        max_length=20,
+        choices=KIND_CHOICES,
+        verbose_name='导出类型'
+    )
+    file_type = models.CharField(
+        max_length=10,
+        default='xlsx',
+        verbose_name='文件格式'
+    )
+    params = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='筛选参数'
+    )
+    cache_key = models.CharField(
+        max_length=64,
+        verbose_name='缓存键'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name='状态'
+    )
+    file = models.FileField(
+        upload_to='exports/',
+        blank=True,
+        verbose_name='导出文件'
+    )
+    filename = models.CharField(
+        max_length=200,
+        blank=True,
+        verbose_name='下载文件名'
+    )
+    error = models.TextField(
+        blank=True,
+        verbose_name='错误信息'
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='export_jobs',
+        verbose_name='发起人'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='创建时间'
+    )
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='开始时间'
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='完成时间'
+    )
+    expires_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='过期时间'
+    )
+
+    class Meta:
+        db_table = 'export_job'
+        verbose_name = '导出任务'
+        verbose_name_plural = verbose_name
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['cache_key', 'status']),   # 查找可复用的任务
+            models.Index(fields=['status', 'id']),          # 工作者按顺序领取任务
+        ]
+
+    def __str__(self):
+        return f"{self.get_kind_display()} #{self.id} ({self.get_status_display()})"
@@ -0,0 +1,33 @@
+from django.urls import reverse
+from rest_framework import serializers
+
+from .models import ExportJob
+
+
+class ExportJobSerializer(serializers.ModelSerializer):
+    """
+    导出任务序列化器
+
+    扩展字段说明:
+        - kind_display / status_display: 类型和状态的中文名称
+        - download_url: 任务完成后的下载地址，未完成或已过期时为 null
+    """
+    kind_display = serializers.CharField(source='get_kind_display', read_only=True)
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ExportJob
+        fields = [
+            'id', 'kind', 'kind_display', 'file_type', 'params', 'status', 'status_display',
+            'filename', 'error', 'download_url', 'created_at', 'started_at', 'finished_at', 'expires_at'
+        ]
+        read_only_fields = fields
+
+    def get_download_url(self, obj):
+        """生成下载地址"""
+        if obj.status != 'succeeded':
+            return None
+        url = reverse('export-job-download', args=[obj.id])
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
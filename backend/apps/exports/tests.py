@@ -0,0 +1,171 @@
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.events.models import Event
+from apps.registrations.models import Registration
+from .jobs import STALE_JOB_SECONDS
+from .models import ExportJob
+
+
+User = get_user_model()
+
+
+class ExportJobTests(TestCase):
+    """后台导出任务与文件复用"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root, BACKGROUND_TASKS_EAGER=True)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        self.admin = User.objects.create_user(
+            username='export-admin',
+            password='password123',
+            real_name='管理员',
+            phone='13800000200',
+            is_superuser=True
+        )
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title='导出赛事',
+            description='描述',
+            location='成都',
+            event_type='athletics',
+            start_time=now + timedelta(days=2),
+            end_time=now + timedelta(days=3),
+            registration_start=now - timedelta(days=1),
+            registration_end=now + timedelta(days=1),
+            status='published',
+            organizer=self.admin,
+            contact_person='吴九',
+            contact_phone='13900000006'
+        )
+        for index in range(3):
+            self.add_registration(index)
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('registration-export')
+
+    def add_registration(self, index):
+        user = User.objects.create_user(
+            username=f'export-athlete{index}',
+            password='password123',
+            real_name=f'运动员{index}',
+            phone=f'1370000{index:04d}'
+        )
+        return Registration.objects.create(
+            event=self.event,
+            user=user,
+            participant_name=user.real_name,
+            participant_phone=user.phone,
+            participant_id_card=f'11010119900101{index:04d}',
+            participant_gender='M',
+            participant_birth_date='1990-01-01',
+            emergency_contact='家属',
+            emergency_phone='13800009999',
+            registration_number=f'REG-EXPORT-{index}'
+        )
+
+    def request_export(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.get(self.url, {'event': self.event.id, 'file_type': 'csv', 'async': 1})
+        self.assertEqual(response.status_code, 202)
+        return response.data['job']['id']
+
+    def test_async_export_and_download(self):
+        job_id = self.request_export()
+        job = self.client.get(reverse('export-job-detail', args=[job_id])).data
+        self.assertEqual(job['status'], 'succeeded')
+        self.assertIsNotNone(job['download_url'])
+
+        response = self.client.get(reverse('export-job-download', args=[job_id]))
+        lines = b''.join(response.streaming_content).decode('utf-8-sig').strip().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(response['Content-Disposition'].startswith('attachment'))
+
+    def test_identical_requests_reuse_artifact(self):
+        first = self.request_export()
+        self.assertEqual(self.request_export(), first)
+        self.assertEqual(ExportJob.objects.count(), 1)
+
+        # 数据变化后生成新文件
+        self.add_registration(9)
+        self.assertNotEqual(self.request_export(), first)
+
+        # 过期后不再复用，清理命令删除文件
+        ExportJob.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        out = StringIO()
+        call_command('process_export_jobs', stdout=out)
+        self.assertIn('清理 2 个过期文件', out.getvalue())
+        response = self.client.get(reverse('export-job-download', args=[first]))
+        self.assertEqual(response.status_code, 410)
+
+    def test_bulk_review_changes_data_version(self):
+        first = self.request_export()
+        response = self.client.post(
+            reverse('registration-bulk-approve'),
+            {'ids': list(Registration.objects.values_list('id', flat=True))},
+            format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+
+        # 批量审核只修改状态，行数与最大ID不变，仍需生成新文件
+        second = self.request_export()
+        self.assertNotEqual(second, first)
+        self.assertEqual(ExportJob.objects.count(), 2)
+        response = self.client.get(reverse('export-job-download', args=[second]))
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        self.assertNotIn('pending', content)
+        self.assertNotIn('待审核', content)
+
+    def test_stale_jobs_are_not_reused(self):
+        first = self.request_export()
+        stale = timezone.now() - timedelta(seconds=STALE_JOB_SECONDS + 1)
+        # 模拟执行中进程退出的任务
+        ExportJob.objects.filter(pk=first).update(status='running', started_at=stale, file='')
+
+        second = self.request_export()
+        self.assertNotEqual(second, first)
+        self.assertEqual(ExportJob.objects.get(pk=second).status, 'succeeded')
+
+        out = StringIO()
+        call_command('process_export_jobs', stdout=out)
+        self.assertIn('1 个导出任务执行中断', out.getvalue())
+        self.assertEqual(ExportJob.objects.get(pk=first).status, 'failed')
+
+    @override_settings(EXPORT_JOBS_IN_PROCESS=False)
+    def test_orphaned_pending_job_is_picked_up(self):
+        first = self.request_export()
+        ExportJob.objects.filter(pk=first).update(created_at=timezone.now() - timedelta(seconds=STALE_JOB_SECONDS + 1))
+        second = self.request_export()
+        self.assertNotEqual(second, first)
+
+        call_command('process_export_jobs', stdout=StringIO())
+        self.assertEqual(
+            set(ExportJob.objects.filter(pk__in=[first, second]).values_list('status', flat=True)), {'succeeded'}
+        )
+
+    @override_settings(EXPORT_JOBS_IN_PROCESS=False)
+    def test_worker_process_picks_up_jobs(self):
+        job_id = self.request_export()
+        self.assertEqual(ExportJob.objects.get(pk=job_id).status, 'pending')
+
+        call_command('process_export_jobs', stdout=StringIO())
+        self.assertEqual(ExportJob.objects.get(pk=job_id).status, 'succeeded')
+
+    def test_other_users_cannot_see_jobs(self):
+        job_id = self.request_export()
+        athlete = User.objects.get(username='export-athlete0')
+        self.client.force_authenticate(athlete)
+        self.assertEqual(self.client.get(reverse('export-job-detail', args=[job_id])).status_code, 404)
@@ -0,0 +1,78 @@
+"""
+导出任务视图
+
+提供后台导出任务的状态查询和文件下载
+"""
+from django.http import FileResponse
+from django.utils import timezone
+from rest_framework import viewsets, status
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from .jobs import can_view_all_jobs, request_export
+from .models import ExportJob
+from .serializers import ExportJobSerializer
+
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def is_async_export(request):
+    """请求是否使用后台导出（?async=1）"""
+    return str(request.query_params.get('async', '')).lower() in TRUE_VALUES
+
+
+def start_export_job(request, kind, params, file_type):
+    """
+    提交后台导出任务并返回 202 响应
+
+    参数:
+        request: 当前请求
+        kind: 导出类型
+        params: 筛选参数
+        file_type: 'xlsx' 或 'csv'
+    """
+    job = request_export(kind, request.user, params, file_type)
+    return Response({
+        'message': '导出任务已提交' if job.status != 'succeeded' else '导出文件已生成',
+        'job': ExportJobSerializer(job, context={'request': request}).data
+    }, status=status.HTTP_202_ACCEPTED)
+
+
+class ExportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    导出任务视图集
+
+    接口:
+        GET /api/exports/              我的导出任务
+        GET /api/exports/{id}/         查询任务状态
+        GET /api/exports/{id}/download/ 下载导出文件
+
+    权限控制:
+        - 普通用户只能查看自己发起的任务，管理员和组织者可查看全部
+    """
+    queryset = ExportJob.objects.all()
+    serializer_class = ExportJobSerializer
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        """限制普通用户只能看到自己的任务"""
+        if can_view_all_jobs(self.request.user):
+            return self.queryset
+        return self.queryset.filter(created_by=self.request.user)
+
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        """
+        下载导出文件
+        GET /api/exports/{id}/download/
+        """
+        job = self.get_object()
+        if job.status in ['pending', 'running']:
+            return Response({'error': '导出尚未完成'}, status=status.HTTP_400_BAD_REQUEST)
+        if job.status == 'failed':
+            return Response({'error': '导出失败', 'detail': job.error}, status=status.HTTP_400_BAD_REQUEST)
+        if job.status == 'expired' or (job.expires_at and job.expires_at <= timezone.now()):
+            return Response({'error': '导出文件已过期，请重新导出'}, status=status.HTTP_410_GONE)
+        return FileResponse(job.file.open('rb'), as_attachment=True, filename=job.filename)
@@ -253,6 +253,7 @@ class Comment(models.Model):
             models.Index(fields=['user']),                        # 查询用户的所有评论
             models.Index(fields=['parent']),                      # 查询某评论的所有回复
             models.Index(fields=['-created_at']),                 # 按时间排序
+            models.Index(fields=['-created_at', '-id']),          # 键集分页的稳定排序
         ]
     
     def __str__(self):
@@ -6,6 +6,7 @@
 from rest_framework import serializers
 from django.contrib.contenttypes.models import ContentType
 from .models import Like, Favorite, Comment
+from utils.fieldsets import SparseFieldsetSerializerMixin
 
 
 class LikeSerializer(serializers.ModelSerializer):
@@ -96,7 +97,7 @@ class FavoriteSerializer(serializers.ModelSerializer):
         return getattr(obj.content_object, 'start_time', None)
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class CommentSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """
     评论序列化器
     
@@ -116,6 +117,14 @@ class CommentSerializer(serializers.ModelSerializer):
     event_title = serializers.SerializerMethodField()
     event_id = serializers.SerializerMethodField()
 
+    # 稀疏字段集：方法字段依赖的模型字段（关联对象通过 content_type + object_id 加载）
+    field_dependencies = {
+        'content_type_name': ('content_type__model',),
+        'replies': ('replies',),
+        'event_title': ('content_type__model', 'object_id'),
+        'event_id': ('content_type__model', 'object_id'),
+    }
+
     class Meta:
         model = Comment
         fields = [
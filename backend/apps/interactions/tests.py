@@ -1,3 +1,72 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.events.models import Event
+from .models import Comment
+
+
+User = get_user_model()
+
+
+class CommentSparseFieldsetTests(TestCase):
+    """评论列表按 ?fields= 跳过回复预取和关联对象查询"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='commenter',
+            password='password123',
+            real_name='评论者',
+            phone='13800000090'
+        )
+        now = timezone.now()
+        self.event = Event.objects.create(
+            title='评论赛事',
+            description='描述',
+            location='杭州',
+            event_type='athletics',
+            start_time=now + timedelta(days=2),
+            end_time=now + timedelta(days=3),
+            registration_start=now - timedelta(days=1),
+            registration_end=now + timedelta(days=1),
+            status='published',
+            organizer=self.user,
+            contact_person='钱十二',
+            contact_phone='13900000009'
+        )
+        content_type = ContentType.objects.get_for_model(Event)
+        parent = Comment.objects.create(
+            user=self.user, content_type=content_type, object_id=self.event.id, content='第一条评论'
+        )
+        Comment.objects.create(
+            user=self.user, content_type=content_type, object_id=self.event.id,
+            content='回复', parent=parent, reply_to=self.user
+        )
+        self.client = APIClient()
+        self.url = reverse('comment-list')
+
+    def test_fields_skip_heavy_method_fields(self):
+        full = self.client.get(self.url)
+        self.assertEqual(full.status_code, 200)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(self.url, {'fields': 'id,content,user_name'})
+        self.assertEqual(response.status_code, 200)
+        for item in response.data['results']:
+            self.assertEqual(set(item), {'id', 'content', 'user_name'})
+        # 只有 COUNT 和一次带用户 JOIN 的列表查询，没有回复预取和赛事查询
+        self.assertEqual(len(ctx.captured_queries), 2)
 
-# Create your tests here.
+    def test_requested_method_fields_still_work(self):
+        response = self.client.get(self.url, {'fields': 'id,replies,event_title'})
+        self.assertEqual(response.status_code, 200)
+        by_reply_count = {len(item['replies']): item for item in response.data['results']}
+        self.assertEqual(by_reply_count[1]['event_title'], '评论赛事')
+        self.assertEqual(by_reply_count[1]['replies'][0]['content'], '回复')
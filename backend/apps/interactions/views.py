@@ -22,6 +22,8 @@ from .serializers import (
     CommentCreateSerializer
 )
 from utils.permissions import IsOwnerOrAdmin, IsAdmin
+from utils.pagination import CursorOrPageNumberPagination
+from utils.fieldsets import SparseFieldsetViewSetMixin
 
 
 logger = logging.getLogger(__name__)
@@ -287,7 +289,7 @@ class FavoriteViewSet(viewsets.ModelViewSet):
         })
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(SparseFieldsetViewSetMixin, viewsets.ModelViewSet):
     """
     评论视图集
     
@@ -318,6 +320,7 @@ class CommentViewSet(viewsets.ModelViewSet):
     filterset_fields = ['content_type', 'object_id', 'is_approved', 'parent']
     search_fields = ['content', 'user__username', 'user__real_name']
     ordering = ['-created_at']
+    pagination_class = CursorOrPageNumberPagination  # 支持 ?cursor= 键集分页
 
     def filter_target_type(self, queryset):
         target_type = self.request.query_params.get('target_type')
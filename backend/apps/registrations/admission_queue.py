@@ -0,0 +1,195 @@
+"""
+报名排队
+
+热门赛事开放报名的瞬间，大量请求同时写入报名表会让数据库成为排队点。
+开启排队报名（Event.queue_registrations）的赛事改为：
+    - 接口完成参数校验后只写入一张票据（RegistrationTicket），立即返回 202
+    - 每个赛事同一时间最多一个处理者，按票据ID顺序逐个调用
+      RegistrationCreateSerializer 完成报名，保证先到先得
+    - 处理者运行在 utils.background 的有界线程池中，总并发受 BACKGROUND_WORKERS 限制
+    - 处理结果写回票据，并通过 Channels 推送给订阅该票据的客户端
+
+处理者依靠缓存锁互斥，多进程部署需要使用共享缓存；缓存锁只用于避免重复启动处理者，
+锁过期后出现第二个处理者时，每张票据仍需在数据库中领取（select_for_update(skip_locked=True)）
+并以 `UPDATE ... WHERE status='queued'` 写回结果，不会重复处理或覆盖已处理的票据。
+进程重启后遗留的排队票据可通过 `python manage.py process_registration_queue` 继续处理
+"""
+import json
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from rest_framework import serializers
+
+from utils.background import submit
+from .models import RegistrationTicket
+
+
+logger = logging.getLogger(__name__)
+
+QUEUE_LOCK_KEY = 'registrations:queue:{event_id}:lock'
+# 处理者锁的过期时间（秒），处理者异常退出后锁会自动释放
+QUEUE_LOCK_TIMEOUT = 60
+# 每次从数据库取出的票据数量
+QUEUE_BATCH_SIZE = 50
+# 报名表单中允许写入票据的字段
+TICKET_PAYLOAD_FIELDS = (
+    'event', 'participant_name', 'participant_phone', 'participant_id_card',
+    'participant_gender', 'participant_birth_date', 'participant_organization',
+    'emergency_contact', 'emergency_phone', 'remarks',
+)
+
+
+def ticket_group(token):
+    """票据推送的频道组名"""
+    return f'registration_ticket_{token.hex}'
+
+
+def enqueue_registration(event, user, data):
+    """
+    提交报名票据
+
+    同一用户对同一赛事已有排队中的票据时直接返回该票据
+
+    参数:
+        event: 赛事对象
+        user: 报名用户
+        data: 已通过校验的报名表单数据
+
+    返回:
+        RegistrationTicket: 票据
+    """
+    ticket = RegistrationTicket.objects.filter(event=event, user=user, status='queued').first()
+    if ticket is None:
+        payload = {field: data[field] for field in TICKET_PAYLOAD_FIELDS if field in data}
+        ticket = RegistrationTicket.objects.create(event=event, user=user, payload=payload)
+    # 事务提交后再唤醒处理者，保证处理者能读到新票据
+    transaction.on_commit(lambda: wake_queue_worker(event.id))
+    return ticket
+
+
+def wake_queue_worker(event_id):
+    """赛事没有处理者时启动一个"""
+    if cache.add(QUEUE_LOCK_KEY.format(event_id=event_id), 1, timeout=QUEUE_LOCK_TIMEOUT):
+        submit(drain_event_queue, event_id)
+
+
+def drain_event_queue(event_id):
+    """
+    按提交顺序处理赛事的全部排队票据
+
+    调用前必须已持有该赛事的处理者锁
+
+    返回:
+        int: 处理的票据数量
+    """
+    lock_key = QUEUE_LOCK_KEY.format(event_id=event_id)
+    processed = 0
+    try:
+        while True:
+            ticket_ids = list(
+                RegistrationTicket.objects.filter(event_id=event_id, status='queued')
+                .order_by('id').values_list('id', flat=True)[:QUEUE_BATCH_SIZE]
+            )
+            if not ticket_ids:
+                break
+            for ticket_id in ticket_ids:
+                if process_ticket(ticket_id) is not None:
+                    processed += 1
+                cache.touch(lock_key, QUEUE_LOCK_TIMEOUT)
+    finally:
+        cache.delete(lock_key)
+
+    # 释放锁之前刚提交的票据可能没有唤醒新的处理者，这里补一次
+    if RegistrationTicket.objects.filter(event_id=event_id, status='queued').exists():
+        wake_queue_worker(event_id)
+    return processed
+
+
+def _first_error(detail):
+    """从校验错误中取出第一条可读信息"""
+    if isinstance(detail, dict):
+        detail = next(iter(detail.values()), '')
+    if isinstance(detail, (list, tuple)):
+        detail = detail[0] if detail else ''
+        return _first_error(detail)
+    return str(detail)
+
+
+def process_ticket(ticket_id):
+    """
+    领取并处理单张票据
+
+    与直接报名走同一个序列化器：重新校验赛事状态、报名时间和重复报名，
+    并通过条件 UPDATE 原子占用名额。票据在事务内加锁领取，其他处理者跳过已加锁的票据；
+    结果只写回仍在排队中的票据，票据已被处理时回滚本次报名
+
+    参数:
+        ticket_id: 票据ID
+
+    返回:
+        RegistrationTicket: 处理后的票据；票据已被其他处理者领取或处理时返回 None
+    """
+    from .serializers import RegistrationCreateSerializer
+
+    with transaction.atomic():
+        ticket = RegistrationTicket.objects.select_for_update(skip_locked=True, of=('self',))\
+            .select_related('user').filter(pk=ticket_id, status='queued').first()
+        if ticket is None:
+            return None
+
+        serializer = RegistrationCreateSerializer(data=ticket.payload, context={'user': ticket.user})
+        try:
+            # 保存点：报名失败时只回滚报名本身，票据仍可写回失败结果
+            with transaction.atomic():
+                if serializer.is_valid():
+                    ticket.registration = serializer.save()
+                    ticket.status, ticket.message = 'admitted', '报名成功'
+                else:
+                    ticket.status, ticket.message = 'rejected', _first_error(serializer.errors)
+        except serializers.ValidationError as exc:
+            ticket.status, ticket.message = 'rejected', _first_error(exc.detail)
+        except Exception:
+            logger.exception('处理报名票据失败: %s', ticket.pk)
+            ticket.status, ticket.message = 'rejected', '系统繁忙，请稍后重新报名'
+
+        ticket.processed_at = timezone.now()
+        updated = RegistrationTicket.objects.filter(pk=ticket.pk, status='queued').update(
+            registration=ticket.registration,
+            status=ticket.status,
+            message=ticket.message,
+            processed_at=ticket.processed_at
+        )
+        if not updated:
+            # 不支持行锁的数据库上，票据已由其他处理者写回结果
+            transaction.set_rollback(True)
+            return None
+
+    notify_ticket(ticket)
+    return ticket
+
+
+def notify_ticket(ticket):
+    """向订阅该票据的客户端推送处理结果"""
+    from .serializers import RegistrationTicketSerializer
+
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return
+    try:
+        # UUID、时间等转换为 JSON 基本类型，兼容 Redis 通道层的序列化
+        payload = json.loads(json.dumps(RegistrationTicketSerializer(ticket).data, cls=DjangoJSONEncoder))
+        async_to_sync(channel_layer.group_send)(
+            ticket_group(ticket.token),
+            {
+                'type': 'ticket.update',
+                'payload': payload,
+            },
+        )
+    except Exception:
+        # 推送失败不影响处理结果，客户端仍可轮询票据接口
+        logger.warning('推送报名票据结果失败: %s', ticket.pk, exc_info=True)
@@ -0,0 +1,71 @@
+"""
+报名票据 WebSocket 消费者
+
+排队报名的客户端提交报名后拿到票据 token，
+连接 ws://host/ws/registrations/tickets/<token>/ 即可实时收到处理结果，无需轮询
+"""
+
+import json
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from .admission_queue import ticket_group
+from .models import RegistrationTicket
+from .serializers import RegistrationTicketSerializer
+
+
+class RegistrationTicketConsumer(AsyncWebsocketConsumer):
+    """
+    报名票据消费者
+
+    连接流程：
+        1. 校验票据存在且属于当前登录用户（token 本身不可猜测，匿名连接同样允许）
+        2. 加入票据频道组，并立即发送票据当前状态
+        3. 票据处理完成后由 admission_queue.notify_ticket 推送结果
+
+    数据格式：
+        {
+            "type": "ticket_update",
+            "payload": {"token": ..., "status": "queued|admitted|rejected", "position": ..., ...}
+        }
+    """
+
+    async def connect(self):
+        """校验票据并加入频道组"""
+        self.group_name = None
+        payload = await database_sync_to_async(self.get_ticket_payload)()
+        if payload is None:
+            await self.close()
+            return
+
+        self.group_name = ticket_group(self.ticket_token)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await self.send(text_data=json.dumps({
+            "type": "ticket_update",
+            "payload": payload,
+        }))
+
+    def get_ticket_payload(self):
+        """查询票据当前状态，票据不存在或不属于当前用户时返回 None"""
+        ticket = RegistrationTicket.objects.select_related('event')\
+            .filter(token=self.scope["url_route"]["kwargs"]["token"]).first()
+        user = self.scope.get("user")
+        if ticket is None or (user and user.is_authenticated and not user.is_superuser
+                              and ticket.user_id != user.id):
+            return None
+        self.ticket_token = ticket.token
+        return json.loads(json.dumps(RegistrationTicketSerializer(ticket).data, default=str))
+
+    async def disconnect(self, close_code):
+        """从票据频道组中移除"""
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def ticket_update(self, event):
+        """转发票据处理结果，处理完成后票据不再变化"""
+        await self.send(text_data=json.dumps({
+            "type": "ticket_update",
+            "payload": event["payload"],
+        }))
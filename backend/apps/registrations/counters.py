@@ -0,0 +1,236 @@
+"""
+赛事报名计数维护
+
+Event.approved_count 是已通过审核报名数的冗余字段，
+代替每次查询时的 Count('registrations', filter=Q(status='approved')) 聚合：
+    - 报名状态变化时通过 F() 表达式增量更新，与报名记录的修改在同一事务中提交
+    - reconcile_event_counters 命令用一次 GROUP BY 重新计算，修正历史数据或意外偏差
+
+Event.current_participants 是占用名额的报名数（待审核 + 已通过）：
+    - 报名时由 admit_participant() 用一条带条件的 UPDATE 原子地占用名额，
+      数据库行锁保证并发报名不会超出 max_participants，也不会丢失计数
+    - 驳回、取消、删除时由 release_participants() 通过 F() 表达式释放名额
+"""
+from collections import Counter, defaultdict
+
+from django.db.models import Count, F, Q, Value
+from django.db.models.functions import Greatest
+
+from apps.events.models import Event
+
+
+APPROVED_STATUS = 'approved'
+# 占用名额的报名状态，对应 Event.current_participants
+ACTIVE_STATUSES = ('pending', 'approved')
+
+
+def _status_deltas(before, after, statuses):
+    deltas = Counter()
+    if before and before[1] in statuses:
+        deltas[before[0]] -= 1
+    if after and after[1] in statuses:
+        deltas[after[0]] += 1
+    return {event_id: delta for event_id, delta in deltas.items() if delta}
+
+
+def approved_deltas(before=None, after=None):
+    """
+    计算一次报名变更对各赛事已通过人数的影响
+
+    参数:
+        before: 变更前的 (event_id, status)，新建时为 None
+        after: 变更后的 (event_id, status)，删除时为 None
+
+    返回:
+        dict: 赛事ID -> 增量（不含为 0 的项）
+    """
+    return _status_deltas(before, after, (APPROVED_STATUS,))
+
+
+def participant_deltas(before=None, after=None):
+    """
+    计算一次报名变更对各赛事占用名额数（current_participants）的影响
+
+    参数与返回值同 approved_deltas()
+    """
+    return _status_deltas(before, after, ACTIVE_STATUSES)
+
+
+def apply_approved_deltas(deltas):
+    """
+    把增量写入 Event.approved_count
+
+    增量相同的赛事合并为一条 `UPDATE ... SET approved_count = approved_count + N`
+    调用方应在 transaction.atomic() 中与报名记录的修改一起执行
+
+    参数:
+        deltas: 赛事ID -> 增量
+    """
+    grouped = defaultdict(list)
+    for event_id, delta in deltas.items():
+        if delta:
+            grouped[delta].append(event_id)
+    for delta, event_ids in grouped.items():
+        Event.objects.filter(pk__in=event_ids).update(approved_count=F('approved_count') + delta)
+
+
+def sync_approved_count(before=None, after=None):
+    """
+    根据单条报名变更前后的状态同步已通过人数
+
+    参数:
+        before: 变更前的 (event_id, status)
+        after: 变更后的 (event_id, status)
+    """
+    apply_approved_deltas(approved_deltas(before, after))
+
+
+def admit_participant(event_id):
+    """
+    原子地占用一个报名名额
+
+    执行 `UPDATE ... SET current_participants = current_participants + 1
+    WHERE id = %s AND (max_participants <= 0 OR current_participants < max_participants)`，
+    条件判断与加一在同一条语句中完成；调用方应在 transaction.atomic() 中
+    与报名记录的创建一起执行，创建失败时名额随事务回滚
+
+    参数:
+        event_id: 赛事ID
+
+    返回:
+        bool: 占用成功返回True，名额已满返回False
+    """
+    has_capacity = Q(max_participants__lte=0) | Q(current_participants__lt=F('max_participants'))
+    updated = Event.objects.filter(has_capacity, pk=event_id)\
+        .update(current_participants=F('current_participants') + 1)
+    return updated == 1
+
+
+def release_participants(counts):
+    """
+    释放报名名额
+
+    释放数量相同的赛事合并为一条 UPDATE，计数最低减到 0
+
+    参数:
+        counts: 赛事ID -> 释放的名额数
+    """
+    grouped = defaultdict(list)
+    for event_id, count in counts.items():
+        if count > 0:
+            grouped[count].append(event_id)
+    for count, event_ids in grouped.items():
+        Event.objects.filter(pk__in=event_ids).update(
+            current_participants=Greatest(F('current_participants') - count, Value(0))
+        )
+
+
+def sync_participants(before=None, after=None):
+    """
+    根据单条报名变更前后的状态同步占用名额数
+
+    用于管理员直接修改或删除报名；重新占用名额（如驳回后改回待审核）
+    属于管理员操作，不受人数上限限制
+
+    参数:
+        before: 变更前的 (event_id, status)
+        after: 变更后的 (event_id, status)
+    """
+    apply_participant_deltas(participant_deltas(before, after))
+
+
+def apply_participant_deltas(deltas):
+    """
+    把增量写入 Event.current_participants
+
+    减少的部分经 release_participants() 释放（最低减到 0），增加的部分按增量合并更新，
+    不受人数上限限制
+
+    参数:
+        deltas: 赛事ID -> 增量
+    """
+    release_participants({event_id: -delta for event_id, delta in deltas.items() if delta < 0})
+    grouped = defaultdict(list)
+    for event_id, delta in deltas.items():
+        if delta > 0:
+            grouped[delta].append(event_id)
+    for delta, event_ids in grouped.items():
+        Event.objects.filter(pk__in=event_ids).update(current_participants=F('current_participants') + delta)
+
+
+def bulk_transition_deltas(rows, status=None):
+    """
+    计算一批报名统一变更为同一状态（或被删除）对各赛事计数的影响
+
+    参数:
+        rows: 变更前的 (event_id, status) 列表
+        status: 变更后的状态，删除时为 None
+
+    返回:
+        tuple: (已通过人数增量, 占用名额数增量)，均为 赛事ID -> 增量
+    """
+    approved, participants = Counter(), Counter()
+    for event_id, previous in rows:
+        after = (event_id, status) if status else None
+        approved.update(approved_deltas((event_id, previous), after))
+        participants.update(participant_deltas((event_id, previous), after))
+    return dict(approved), dict(participants)
+
+
+def apply_bulk_transition(rows, status=None):
+    """
+    按一批报名的状态变更同步赛事计数
+
+    每种计数、每个相同增量只执行一条 UPDATE，调用方应在 transaction.atomic() 中
+    与报名记录的批量修改一起执行
+
+    参数与 bulk_transition_deltas() 相同
+    """
+    approved, participants = bulk_transition_deltas(rows, status)
+    apply_approved_deltas(approved)
+    apply_participant_deltas(participants)
+
+
+def reconcile_event_counters(dry_run=False):
+    """
+    重新计算所有赛事的报名计数
+
+    一次 GROUP BY 同时统计已通过人数（approved_count）
+    和占用名额人数（current_participants），只写回不一致的赛事
+
+    参数:
+        dry_run: 为 True 时只返回差异，不写入数据库
+
+    返回:
+        list: [(event_id, 字段名, 旧值, 新值), ...]
+    """
+    from .models import Registration
+
+    counts = {
+        row['event_id']: row
+        for row in Registration.objects.values('event_id').annotate(
+            approved=Count('id', filter=Q(status=APPROVED_STATUS)),
+            active=Count('id', filter=Q(status__in=ACTIVE_STATUSES)),
+        ).order_by()
+    }
+
+    changes = []
+    stale = []
+    for event in Event.objects.only('id', 'approved_count', 'current_participants').iterator():
+        row = counts.get(event.id, {})
+        expected = {
+            'approved_count': row.get('approved', 0),
+            'current_participants': row.get('active', 0),
+        }
+        changed = False
+        for field, value in expected.items():
+            if getattr(event, field) != value:
+                changes.append((event.id, field, getattr(event, field), value))
+                setattr(event, field, value)
+                changed = True
+        if changed:
+            stale.append(event)
+
+    if stale and not dry_run:
+        Event.objects.bulk_update(stale, ['approved_count', 'current_participants'], batch_size=500)
+    return changes
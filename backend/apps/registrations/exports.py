@@ -0,0 +1,53 @@
+"""
+报名名单导出
+
+同步下载（RegistrationViewSet.export）与后台导出任务（apps.exports）共用的查询逻辑，
+后台任务没有请求对象，只能根据发起人和筛选参数重建查询集
+"""
+from datetime import datetime
+
+from apps.events.models import Event
+from utils.export import REGISTRATION_EXPORT_FIELDS, REGISTRATION_EXPORT_HEADERS, build_filename
+from .models import Registration
+
+
+EXPORT_FIELDS = REGISTRATION_EXPORT_FIELDS
+EXPORT_HEADERS = REGISTRATION_EXPORT_HEADERS
+# 影响导出内容的筛选参数
+EXPORT_PARAMS = ('event', 'status')
+
+
+def get_export_scope(user):
+    """
+    导出的数据范围
+
+    与 RegistrationViewSet.get_queryset() 一致：管理员和组织者可导出全部报名，其他用户只能导出自己的
+    """
+    if user.is_superuser or user.user_type in ['admin', 'organizer']:
+        return 'all'
+    return f'user:{user.id}'
+
+
+def build_export_queryset(user, params):
+    """
+    构建导出查询集
+
+    参数:
+        user: 发起导出的用户
+        params: 筛选参数，必须包含 event
+
+    返回:
+        QuerySet: 按报名时间倒序的报名记录
+    """
+    queryset = Registration.objects.filter(event_id=params['event'])
+    if get_export_scope(user) != 'all':
+        queryset = queryset.filter(user=user)
+    if params.get('status'):
+        queryset = queryset.filter(status=params['status'])
+    return queryset.order_by('-created_at', '-id')
+
+
+def get_export_filename(params):
+    """导出文件名（不含扩展名）"""
+    event_title = Event.objects.filter(pk=params['event']).values_list('title', flat=True).first()
+    return build_filename('registration_list', datetime.now(), event_title)
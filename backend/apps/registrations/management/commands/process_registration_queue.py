@@ -0,0 +1,35 @@
+"""
+处理遗留的报名排队票据
+
+进程重启等原因导致排队中的票据无人处理时，逐个赛事按提交顺序处理：
+    python manage.py process_registration_queue
+
+其他进程正在处理的赛事会被跳过
+"""
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from apps.registrations.admission_queue import (
+    QUEUE_LOCK_KEY, QUEUE_LOCK_TIMEOUT, drain_event_queue,
+)
+from apps.registrations.models import RegistrationTicket
+
+
+class Command(BaseCommand):
+    help = '按提交顺序处理排队中的报名票据'
+
+    def handle(self, *args, **options):
+        event_ids = RegistrationTicket.objects.filter(status='queued')\
+            .values_list('event_id', flat=True).distinct().order_by('event_id')
+
+        processed, skipped = 0, 0
+        for event_id in event_ids:
+            if not cache.add(QUEUE_LOCK_KEY.format(event_id=event_id), 1, timeout=QUEUE_LOCK_TIMEOUT):
+                skipped += 1
+                continue
+            processed += drain_event_queue(event_id)
+
+        message = f'共处理 {processed} 张票据'
+        if skipped:
+            message += f'，{skipped} 个赛事正由其他进程处理'
+        self.stdout.write(self.style.SUCCESS(message))
@@ -0,0 +1,30 @@
+"""
+校正赛事报名计数
+
+用一次 GROUP BY 重新统计每个赛事的已通过人数（approved_count）
+和占用名额人数（current_participants），写回不一致的记录：
+    python manage.py reconcile_event_counters
+    python manage.py reconcile_event_counters --dry-run
+"""
+from django.core.management.base import BaseCommand
+
+from apps.registrations.counters import reconcile_event_counters
+
+
+class Command(BaseCommand):
+    help = '按报名记录重新计算赛事的报名计数'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='只列出差异，不写入数据库')
+
+    def handle(self, *args, **options):
+        changes = reconcile_event_counters(dry_run=options['dry_run'])
+        if not changes:
+            self.stdout.write('所有赛事计数均一致')
+            return
+        for event_id, field, old, new in changes:
+            self.stdout.write(f'赛事 {event_id} {field}: {old} -> {new}')
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING(f'共 {len(changes)} 处差异（未写入）'))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'已校正 {len(changes)} 处差异'))
@@ -0,0 +1,39 @@
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('events', '0009_event_queue_registrations'),
+        ('registrations', '0003_keyset_pagination_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegistrationTicket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.UUIDField(default=uuid.uuid4, editable=False, unique=True, verbose_name='票据凭证')),
+                ('payload', models.JSONField(default=dict, verbose_name='报名信息')),
+                ('status', models.CharField(choices=[('queued', '排队中'), ('admitted', '报名成功'), ('rejected', '报名失败')], default='queued', max_length=20, verbose_name='状态')),
+                ('message', models.CharField(blank=True, default='', max_length=255, verbose_name='处理结果')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='提交时间')),
+                ('processed_at', models.DateTimeField(blank=True, null=True, verbose_name='处理时间')),
+                ('event', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='registration_tickets', to='events.event', verbose_name='赛事')),
+                ('registration', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='tickets', to='registrations.registration', verbose_name='报名记录')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='registration_tickets', to=settings.AUTH_USER_MODEL, verbose_name='用户')),
+            ],
+            options={
+                'verbose_name': '报名排队票据',
+                'verbose_name_plural': '报名排队票据',
+                'db_table': 'registration_ticket',
+                'ordering': ['id'],
+                'indexes': [models.Index(fields=['event', 'status', 'id'], name='registratio_event_i_393815_idx')],
+            },
+        ),
+    ]
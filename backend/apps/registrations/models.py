@@ -1,3 +1,5 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
 
@@ -193,8 +195,96 @@ class Registration(models.Model):
             models.Index(fields=['status']),  # 按审核状态查询
             models.Index(fields=['registration_number']),  # 按报名编号查询
             models.Index(fields=['event', 'user']),  # 联合索引，用于唯一性检查
+            models.Index(fields=['-created_at', '-id']),  # 键集分页的稳定排序
         ]
     
     def __str__(self):
         """返回报名的字符串表示"""
         return f"{self.participant_name} - {self.event.title}"
+
+
+class RegistrationTicket(models.Model):
+    """
+    报名排队票据
+
+    开启排队报名（Event.queue_registrations）的赛事，报名请求不直接写入报名表，
+    而是先保存为票据并立即返回；后台按赛事逐个、按提交顺序处理票据，
+    客户端通过轮询票据接口或订阅 WebSocket 获取结果
+
+    关键字段说明:
+        - token: 票据凭证，用于订阅 WebSocket 推送
+        - payload: 提交的报名信息，处理时交给 RegistrationCreateSerializer 校验和创建
+        - status: 排队中、报名成功、报名失败
+        - registration: 报名成功时关联的报名记录
+
+    数据表名: registration_ticket
+    """
+    STATUS_CHOICES = (
+        ('queued', '排队中'),
+        ('admitted', '报名成功'),
+        ('rejected', '报名失败'),
+    )
+
+    event = models.ForeignKey(
+        'events.Event',
+        on_delete=models.CASCADE,
+        related_name='registration_tickets',
+        verbose_name='赛事'
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='registration_tickets',
+        verbose_name='用户'
+    )
+    token = models.UUIDField(
+        default=uuid.uuid4,
+        unique=True,
+        editable=False,
+        verbose_name='票据凭证'
+    )
+    payload = models.JSONField(
+        default=dict,
+        verbose_name='报名信息'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='queued',
+        verbose_name='状态'
+    )
+    registration = models.ForeignKey(
+        Registration,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='tickets',
+        verbose_name='报名记录'
+    )
+    message = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        verbose_name='处理结果'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='提交时间'
+    )
+    processed_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='处理时间'
+    )
+
+    class Meta:
+        db_table = 'registration_ticket'
+        verbose_name = '报名排队票据'
+        verbose_name_plural = verbose_name
+        ordering = ['id']  # 按提交顺序处理
+        indexes = [
+            models.Index(fields=['event', 'status', 'id']),  # 按赛事取下一批排队中的票据
+        ]
+
+    def __str__(self):
+        return f"{self.user_id} - {self.event_id} - {self.get_status_display()}"
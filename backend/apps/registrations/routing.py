@@ -0,0 +1,14 @@
+"""
+报名 WebSocket 路由配置模块
+"""
+
+from django.urls import re_path
+
+from .consumers import RegistrationTicketConsumer
+
+websocket_urlpatterns = [
+    # 报名票据 WebSocket 路由
+    # URL: ws://host/ws/registrations/tickets/<token>/
+    # 说明：排队报名的客户端订阅票据处理结果
+    re_path(r"ws/registrations/tickets/(?P<token>[0-9a-f-]{32,36})/$", RegistrationTicketConsumer.as_asgi()),
+]
@@ -4,12 +4,15 @@
 提供报名数据的序列化和反序列化功能，支持报名创建、审核等业务逻辑
 """
 from rest_framework import serializers
+from django.db import IntegrityError, transaction
 from django.utils import timezone
-from .models import Registration
+from .models import Registration, RegistrationTicket
+from .counters import admit_participant
+from utils.fieldsets import SparseFieldsetSerializerMixin
 import uuid
 
 
-class RegistrationSerializer(serializers.ModelSerializer):
+class RegistrationSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """
     报名序列化器
     
@@ -85,7 +88,7 @@ class RegistrationSerializer(serializers.ModelSerializer):
         if now > event.registration_end:
             raise serializers.ValidationError("报名已截止")
 
-        # 验证人数限制：检查是否超出最大参赛人数（0表示不限制）
+        # 验证人数限制：快速预检，并发下以创建时的原子占位为准（0表示不限制）
         if event.max_participants > 0 and event.current_participants >= event.max_participants:
             raise serializers.ValidationError("报名人数已满")
 
@@ -99,7 +102,7 @@ class RegistrationSerializer(serializers.ModelSerializer):
             1. 自动设置报名用户为当前登录用户
             2. 自动生成唯一的报名编号
             3. 从赛事获取报名费用
-            4. 创建报名后增加赛事的当前报名人数
+            4. 原子地占用报名名额（条件 UPDATE），名额已满时报错
             
         报名编号格式:
             REG-{赛事ID}-{时间戳}-{随机字符串}
@@ -123,12 +126,15 @@ class RegistrationSerializer(serializers.ModelSerializer):
         # 设置支付金额为赛事的报名费用
         validated_data['payment_amount'] = event.registration_fee
 
-        # 创建报名记录
-        registration = super().create(validated_data)
-
-        # 增加赛事的当前报名人数
-        event.current_participants += 1
-        event.save(update_fields=['current_participants'])
+        # 原子地占用名额并创建报名记录，创建失败时名额随事务回滚
+        with transaction.atomic():
+            if not admit_participant(event.id):
+                raise serializers.ValidationError("报名人数已满")
+            try:
+                registration = super().create(validated_data)
+            except IntegrityError:
+                # 同一用户并发提交时由联合唯一约束兜底
+                raise serializers.ValidationError("您已经报名该赛事")
 
         return registration
 
@@ -164,6 +170,15 @@ class RegistrationCreateSerializer(serializers.ModelSerializer):
             'emergency_contact', 'emergency_phone', 'remarks'
         ]
 
+    def get_registrant(self):
+        """
+        获取报名用户
+
+        接口请求时为当前登录用户；后台处理排队票据时没有请求对象，
+        由 context['user'] 传入票据的提交用户
+        """
+        return self.context.get('user') or self.context['request'].user
+
     def validate(self, attrs):
         """
         验证报名信息
@@ -184,7 +199,7 @@ class RegistrationCreateSerializer(serializers.ModelSerializer):
             ValidationError: 验证失败时抛出，包含具体错误信息
         """
         event = attrs.get('event')
-        user = self.context['request'].user
+        user = self.get_registrant()
 
         # 检查是否已经报名：同一用户不能重复报名同一赛事
         if Registration.objects.filter(event=event, user=user).exists():
@@ -201,7 +216,7 @@ class RegistrationCreateSerializer(serializers.ModelSerializer):
         if now > event.registration_end:
             raise serializers.ValidationError("报名已截止")
 
-        # 验证人数限制：检查是否超出最大参赛人数（0表示不限制）
+        # 验证人数限制：快速预检，并发下以创建时的原子占位为准（0表示不限制）
         if event.max_participants > 0 and event.current_participants >= event.max_participants:
             raise serializers.ValidationError("报名人数已满")
 
@@ -215,7 +230,7 @@ class RegistrationCreateSerializer(serializers.ModelSerializer):
             1. 自动设置报名用户为当前登录用户
             2. 自动生成唯一的报名编号
             3. 从赛事获取报名费用
-            4. 创建报名后增加赛事的当前报名人数
+            4. 原子地占用报名名额（条件 UPDATE），名额已满时报错
             
         参数:
             validated_data: 已验证的报名数据
@@ -223,8 +238,8 @@ class RegistrationCreateSerializer(serializers.ModelSerializer):
         返回:
             创建的报名记录对象
         """
-        # 自动设置用户为当前登录用户
-        validated_data['user'] = self.context['request'].user
+        # 自动设置用户为当前登录用户（排队处理时为票据的提交用户）
+        validated_data['user'] = self.get_registrant()
 
         # 生成唯一的报名编号
         event = validated_data['event']
@@ -235,12 +250,15 @@ class RegistrationCreateSerializer(serializers.ModelSerializer):
         # 设置支付金额为赛事的报名费用
         validated_data['payment_amount'] = event.registration_fee
 
-        # 创建报名记录
-        registration = super().create(validated_data)
-
-        # 增加赛事的当前报名人数
-        event.current_participants += 1
-        event.save(update_fields=['current_participants'])
+        # 原子地占用名额并创建报名记录，创建失败时名额随事务回滚
+        with transaction.atomic():
+            if not admit_participant(event.id):
+                raise serializers.ValidationError("报名人数已满")
+            try:
+                registration = super().create(validated_data)
+            except IntegrityError:
+                # 同一用户并发提交时由联合唯一约束兜底
+                raise serializers.ValidationError("您已经报名该赛事")
 
         return registration
 
@@ -272,7 +290,7 @@ class RegistrationBulkReviewSerializer(serializers.Serializer):
     用于批量审核多条报名记录
     
     字段说明:
-        - ids: 要审核的报名ID列表，至少包含一个ID
+        - ids: 要审核的报名ID列表；不提供时按查询参数中的筛选条件（如 ?event=12&status=pending）选择报名
         - review_remarks: 审核备注，所有报名使用相同的备注
         
     使用场景:
@@ -282,7 +300,8 @@ class RegistrationBulkReviewSerializer(serializers.Serializer):
     ids = serializers.ListField(
         child=serializers.IntegerField(), 
         min_length=1,
-        help_text='要审核的报名ID列表'
+        required=False,
+        help_text='要审核的报名ID列表，不提供时按查询参数中的筛选条件选择报名'
     )
     review_remarks = serializers.CharField(
         required=False, 
@@ -298,7 +317,7 @@ class RegistrationBulkDeleteSerializer(serializers.Serializer):
     用于批量删除多条报名记录
     
     字段说明:
-        - ids: 要删除的报名ID列表，至少包含一个ID
+        - ids: 要删除的报名ID列表；不提供时按查询参数中的筛选条件选择报名
         
     使用场景:
         - 管理员批量删除无效报名
@@ -311,6 +330,34 @@ class RegistrationBulkDeleteSerializer(serializers.Serializer):
     ids = serializers.ListField(
         child=serializers.IntegerField(), 
         min_length=1,
-        help_text='要删除的报名ID列表'
+        required=False,
+        help_text='要删除的报名ID列表，不提供时按查询参数中的筛选条件选择报名'
     )
 
+
+
+class RegistrationTicketSerializer(serializers.ModelSerializer):
+    """
+    报名排队票据序列化器
+
+    扩展字段说明:
+        - event_title: 赛事标题
+        - position: 前面还有多少张排队中的票据（已处理的票据为 0）
+        - registration: 报名成功后的报名记录ID
+    """
+    event_title = serializers.CharField(source='event.title', read_only=True)
+    position = serializers.SerializerMethodField()
+
+    class Meta:
+        model = RegistrationTicket
+        fields = [
+            'id', 'token', 'event', 'event_title', 'status', 'position',
+            'registration', 'message', 'created_at', 'processed_at'
+        ]
+        read_only_fields = fields
+
+    def get_position(self, obj):
+        """计算排队位置"""
+        if obj.status != 'queued':
+            return 0
+        return RegistrationTicket.objects.filter(event_id=obj.event_id, status='queued', id__lt=obj.id).count()
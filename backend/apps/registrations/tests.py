@@ -1,3 +1,496 @@
-from django.test import TestCase
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipIf
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, connections
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import load_workbook
+from rest_framework.test import APIClient
+
+from apps.events.models import Event
+from .admission_queue import process_ticket
+from .counters import admit_participant, apply_bulk_transition
+from .models import Registration, RegistrationTicket
+from .serializers import RegistrationCreateSerializer
+
+
+User = get_user_model()
+
+
+class RegistrationTestMixin:
+    """创建赛事、用户和报名记录的公共方法"""
+
+    def create_event(self, title='计数赛事'):
+        now = timezone.now()
+        return Event.objects.create(
+            title=title,
+            description='描述',
+            location='成都',
+            event_type='athletics',
+            start_time=now + timedelta(days=2),
+            end_time=now + timedelta(days=3),
+            registration_start=now - timedelta(days=1),
+            registration_end=now + timedelta(days=1),
+            status='published',
+            organizer=self.admin,
+            contact_person='吴九',
+            contact_phone='13900000006'
+        )
+
+    def create_registration(self, event, index, status='pending'):
+        user = User.objects.create_user(
+            username=f'athlete{event.id}_{index}',
+            password='password123',
+            real_name=f'运动员{index}',
+            phone=f'137{event.id:04d}{index:04d}'
+        )
+        return Registration.objects.create(
+            event=event,
+            user=user,
+            participant_name=user.real_name,
+            participant_phone=user.phone,
+            participant_id_card=f'11010119900101{index:04d}',
+            participant_gender='male',
+            participant_birth_date='1990-01-01',
+            emergency_contact='家属',
+            emergency_phone='13800009999',
+            registration_number=f'REG-{event.id}-{index}',
+            status=status
+        )
+
+
+class ApprovedCountTests(RegistrationTestMixin, TestCase):
+    """已通过人数随审核、取消、删除等操作增量维护"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='admin',
+            password='password123',
+            real_name='管理员',
+            phone='13800000060',
+            user_type='admin',
+            is_superuser=True
+        )
+        self.event = self.create_event()
+        self.other_event = self.create_event('另一个赛事')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def approved_count(self, event=None):
+        return Event.objects.get(pk=(event or self.event).pk).approved_count
+
+    def test_single_transitions(self):
+        registration = self.create_registration(self.event, 1)
+        url = reverse('registration-approve', args=[registration.id])
+        self.assertEqual(self.client.put(url, {}).status_code, 200)
+        self.assertEqual(self.approved_count(), 1)
+
+        # 重复审核不会重复计数
+        self.assertEqual(self.client.put(url, {}).status_code, 400)
+        self.assertEqual(self.approved_count(), 1)
+
+        self.client.put(reverse('registration-cancel', args=[registration.id]))
+        self.assertEqual(self.approved_count(), 0)
+
+    def test_update_and_destroy(self):
+        registration = self.create_registration(self.event, 1)
+        detail = reverse('registration-detail', args=[registration.id])
+        self.client.patch(detail, {'status': 'approved', 'event': self.event.id})
+        self.assertEqual(self.approved_count(), 1)
+
+        self.client.patch(detail, {'event': self.other_event.id})
+        self.assertEqual(self.approved_count(), 0)
+        self.assertEqual(self.approved_count(self.other_event), 1)
+
+        self.client.delete(detail)
+        self.assertEqual(self.approved_count(self.other_event), 0)
+
+    def test_bulk_actions(self):
+        registrations = [self.create_registration(self.event, index) for index in range(4)]
+        ids = [registration.id for registration in registrations]
+        self.client.post(reverse('registration-bulk-approve'), {'ids': ids[:3]}, format='json')
+        self.assertEqual(self.approved_count(), 3)
+
+        self.client.post(reverse('registration-bulk-reject'), {'ids': ids[2:]}, format='json')
+        self.assertEqual(self.approved_count(), 2)
+
+        self.client.post(reverse('registration-bulk-delete'), {'ids': ids[:2]}, format='json')
+        self.assertEqual(self.approved_count(), 0)
+
+    def bulk_queries(self, name, count, offset):
+        ids = [
+            self.create_registration(event, offset + index, status='approved').id
+            for index in range(count)
+            for event in (self.event, self.other_event)
+        ]
+        Event.objects.update(approved_count=count, current_participants=count)
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.post(reverse(name), {'ids': ids}, format='json')
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_bulk_actions_are_set_based(self):
+        for offset, name in ((0, 'registration-bulk-reject'), (200, 'registration-bulk-delete')):
+            small = self.bulk_queries(name, 2, offset)
+            large = self.bulk_queries(name, 20, offset + 100)
+            # 语句数量与报名条数无关
+            self.assertEqual(small, large)
+            event = Event.objects.get(pk=self.event.pk)
+            self.assertEqual((event.approved_count, event.current_participants), (0, 0))
+
+    @override_settings(BULK_ACTION_CHUNK_SIZE=3)
+    def test_filter_based_bulk_actions(self):
+        for index in range(7):
+            self.create_registration(self.event, index)
+        self.create_registration(self.other_event, 0)
+        url = f"{reverse('registration-bulk-approve')}?event={self.event.id}&status=pending"
+
+        response = self.client.post(url, {'dry_run': True}, format='json')
+        self.assertEqual((response.data['dry_run'], response.data['count']), (True, 7))
+        self.assertEqual(self.approved_count(), 0)
+
+        response = self.client.post(url, {}, format='json')
+        self.assertEqual(len(response.data['approved_ids']), 7)
+        self.assertEqual(self.approved_count(), 7)
+        self.assertEqual(self.approved_count(self.other_event), 0)
+
+        # 没有ID也没有筛选条件时拒绝执行
+        response = self.client.post(reverse('registration-bulk-delete'), {}, format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Registration.objects.count(), 8)
+
+    @override_settings(BULK_ACTION_CHUNK_SIZE=2)
+    def test_id_bulk_actions_are_all_or_nothing(self):
+        ids = [self.create_registration(self.event, index).id for index in range(5)]
+        calls = []
+
+        def fail_on_second_call(*args, **kwargs):
+            calls.append(args)
+            if len(calls) > 1:
+                raise RuntimeError('写入失败')
+            return apply_bulk_transition(*args, **kwargs)
+
+        with mock.patch('apps.registrations.views.apply_bulk_transition', side_effect=fail_on_second_call):
+            response = self.client.post(reverse('registration-bulk-approve'), {'ids': ids}, format='json')
+        # ids 列表不分块，一次处理全部记录
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.approved_count(), 5)
+
+        # 处理失败时全部回滚，不会留下部分已审核的记录
+        Registration.objects.filter(pk__in=ids).update(status='pending')
+        with mock.patch('apps.registrations.views.apply_bulk_transition', side_effect=RuntimeError('写入失败')):
+            with self.assertRaises(RuntimeError):
+                self.client.post(reverse('registration-bulk-reject'), {'ids': ids}, format='json')
+        self.assertEqual(Registration.objects.filter(status='pending').count(), 5)
+
+    def test_serializers_read_counter(self):
+        self.create_registration(self.event, 1, status='approved')
+        Event.objects.filter(pk=self.event.pk).update(approved_count=1)
+        response = self.client.get(reverse('event-detail', args=[self.event.id]))
+        self.assertEqual(response.json()['registration_count'], 1)
+
+    def test_reconcile_command(self):
+        self.create_registration(self.event, 1, status='approved')
+        self.create_registration(self.event, 2, status='pending')
+        self.create_registration(self.event, 3, status='rejected')
+        Event.objects.filter(pk=self.event.pk).update(approved_count=7, current_participants=0)
+
+        call_command('reconcile_event_counters', stdout=StringIO())
+        event = Event.objects.get(pk=self.event.pk)
+        self.assertEqual((event.approved_count, event.current_participants), (1, 2))
+
+        output = StringIO()
+        call_command('reconcile_event_counters', stdout=output)
+        self.assertIn('一致', output.getvalue())
+
+
+class RegistrationExportTests(RegistrationTestMixin, TestCase):
+    """报名名单流式导出"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='admin',
+            password='password123',
+            real_name='管理员',
+            phone='13800000064',
+            user_type='admin',
+            is_superuser=True
+        )
+        self.event = self.create_event('导出赛事')
+        for index in range(5):
+            self.create_registration(self.event, index, status='approved' if index % 2 else 'pending')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('registration-export')
+
+    def test_csv_export_streams_rows(self):
+        response = self.client.get(self.url, {'event': self.event.id, 'status': 'approved', 'file_type': 'csv'})
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode('utf-8-sig')
+        lines = content.strip().splitlines()
+        self.assertEqual(lines[0], '赛事名称,用户名,姓名,出生日期,身份证,手机号,报名时间,审核状态')
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[1].startswith('导出赛事,'))
+        self.assertIn('1990-01-01', lines[1])
+
+    def test_xlsx_export(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(self.url, {'event': self.event.id})
+            content = b''.join(response.streaming_content)
+        self.assertLessEqual(len(context.captured_queries), 3)
+
+        sheet = load_workbook(BytesIO(content), read_only=True).active
+        rows = list(sheet.iter_rows(values_only=True))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][0], '导出赛事')
+
+    def test_unknown_file_type(self):
+        response = self.client.get(self.url, {'event': self.event.id, 'file_type': 'pdf'})
+        self.assertEqual(response.status_code, 400)
+
+
+def registration_payload(event, user, index):
+    return {
+        'event': event.id,
+        'participant_name': user.real_name,
+        'participant_phone': user.phone,
+        'participant_id_card': f'11010119900101{index:04d}',
+        'participant_gender': 'M',
+        'participant_birth_date': '1990-01-01',
+        'emergency_contact': '家属',
+        'emergency_phone': '13800009999',
+    }
+
+
+class RegistrationAdmissionTests(RegistrationTestMixin, TestCase):
+    """报名名额通过条件 UPDATE 原子占用"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='admin',
+            password='password123',
+            real_name='管理员',
+            phone='13800000061',
+            user_type='admin',
+            is_superuser=True
+        )
+        self.event = self.create_event()
+        Event.objects.filter(pk=self.event.pk).update(max_participants=2)
+        self.client = APIClient()
+
+    def register(self, index):
+        user = User.objects.create_user(
+            username=f'applicant{index}',
+            password='password123',
+            real_name=f'报名者{index}',
+            phone=f'1360000{index:04d}'
+        )
+        self.client.force_authenticate(user)
+        return self.client.post(reverse('registration-list'), registration_payload(self.event, user, index))
+
+    def current_participants(self):
+        return Event.objects.get(pk=self.event.pk).current_participants
+
+    def test_capacity_is_enforced_by_update(self):
+        self.assertEqual(self.register(1).status_code, 201)
+        self.assertEqual(self.register(2).status_code, 201)
+        response = self.register(3)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('报名人数已满', str(response.data))
+        self.assertEqual(self.current_participants(), 2)
+        self.assertEqual(Registration.objects.filter(event=self.event).count(), 2)
+
+    def test_admit_checks_latest_count(self):
+        # 预检读到的是旧值时，占位语句仍以数据库中的最新计数为准
+        self.assertTrue(admit_participant(self.event.id))
+        self.assertTrue(admit_participant(self.event.id))
+        self.assertFalse(admit_participant(self.event.id))
+
+        Event.objects.filter(pk=self.event.pk).update(max_participants=0)
+        self.assertTrue(admit_participant(self.event.id))
+        self.assertEqual(self.current_participants(), 3)
+
+    def test_release_paths(self):
+        self.register(1)
+        self.register(2)
+        registrations = list(Registration.objects.filter(event=self.event).order_by('id'))
+        self.client.force_authenticate(self.admin)
+
+        self.client.put(reverse('registration-reject', args=[registrations[0].id]), {})
+        self.assertEqual(self.current_participants(), 1)
+        # 已驳回的报名再取消不会重复释放
+        self.client.put(reverse('registration-cancel', args=[registrations[0].id]))
+        self.assertEqual(self.current_participants(), 1)
+
+        self.client.delete(reverse('registration-detail', args=[registrations[1].id]))
+        self.assertEqual(self.current_participants(), 0)
+        self.assertEqual(self.register(3).status_code, 201)
+
+
+@override_settings(BACKGROUND_TASKS_EAGER=True)
+class RegistrationQueueTests(RegistrationTestMixin, TestCase):
+    """排队报名：先返回票据，再按提交顺序处理"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='admin',
+            password='password123',
+            real_name='管理员',
+            phone='13800000063',
+            user_type='admin',
+            is_superuser=True
+        )
+        self.event = self.create_event()
+        Event.objects.filter(pk=self.event.pk).update(max_participants=2, queue_registrations=True)
+        self.client = APIClient()
+        self.users = {}
+
+    def register(self, index):
+        user = User.objects.create_user(
+            username=f'queued{index}',
+            password='password123',
+            real_name=f'排队者{index}',
+            phone=f'1350000{index:04d}'
+        )
+        self.users[index] = user
+        self.client.force_authenticate(user)
+        return self.client.post(reverse('registration-list'), registration_payload(self.event, user, index))
+
+    def test_ticket_is_processed_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.register(0)
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['message'], '已进入报名队列')
+
+        url = reverse('registration-ticket-detail', args=[response.data['ticket']['token']])
+        ticket = self.client.get(url).data
+        self.assertEqual(ticket['status'], 'admitted')
+        self.assertEqual(ticket['position'], 0)
+        self.assertEqual(Registration.objects.get(pk=ticket['registration']).user, self.users[0])
+        self.assertEqual(Event.objects.get(pk=self.event.pk).current_participants, 1)
+
+    def test_backlog_is_processed_in_order(self):
+        # 不执行提交回调，模拟处理者尚未启动
+        responses = [self.register(index) for index in range(3)]
+        self.assertEqual([r.data['ticket']['status'] for r in responses], ['queued'] * 3)
+        self.assertEqual(responses[2].data['ticket']['position'], 2)
+
+        url = reverse('registration-ticket-detail', args=[responses[2].data['ticket']['token']])
+        self.assertEqual(self.client.get(url).data['status'], 'queued')
+
+        out = StringIO()
+        call_command('process_registration_queue', stdout=out)
+        self.assertIn('共处理 3 张票据', out.getvalue())
+
+        tickets = list(RegistrationTicket.objects.order_by('id'))
+        self.assertEqual([ticket.status for ticket in tickets], ['admitted', 'admitted', 'rejected'])
+        self.assertEqual(self.client.get(url).data['message'], '报名人数已满')
+        self.assertEqual(Event.objects.get(pk=self.event.pk).current_participants, 2)
+
+        # 其他用户看不到别人的票据
+        self.client.force_authenticate(self.users[0])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_processed_ticket_is_not_claimed_again(self):
+        ticket_id = self.register(0).data['ticket']['id']
+        self.assertEqual(process_ticket(ticket_id).status, 'admitted')
+
+        # 锁过期后的第二个处理者仍持有旧的票据ID
+        self.assertIsNone(process_ticket(ticket_id))
+        ticket = RegistrationTicket.objects.get(pk=ticket_id)
+        self.assertEqual((ticket.status, ticket.message), ('admitted', '报名成功'))
+        self.assertEqual(Registration.objects.get().pk, ticket.registration_id)
+
+    def test_result_not_written_over_finished_ticket(self):
+        ticket_id = self.register(0).data['ticket']['id']
+        is_valid = RegistrationCreateSerializer.is_valid
+
+        def finish_elsewhere(serializer, *args, **kwargs):
+            # 处理期间另一个处理者已写回结果
+            RegistrationTicket.objects.filter(pk=ticket_id).update(status='admitted', message='报名成功')
+            return is_valid(serializer, *args, **kwargs)
+
+        with mock.patch.object(RegistrationCreateSerializer, 'is_valid', finish_elsewhere):
+            self.assertIsNone(process_ticket(ticket_id))
+        # 测试中"另一个处理者"使用同一连接，其写入随本次回滚一起撤销；
+        # 关键是本次处理没有写回结果，创建的报名也一起回滚
+        ticket = RegistrationTicket.objects.get(pk=ticket_id)
+        self.assertEqual(ticket.status, 'queued')
+        self.assertIsNone(ticket.registration_id)
+        self.assertFalse(Registration.objects.exists())
+        self.assertEqual(Event.objects.get(pk=self.event.pk).current_participants, 0)
+
+    def test_duplicate_submission_reuses_ticket(self):
+        first = self.register(0)
+        response = self.client.post(
+            reverse('registration-list'), registration_payload(self.event, self.users[0], 0)
+        )
+        self.assertEqual(response.data['ticket']['token'], first.data['ticket']['token'])
+        self.assertEqual(RegistrationTicket.objects.count(), 1)
+
+
+@skipIf(connection.vendor == 'sqlite', 'SQLite 不支持并发写入，需在 MySQL 等数据库上运行')
+class RegistrationConcurrencyTests(RegistrationTestMixin, TransactionTestCase):
+    """开放报名瞬间的大量并发报名不会超出名额，也不会丢失计数"""
+
+    capacity = 50
+    applicants = 300
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='admin',
+            password='password123',
+            real_name='管理员',
+            phone='13800000062'
+        )
+        self.event = self.create_event()
+        Event.objects.filter(pk=self.event.pk).update(max_participants=self.capacity)
+        self.users = [
+            User.objects.create_user(
+                username=f'rush{index}',
+                password='password123',
+                real_name=f'抢报者{index}',
+                phone=f'1350000{index:04d}'
+            )
+            for index in range(self.applicants)
+        ]
+
+    def test_parallel_registrations(self):
+        barrier = threading.Barrier(32)
+
+        def register(index):
+            try:
+                client = APIClient()
+                client.force_authenticate(self.users[index])
+                try:
+                    barrier.wait(timeout=5)
+                except threading.BrokenBarrierError:
+                    pass
+                response = client.post(
+                    reverse('registration-list'), registration_payload(self.event, self.users[index], index)
+                )
+                return response.status_code
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=32) as executor:
+            codes = list(executor.map(register, range(self.applicants)))
+
+        event = Event.objects.get(pk=self.event.pk)
+        self.assertEqual(codes.count(201), self.capacity)
+        self.assertEqual(codes.count(400), self.applicants - self.capacity)
+        self.assertEqual(event.current_participants, self.capacity)
+        self.assertEqual(Registration.objects.filter(event=self.event).count(), self.capacity)
@@ -3,9 +3,11 @@
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import RegistrationViewSet
+from .views import RegistrationViewSet, RegistrationTicketViewSet
 
 router = DefaultRouter()
+# 票据路由需在空前缀之前注册，否则会被当作报名ID匹配
+router.register(r'tickets', RegistrationTicketViewSet, basename='registration-ticket')
 router.register(r'', RegistrationViewSet, basename='registration')
 
 urlpatterns = [
@@ -12,20 +12,32 @@ from rest_framework.filters import SearchFilter, OrderingFilter
 from django.utils import timezone
 from django.db import transaction
 
-from .models import Registration
+from .models import Registration, RegistrationTicket
 from .serializers import (
     RegistrationSerializer,
     RegistrationCreateSerializer,
     RegistrationReviewSerializer,
     RegistrationBulkReviewSerializer,
-    RegistrationBulkDeleteSerializer
+    RegistrationBulkDeleteSerializer,
+    RegistrationTicketSerializer
 )
 from utils.permissions import IsAdmin, IsAdminOrReferee, IsOwnerOrAdmin
-from utils.export import export_registrations
+from utils.export import EXPORT_FILE_TYPES, export_registrations
+from utils.pagination import CursorOrPageNumberPagination
+from utils.fieldsets import SparseFieldsetViewSetMixin
+from utils.bulk import BulkActionViewSetMixin
 from apps.events.models import Event
+from apps.exports.views import is_async_export, start_export_job
+from .admission_queue import enqueue_registration
+from .exports import build_export_queryset
+from apps.events.list_cache import invalidate_event_snapshots
+from .counters import (
+    ACTIVE_STATUSES, apply_bulk_transition, release_participants,
+    sync_approved_count, sync_participants,
+)
 
 
-class RegistrationViewSet(viewsets.ModelViewSet):
+class RegistrationViewSet(SparseFieldsetViewSetMixin, BulkActionViewSetMixin, viewsets.ModelViewSet):
     """
     报名视图集
     
@@ -63,6 +75,7 @@ class RegistrationViewSet(viewsets.ModelViewSet):
     # 支持按以下字段排序
     ordering_fields = ['created_at', 'status']
     ordering = ['-created_at']  # 默认按报名时间倒序
+    pagination_class = CursorOrPageNumberPagination  # 支持 ?cursor= 键集分页
 
     def get_permissions(self):
         """
@@ -105,15 +118,59 @@ class RegistrationViewSet(viewsets.ModelViewSet):
         return self.queryset.filter(user=user)
 
     def create(self, request, *args, **kwargs):
-        """创建报名"""
+        """
+        创建报名
+
+        开启排队报名的赛事只提交票据并返回 202，
+        客户端通过票据接口轮询或 WebSocket 订阅获取报名结果
+        """
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
+
+        event = serializer.validated_data['event']
+        if event.queue_registrations:
+            ticket = enqueue_registration(event, request.user, serializer.initial_data)
+            # 同步执行模式下票据可能已处理完成
+            ticket.refresh_from_db()
+            return Response({
+                'message': '已进入报名队列',
+                'ticket': RegistrationTicketSerializer(ticket).data
+            }, status=status.HTTP_202_ACCEPTED)
+
         registration = serializer.save()
         return Response({
             'message': '报名成功',
             'registration': RegistrationSerializer(registration).data
         }, status=status.HTTP_201_CREATED)
 
+    def perform_update(self, serializer):
+        """更新报名，状态或赛事变化时同步已通过人数和占用名额数"""
+        with transaction.atomic():
+            before = Registration.objects.select_for_update()\
+                .values_list('event_id', 'status').get(pk=serializer.instance.pk)
+            registration = serializer.save()
+            after = (registration.event_id, registration.status)
+            sync_approved_count(before, after)
+            sync_participants(before, after)
+
+    def perform_destroy(self, instance):
+        """删除报名，同步减少已通过人数和占用名额数"""
+        with transaction.atomic():
+            before = Registration.objects.select_for_update()\
+                .values_list('event_id', 'status').get(pk=instance.pk)
+            instance.delete()
+            sync_approved_count(before, None)
+            sync_participants(before, None)
+
+    def lock_registration(self, registration):
+        """
+        在事务中锁定并重新读取报名记录
+
+        状态检查与计数更新基于加锁后的最新状态，
+        避免并发审核同一条报名时重复计数
+        """
+        return Registration.objects.select_for_update().get(pk=registration.pk)
+
     @action(detail=True, methods=['put'])
     def approve(self, request, pk=None):
         """
@@ -121,20 +178,22 @@ class RegistrationViewSet(viewsets.ModelViewSet):
         PUT /api/registrations/{id}/approve/
         """
         registration = self.get_object()
-
-        if registration.status != 'pending':
-            return Response({
-                'error': '该报名记录已审核'
-            }, status=status.HTTP_400_BAD_REQUEST)
-
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        registration.status = 'approved'
-        registration.review_remarks = serializer.validated_data.get('review_remarks', '')
-        registration.reviewed_by = request.user
-        registration.reviewed_at = timezone.now()
-        registration.save()
+        with transaction.atomic():
+            registration = self.lock_registration(registration)
+            if registration.status != 'pending':
+                return Response({
+                    'error': '该报名记录已审核'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            registration.status = 'approved'
+            registration.review_remarks = serializer.validated_data.get('review_remarks', '')
+            registration.reviewed_by = request.user
+            registration.reviewed_at = timezone.now()
+            registration.save()
+            sync_approved_count((registration.event_id, 'pending'), (registration.event_id, 'approved'))
 
         return Response({
             'message': '审核通过',
@@ -148,26 +207,24 @@ class RegistrationViewSet(viewsets.ModelViewSet):
         PUT /api/registrations/{id}/reject/
         """
         registration = self.get_object()
-
-        if registration.status != 'pending':
-            return Response({
-                'error': '该报名记录已审核'
-            }, status=status.HTTP_400_BAD_REQUEST)
-
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        registration.status = 'rejected'
-        registration.review_remarks = serializer.validated_data.get('review_remarks', '')
-        registration.reviewed_by = request.user
-        registration.reviewed_at = timezone.now()
-        registration.save()
+        with transaction.atomic():
+            registration = self.lock_registration(registration)
+            if registration.status != 'pending':
+                return Response({
+                    'error': '该报名记录已审核'
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            registration.status = 'rejected'
+            registration.review_remarks = serializer.validated_data.get('review_remarks', '')
+            registration.reviewed_by = request.user
+            registration.reviewed_at = timezone.now()
+            registration.save()
 
-        # 减少赛事的报名人数
-        event = registration.event
-        if event.current_participants > 0:
-            event.current_participants -= 1
-            event.save(update_fields=['current_participants'])
+            # 释放占用的名额
+            release_participants({registration.event_id: 1})
 
         return Response({
             'message': '审核拒绝',
@@ -188,19 +245,21 @@ class RegistrationViewSet(viewsets.ModelViewSet):
                 'error': '无权取消该报名'
             }, status=status.HTTP_403_FORBIDDEN)
 
-        if registration.status == 'cancelled':
-            return Response({
-                'error': '报名已取消'
-            }, status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            registration = self.lock_registration(registration)
+            if registration.status == 'cancelled':
+                return Response({
+                    'error': '报名已取消'
+                }, status=status.HTTP_400_BAD_REQUEST)
 
-        registration.status = 'cancelled'
-        registration.save()
+            previous_status = registration.status
+            registration.status = 'cancelled'
+            registration.save()
+            sync_approved_count((registration.event_id, previous_status), None)
 
-        # 减少赛事的报名人数
-        event = registration.event
-        if event.current_participants > 0:
-            event.current_participants -= 1
-            event.save(update_fields=['current_participants'])
+            # 待审核或已通过的报名才占用名额，已驳回的报名取消时无需释放
+            if previous_status in ACTIVE_STATUSES:
+                release_participants({registration.event_id: 1})
 
         return Response({
             'message': '取消报名成功',
@@ -211,11 +270,18 @@ class RegistrationViewSet(viewsets.ModelViewSet):
     def export(self, request):
         """
         导出报名名单
-        GET /api/registrations/export/?event={event_id}
+        GET /api/registrations/export/?event={event_id}&file_type=csv
+
+        file_type 可选 xlsx（默认）或 csv，文件以流式响应返回；
+        带上 async=1 时改为提交后台导出任务，返回 202 和任务信息，通过 /api/exports/{id}/ 查询进度
         """
         # 获取查询参数
         event_id = request.query_params.get('event')
-        status_filter = request.query_params.get('status')
+        file_type = request.query_params.get('file_type') or 'xlsx'
+        if file_type not in EXPORT_FILE_TYPES:
+            return Response({
+                'error': '导出格式仅支持 xlsx 或 csv'
+            }, status=status.HTTP_400_BAD_REQUEST)
 
         if not event_id:
             return Response({
@@ -228,15 +294,12 @@ class RegistrationViewSet(viewsets.ModelViewSet):
                 'error': '赛事不存在'
             }, status=status.HTTP_400_BAD_REQUEST)
 
-        queryset = self.get_queryset()
-
-        if event_id:
-            queryset = queryset.filter(event_id=event_id)
-        if status_filter:
-            queryset = queryset.filter(status=status_filter)
+        if is_async_export(request):
+            return start_export_job(request, 'registrations', request.query_params, file_type)
 
+        queryset = build_export_queryset(request.user, request.query_params)
         # 使用导出工具导出
-        return export_registrations(queryset, event_title=event.title)
+        return export_registrations(queryset, event_title=event.title, file_type=file_type)
 
     @action(detail=False, methods=['get'])
     def my_registrations(self, request):
@@ -255,6 +318,7 @@ class RegistrationViewSet(viewsets.ModelViewSet):
         
         POST /api/registrations/bulk_approve/
         Body: {ids: [1, 2, 3], review_remarks: '审核通过'}
+        或 POST /api/registrations/bulk_approve/?event=12&status=pending  按列表筛选条件选择报名
         
         功能说明:
             - 批量审核多条待审核报名记录
@@ -262,7 +326,8 @@ class RegistrationViewSet(viewsets.ModelViewSet):
             - 自动记录审核人和审核时间
             
         参数:
-            - ids: 要审核的报名ID列表（必填）
+            - ids: 要审核的报名ID列表（不提供时使用查询参数中的筛选条件）
+            - dry_run: 为 true 时只返回将被处理的数量（可选）
             - review_remarks: 审核备注（可选）
             
         返回:
@@ -272,21 +337,35 @@ class RegistrationViewSet(viewsets.ModelViewSet):
         serializer = RegistrationBulkReviewSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        ids = serializer.validated_data['ids']
         review_remarks = serializer.validated_data.get('review_remarks', '')
-        queryset = self.get_queryset().filter(id__in=ids, status='pending')
+        queryset = self.get_bulk_queryset(
+            self.get_queryset().filter(status='pending'), serializer.validated_data.get('ids')
+        )
+        if queryset is None:
+            return Response({'error': '请提供报名ID列表或筛选条件'}, status=status.HTTP_400_BAD_REQUEST)
+        if self.is_bulk_dry_run():
+            return self.bulk_dry_run_response(queryset, '通过')
         if not queryset.exists():
             return Response({'error': '未找到任何待审核的报名'}, status=status.HTTP_400_BAD_REQUEST)
 
-        now = timezone.now()
-        approved_ids = []
-        for registration in queryset:
-            registration.status = 'approved'
-            registration.review_remarks = review_remarks
-            registration.reviewed_by = request.user
-            registration.reviewed_at = now
-            registration.save(update_fields=['status', 'review_remarks', 'reviewed_by', 'reviewed_at'])
-            approved_ids.append(registration.id)
+        def approve(chunk):
+            # 一次查询锁定并读取变更前状态，再用一条 UPDATE 完成审核
+            rows = list(chunk.select_related(None).select_for_update().values_list('id', 'event_id', 'status'))
+            ids = [row[0] for row in rows]
+            now = timezone.now()
+            # update() 不会触发 auto_now，显式更新 updated_at，使导出与归档的数据版本变化
+            Registration.objects.filter(id__in=ids).update(
+                status='approved',
+                review_remarks=review_remarks,
+                reviewed_by=request.user,
+                reviewed_at=now,
+                updated_at=now
+            )
+            apply_bulk_transition([row[1:] for row in rows], 'approved')
+            return ids
+
+        approved_ids = self.run_bulk_action(queryset, approve)
+        invalidate_event_snapshots()
 
         return Response({
             'message': f'成功通过 {len(approved_ids)} 条报名',
@@ -300,6 +379,7 @@ class RegistrationViewSet(viewsets.ModelViewSet):
         
         POST /api/registrations/bulk_reject/
         Body: {ids: [1, 2, 3], review_remarks: '不符合条件'}
+        或 POST /api/registrations/bulk_reject/?event=12&status=pending  按列表筛选条件选择报名
         
         功能说明:
             - 批量驳回多条报名记录
@@ -308,7 +388,8 @@ class RegistrationViewSet(viewsets.ModelViewSet):
             - 自动记录审核人和审核时间
             
         参数:
-            - ids: 要驳回的报名ID列表（必填）
+            - ids: 要驳回的报名ID列表（不提供时使用查询参数中的筛选条件）
+            - dry_run: 为 true 时只返回将被处理的数量（可选）
             - review_remarks: 驳回理由（可选）
             
         返回:
@@ -318,27 +399,35 @@ class RegistrationViewSet(viewsets.ModelViewSet):
         serializer = RegistrationBulkReviewSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        ids = serializer.validated_data['ids']
         review_remarks = serializer.validated_data.get('review_remarks', '')
-        queryset = self.get_queryset().filter(id__in=ids, status__in=['pending', 'approved'])
+        queryset = self.get_bulk_queryset(
+            self.get_queryset().filter(status__in=ACTIVE_STATUSES), serializer.validated_data.get('ids')
+        )
+        if queryset is None:
+            return Response({'error': '请提供报名ID列表或筛选条件'}, status=status.HTTP_400_BAD_REQUEST)
+        if self.is_bulk_dry_run():
+            return self.bulk_dry_run_response(queryset, '驳回')
         if not queryset.exists():
             return Response({'error': '未找到任何待审核的报名'}, status=status.HTTP_400_BAD_REQUEST)
 
-        now = timezone.now()
-        rejected_ids = []
-        for registration in queryset:
-            registration.status = 'rejected'
-            registration.review_remarks = review_remarks
-            registration.reviewed_by = request.user
-            registration.reviewed_at = now
-            registration.save(update_fields=['status', 'review_remarks', 'reviewed_by', 'reviewed_at'])
-
-            event = registration.event
-            if event.current_participants > 0:
-                event.current_participants -= 1
-                event.save(update_fields=['current_participants'])
-
-            rejected_ids.append(registration.id)
+        def reject(chunk):
+            rows = list(chunk.select_related(None).select_for_update().values_list('id', 'event_id', 'status'))
+            ids = [row[0] for row in rows]
+            now = timezone.now()
+            # update() 不会触发 auto_now，显式更新 updated_at，使导出与归档的数据版本变化
+            Registration.objects.filter(id__in=ids).update(
+                status='rejected',
+                review_remarks=review_remarks,
+                reviewed_by=request.user,
+                reviewed_at=now,
+                updated_at=now
+            )
+            # 驳回会释放名额，已通过的还会减少已通过人数
+            apply_bulk_transition([row[1:] for row in rows], 'rejected')
+            return ids
+
+        rejected_ids = self.run_bulk_action(queryset, reject)
+        invalidate_event_snapshots()
 
         return Response({
             'message': f'成功驳回 {len(rejected_ids)} 条报名',
@@ -352,6 +441,7 @@ class RegistrationViewSet(viewsets.ModelViewSet):
         
         POST /api/registrations/bulk_delete/
         Body: {ids: [1, 2, 3]}
+        或 POST /api/registrations/bulk_delete/?event=12&status=pending  按列表筛选条件选择报名
         
         功能说明:
             - 批量删除多条报名记录
@@ -360,7 +450,8 @@ class RegistrationViewSet(viewsets.ModelViewSet):
             - 只有未取消/未拒绝的报名才会减少人数
             
         参数:
-            - ids: 要删除的报名ID列表（必填）
+            - ids: 要删除的报名ID列表（不提供时使用查询参数中的筛选条件）
+            - dry_run: 为 true 时只返回将被处理的数量（可选）
             
         返回:
             - message: 操作结果消息
@@ -373,23 +464,49 @@ class RegistrationViewSet(viewsets.ModelViewSet):
         serializer = RegistrationBulkDeleteSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        ids = serializer.validated_data['ids']
-        queryset = self.get_queryset().filter(id__in=ids)
+        queryset = self.get_bulk_queryset(self.get_queryset(), serializer.validated_data.get('ids'))
+        if queryset is None:
+            return Response({'error': '请提供报名ID列表或筛选条件'}, status=status.HTTP_400_BAD_REQUEST)
+        if self.is_bulk_dry_run():
+            return self.bulk_dry_run_response(queryset, '删除')
         if not queryset.exists():
             return Response({'error': '没有找到任何要删除的报名'}, status=status.HTTP_400_BAD_REQUEST)
 
-        deleted_ids = []
-        with transaction.atomic():
-            for registration in queryset.select_related('event'):
-                event = registration.event
-                # 仅对未被取消/拒绝的报名减少人数
-                if registration.status in ['pending', 'approved'] and event.current_participants > 0:
-                    event.current_participants -= 1
-                    event.save(update_fields=['current_participants'])
-                deleted_ids.append(registration.id)
-            queryset.delete()
+        def delete(chunk):
+            rows = list(chunk.select_related(None).select_for_update().values_list('id', 'event_id', 'status'))
+            ids = [row[0] for row in rows]
+            Registration.objects.filter(id__in=ids).delete()
+            # 仅对未被取消/拒绝的报名释放名额
+            apply_bulk_transition([row[1:] for row in rows])
+            return ids
+
+        deleted_ids = self.run_bulk_action(queryset, delete)
 
         return Response({
             'message': f'成功删除 {len(deleted_ids)} 条报名',
             'deleted_ids': deleted_ids
         })
+
+
+class RegistrationTicketViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    报名票据视图集
+
+    排队报名的赛事提交报名后返回票据，客户端通过本接口查询处理结果
+
+    权限控制:
+        - 普通用户只能查看自己的票据，管理员可查看全部
+    """
+    queryset = RegistrationTicket.objects.select_related('event').all()
+    serializer_class = RegistrationTicketSerializer
+    permission_classes = [IsAuthenticated]
+    filter_backends = [DjangoFilterBackend]
+    filterset_fields = ['event', 'status']
+    lookup_field = 'token'
+
+    def get_queryset(self):
+        """限制普通用户只能看到自己的票据"""
+        user = self.request.user
+        if user.is_superuser or user.user_type in ['admin', 'organizer']:
+            return self.queryset
+        return self.queryset.filter(user=user)
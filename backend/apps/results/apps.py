@@ -5,3 +5,7 @@ class ResultsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.results'
     verbose_name = '成绩管理'
+
+    def ready(self):
+        # 注册排行榜缓存失效的信号处理器
+        import apps.results.signals
@@ -0,0 +1,85 @@
+"""
+排行榜 WebSocket 消费者
+
+决赛期间观众连接 ws://host/ws/results/<event_id>/<round_type>/ 订阅排行榜，
+成绩变化时只接收增量，无需轮询 /api/results/leaderboard/
+"""
+
+import json
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncWebsocketConsumer
+
+from .live import get_live_leaderboard, leaderboard_group
+from .models import Result
+
+
+class ResultLeaderboardConsumer(AsyncWebsocketConsumer):
+    """
+    排行榜消费者
+
+    连接流程：
+        1. 校验轮次，加入 (赛事, 轮次) 频道组
+        2. 立即发送完整的排行榜
+        3. 成绩变化后由 live.push_leaderboard_changes 推送增量
+        4. 客户端发送 {"type": "snapshot"} 时重新发送完整的排行榜
+
+    数据格式：
+        {"type": "leaderboard_snapshot", "payload": {"event": 1, "round_type": "final", "version": 4, "rows": [...]}}
+        {
+            "type": "leaderboard_update",
+            "payload": {
+                "event": 1, "round_type": "final", "version": 5,
+                "inserted": [{"position": 3, "row": {...}}],
+                "moved": [{"id": 12, "from": 3, "to": 4}],
+                "removed": [15],
+                "updated": [{"position": 1, "row": {...}}]
+            }
+        }
+    客户端按 removed → moved → inserted → updated 的顺序应用到本地排行榜；
+    增量的 version 不等于本地 version + 1 时说明漏收或乱序，丢弃本地数据并请求快照
+    """
+
+    async def connect(self):
+        """校验参数并加入频道组"""
+        self.group_name = None
+        kwargs = self.scope["url_route"]["kwargs"]
+        self.event_id = int(kwargs["event_id"])
+        self.round_type = kwargs["round_type"]
+        if self.round_type not in dict(Result.STATUS_CHOICES):
+            await self.close()
+            return
+
+        self.group_name = leaderboard_group(self.event_id, self.round_type)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        await self.send_snapshot()
+
+    async def receive(self, text_data=None, bytes_data=None):
+        """处理客户端请求，目前只支持重新获取快照"""
+        try:
+            message = json.loads(text_data or "{}")
+        except ValueError:
+            return
+        if isinstance(message, dict) and message.get("type") == "snapshot":
+            await self.send_snapshot()
+
+    async def send_snapshot(self):
+        """发送完整的排行榜及其版本"""
+        baseline = await database_sync_to_async(get_live_leaderboard)(self.event_id, self.round_type)
+        await self.send(text_data=json.dumps({
+            "type": "leaderboard_snapshot",
+            "payload": {"event": self.event_id, "round_type": self.round_type, **baseline},
+        }))
+
+    async def disconnect(self, close_code):
+        """从频道组中移除"""
+        if self.group_name:
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def leaderboard_update(self, event):
+        """转发排行榜增量"""
+        await self.send(text_data=json.dumps({
+            "type": "leaderboard_update",
+            "payload": event["payload"],
+        }))
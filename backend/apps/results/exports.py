@@ -0,0 +1,62 @@
+"""
+成绩表导出
+
+同步下载（ResultViewSet.export）与后台导出任务（apps.exports）共用的查询逻辑
+"""
+from datetime import datetime
+
+from django.db.models import Case, IntegerField, When
+
+from apps.events.models import RefereeEventAccess
+from utils.export import RESULT_EXPORT_FIELDS, RESULT_EXPORT_HEADERS, build_filename
+from .models import Result
+from .scoring import directed_score
+
+
+EXPORT_FIELDS = RESULT_EXPORT_FIELDS
+EXPORT_HEADERS = RESULT_EXPORT_HEADERS
+# 影响导出内容的筛选参数
+EXPORT_PARAMS = ('event', 'round_type')
+
+
+def get_export_scope(user):
+    """导出的数据范围：裁判只能导出被分配赛事的成绩"""
+    if user.user_type == 'referee':
+        return f'referee:{user.id}'
+    return 'all'
+
+
+def build_export_queryset(user, params):
+    """
+    构建导出查询集
+
+    参数:
+        user: 发起导出的用户
+        params: 筛选参数，可包含 event、round_type
+
+    返回:
+        QuerySet: 按轮次（决赛在前）、排名、数值成绩（好成绩在前）排序的成绩记录
+    """
+    queryset = Result.objects.all()
+    if get_export_scope(user) != 'all':
+        queryset = queryset.filter(
+            event_id__in=RefereeEventAccess.objects.filter(referee=user).values('event_id')
+        )
+    if params.get('event'):
+        queryset = queryset.filter(event_id=params['event'])
+    if params.get('round_type'):
+        queryset = queryset.filter(round_type=params['round_type'])
+
+    round_order = Case(
+        When(round_type='final', then=1),
+        When(round_type='semifinal', then=2),
+        When(round_type='preliminary', then=3),
+        default=4,
+        output_field=IntegerField()
+    )
+    return queryset.order_by(round_order, 'rank', directed_score().asc(nulls_last=True))
+
+
+def get_export_filename(params):
+    """导出文件名（不含扩展名）"""
+    return build_filename('results_list', datetime.now())
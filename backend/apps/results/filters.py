@@ -0,0 +1,22 @@
+"""
+成绩过滤器
+"""
+from rest_framework.filters import OrderingFilter
+
+
+class ResultOrderingFilter(OrderingFilter):
+    """
+    成绩排序过滤器
+
+    ?ordering=score / -score 按解析后的数值成绩 score_value 排序，
+    避免对成绩文本做字符串排序
+    """
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        return [
+            term.replace('score', 'score_value') if term.lstrip('-') == 'score' else term
+            for term in ordering
+        ]
@@ -0,0 +1,171 @@
+"""
+成绩导入任务
+
+POST /api/results/import/?async=1 上传的文件保存后登记为 ResultImportJob，由后台执行：
+    - 按 chunk_size 行分块，每块在独立事务中写入成绩，并在同一事务中更新任务进度，
+      已提交的分块与进度始终一致
+    - 任务失败或执行进程中断后，可调用 resume 从最后一个已提交的分块继续，
+      已写入的成绩会作为已有成绩参与查重
+    - 客户端轮询 GET /api/results/import-jobs/{id}/ 获取进度和各行错误
+
+执行方式与导出任务相同：默认在 Web 进程的后台线程池中执行，
+IMPORT_JOBS_IN_PROCESS=False 时由 `python manage.py process_result_imports --loop` 工作进程执行
+"""
+import logging
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from utils.background import submit
+from .importer import ImportFileError, ResultImporter, open_result_sheet
+from .models import ResultImportJob
+
+
+logger = logging.getLogger(__name__)
+
+# 分块行数的允许范围
+MIN_CHUNK_SIZE = 50
+MAX_CHUNK_SIZE = 5000
+# 运行中的任务超过该时间（秒）没有提交新分块，视为已中断，可以继续
+STALE_JOB_SECONDS = 300
+
+
+def get_default_chunk_size():
+    """默认分块行数"""
+    return getattr(settings, 'RESULT_IMPORT_CHUNK_SIZE', 500)
+
+
+def clamp_chunk_size(value):
+    """把请求中的分块行数限制在允许范围内，无效值使用默认值"""
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return get_default_chunk_size()
+    return max(MIN_CHUNK_SIZE, min(MAX_CHUNK_SIZE, value))
+
+
+def schedule_import_job(job):
+    """事务提交后安排执行任务"""
+    if getattr(settings, 'IMPORT_JOBS_IN_PROCESS', True):
+        transaction.on_commit(lambda: submit(run_import_job, job.id))
+
+
+def create_import_job(uploaded_file, file_type, user, context_event_id=None, chunk_size=None):
+    """
+    登记导入任务
+
+    参数:
+        uploaded_file: 上传的文件
+        file_type: 'xlsx' 或 'csv'
+        user: 发起人
+        context_event_id: 当前筛选的赛事ID（可选）
+        chunk_size: 分块行数（可选）
+
+    返回:
+        ResultImportJob: 新任务
+    """
+    job = ResultImportJob.objects.create(
+        file=uploaded_file,
+        file_type=file_type,
+        context_event_id=context_event_id,
+        chunk_size=clamp_chunk_size(chunk_size) if chunk_size else get_default_chunk_size(),
+        created_by=user
+    )
+    schedule_import_job(job)
+    return job
+
+
+def is_resumable(job):
+    """失败的任务和已中断的运行中任务可以继续"""
+    if job.status == 'failed':
+        return True
+    stale_before = timezone.now() - timedelta(seconds=STALE_JOB_SECONDS)
+    return job.status == 'running' and job.updated_at < stale_before
+
+
+def resume_import_job(job):
+    """
+    从最后一个已提交的分块继续任务
+
+    返回:
+        bool: 任务是否被重新排队
+    """
+    stale_before = timezone.now() - timedelta(seconds=STALE_JOB_SECONDS)
+    requeued = ResultImportJob.objects.filter(pk=job.pk).filter(
+        Q(status='failed') | Q(status='running', updated_at__lt=stale_before)
+    ).update(status='pending', message='', finished_at=None, updated_at=timezone.now())
+    if requeued:
+        schedule_import_job(job)
+    return bool(requeued)
+
+
+def claim_job(job_id):
+    """领取任务，已被其他工作者领取时返回 False"""
+    return ResultImportJob.objects.filter(pk=job_id, status='pending')\
+        .update(status='running', updated_at=timezone.now()) == 1
+
+
+def run_import_job(job_id):
+    """
+    执行导入任务
+
+    返回:
+        bool: 是否执行了该任务
+    """
+    if not claim_job(job_id):
+        return False
+    job = ResultImportJob.objects.select_related('created_by').get(pk=job_id)
+    try:
+        with job.file.open('rb') as file:
+            sheet = open_result_sheet(file, job.file_type)
+            try:
+                if job.total_rows is None:
+                    job.total_rows = sheet.total_rows
+                    job.save(update_fields=['total_rows', 'updated_at'])
+
+                importer = ResultImporter(job.created_by, job.context_event_id)
+                # 跳过之前已提交的行
+                rows = islice(sheet.rows, job.processed_rows, None)
+                while True:
+                    chunk = list(islice(rows, job.chunk_size))
+                    if not chunk:
+                        break
+                    with transaction.atomic():
+                        start_row = job.processed_rows + 2
+                        imported, errors = importer.run(chunk, sheet.column_mapping, start_row=start_row)
+                        # 进度与本块成绩在同一事务中提交
+                        job.processed_rows += len(chunk)
+                        job.committed_chunks += 1
+                        job.imported += imported
+                        job.errors = job.errors + errors
+                        job.save(update_fields=[
+                            'processed_rows', 'committed_chunks', 'imported', 'errors', 'updated_at'
+                        ])
+            finally:
+                sheet.close()
+        job.status = 'succeeded'
+    except ImportFileError as exc:
+        job.status = 'failed'
+        job.message = exc.message if not exc.detail else f'{exc.message}: {exc.detail}'
+    except Exception as exc:
+        logger.exception('成绩导入任务执行失败: %s', job_id)
+        job.status = 'failed'
+        job.message = str(exc)[:500]
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'message', 'finished_at', 'updated_at'])
+    return True
+
+
+def process_pending_jobs():
+    """
+    按提交顺序执行等待中的任务
+
+    返回:
+        int: 执行的任务数量
+    """
+    job_ids = list(ResultImportJob.objects.filter(status='pending').order_by('id').values_list('id', flat=True))
+    return sum(1 for job_id in job_ids if run_import_job(job_id))
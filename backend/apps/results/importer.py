@@ -0,0 +1,413 @@
+"""
+成绩批量导入
+
+从 Excel / CSV 导入成绩时，每个赛事只查询一次：
+    - RegistrationIndex 把赛事已通过的报名按参赛者姓名、真实姓名、用户名建立内存索引
+    - 同时载入该赛事已有的 (报名记录, 轮次) 组合用于查重
+逐行校验只访问内存，通过校验的行最后用 bulk_create 分批写入；
+每行的错误信息（行号与原因）与逐行调用 ResultCreateSerializer 时保持一致
+"""
+import csv
+import io
+import re
+from collections import defaultdict
+
+from openpyxl import load_workbook
+from rest_framework import serializers
+
+from apps.events.models import Event
+from apps.registrations.models import Registration
+from .leaderboard import invalidate_leaderboards
+from .models import Result
+from .serializers import ResultCreateSerializer
+
+
+# bulk_create 每批写入的行数
+IMPORT_BATCH_SIZE = 500
+# 支持的导入格式
+IMPORT_FILE_TYPES = ('xlsx', 'csv')
+
+HEADER_ALIASES = {
+    'event': {alias.lower() for alias in {
+        '赛事名称', '赛事', '比赛名称', 'event name', 'event', 'match name'
+    }},
+    'participant': {alias.lower() for alias in {
+        '参赛者', '选手', '运动员', 'participant', 'athlete', '选手姓名', 'name'
+    }},
+    'round': {alias.lower() for alias in {
+        '轮次', 'round', 'round type', '阶段', '赛次'
+    }},
+    'score': {alias.lower() for alias in {
+        '成绩', 'score', 'result'
+    }},
+    'rank': {alias.lower() for alias in {
+        '排名', 'rank', 'position'
+    }}
+}
+
+ROUND_TYPE_KEYWORDS = [
+    ('semifinal', ['半决赛', 'semifinal']),
+    ('final', ['决赛', 'final']),
+    ('preliminary', ['预赛', '初赛', 'preliminary'])
+]
+
+
+def build_column_mapping(header_row):
+    """
+    构建Excel列映射关系
+    
+    将Excel表头与系统字段建立映射关系，支持多种表头名称
+    
+    参数:
+        header_row: Excel第一行的表头数据
+        
+    返回:
+        mapping: 字段名到列索引的映射字典
+        missing: 缺失的必填字段列表
+    """
+    mapping = {}
+    for idx, header in enumerate(header_row or []):
+        normalized = (header or '').strip().lower()
+        for field, aliases in HEADER_ALIASES.items():
+            if normalized in aliases:
+                mapping[field] = idx
+                break
+    missing = [field for field in HEADER_ALIASES if field not in mapping]
+    return mapping, missing
+
+
+def safe_str(value):
+    """安全地将值转换为字符串，处理None和空值"""
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def normalize_round_type(value):
+    """
+    规范化轮次类型
+    
+    将Excel中的轮次描述转换为系统标准格式
+    支持中英文关键词匹配
+    """
+    if value is None:
+        return None
+    text = str(value).strip().lower()
+    for target, keywords in ROUND_TYPE_KEYWORDS:
+        for keyword in keywords:
+            if keyword in text:
+                return target
+    return None
+
+
+def build_candidate_names(raw_value):
+    """
+    构建参赛者姓名候选列表
+    
+    从Excel单元格提取可能的姓名，包括括号中的别名
+    例如: "张三(zhangsan)" -> ["张三(zhangsan)", "zhangsan"]
+    """
+    if raw_value in (None, ''):
+        return []
+    text = str(raw_value).strip()
+    if not text:
+        return []
+    names = [text]
+    for match in re.findall(r"\(([^)]+)\)", text):
+        candidate = match.strip()
+        if candidate and candidate not in names:
+            names.append(candidate)
+    return names
+
+
+class RegistrationIndex:
+    """
+    赛事已通过报名的内存索引
+
+    按 participant_name、user.real_name、user.username 三个字段（不区分大小写）索引，
+    匹配顺序与唯一性要求与逐条 iexact 查询相同
+    """
+
+    MATCH_FIELDS = ('participant_name', 'user__real_name', 'user__username')
+
+    def __init__(self, event):
+        self.index = {field: defaultdict(list) for field in self.MATCH_FIELDS}
+        rows = Registration.objects.filter(event=event, status='approved')\
+            .values_list('id', 'user_id', *self.MATCH_FIELDS)
+        for registration_id, user_id, *values in rows:
+            for field, value in zip(self.MATCH_FIELDS, values):
+                if value:
+                    self.index[field][value.lower()].append((registration_id, user_id))
+
+    def find(self, candidates):
+        """
+        根据候选姓名查找报名记录
+
+        参数:
+            candidates: 候选姓名列表
+
+        返回:
+            registration: 匹配的 (报名ID, 用户ID)，未找到返回None
+            error: 错误信息，无错误返回None
+        """
+        for candidate in candidates:
+            if not candidate:
+                continue
+            for field in self.MATCH_FIELDS:
+                matches = self.index[field].get(candidate.lower(), [])
+                if len(matches) > 1:
+                    return None, f'参赛者"{candidate}"匹配到多条报名记录，请确保唯一'
+                if matches:
+                    return matches[0], None
+        return None, '找不到与参赛者匹配的报名记录，请确认姓名或用户名'
+
+
+class ImportFileError(Exception):
+    """导入文件无法读取或格式不正确"""
+
+    def __init__(self, message, detail=None):
+        super().__init__(message)
+        self.message = message
+        self.detail = detail
+
+
+class ResultSheet:
+    """
+    已打开的成绩表
+
+    属性:
+        rows: 数据行迭代器（不含表头），空单元格为 None
+        column_mapping: 字段名到列索引的映射
+        total_rows: 数据行数（含空行），无法确定时为 None
+    """
+
+    def __init__(self, rows, column_mapping, total_rows=None, close=None):
+        self.rows = rows
+        self.column_mapping = column_mapping
+        self.total_rows = total_rows
+        self._close = close
+
+    def close(self):
+        if self._close:
+            self._close()
+
+
+def get_import_file_type(filename):
+    """根据文件名判断导入格式，不支持时返回 None"""
+    extension = (filename or '').rsplit('.', 1)[-1].lower()
+    return extension if extension in IMPORT_FILE_TYPES else None
+
+
+def _check_header(header_row, close):
+    column_mapping, missing = build_column_mapping(header_row)
+    if missing:
+        close()
+        raise ImportFileError(f'缺少必要字段: {", ".join(missing)}')
+    return column_mapping
+
+
+def _open_xlsx(file):
+    try:
+        workbook = load_workbook(file, read_only=True, data_only=True)
+    except Exception as exc:
+        raise ImportFileError('无法读取 Excel 文件', str(exc))
+    sheet = workbook.active
+    header_row = next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), None)
+    column_mapping = _check_header(header_row, workbook.close)
+    if sheet.max_row is not None and sheet.max_row <= 1:
+        workbook.close()
+        raise ImportFileError('Excel 文件没有数据行')
+    total_rows = sheet.max_row - 1 if sheet.max_row else None
+    return ResultSheet(sheet.iter_rows(min_row=2, values_only=True), column_mapping, total_rows, workbook.close)
+
+
+def _open_csv(file):
+    try:
+        text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+        # 先数一遍行数用于显示进度，再从头读取
+        total_rows = sum(1 for _ in csv.reader(text)) - 1
+        text.seek(0)
+        reader = csv.reader(text)
+        header_row = next(reader, None)
+    except (UnicodeDecodeError, csv.Error) as exc:
+        raise ImportFileError('无法读取 CSV 文件，请使用 UTF-8 编码', str(exc))
+    column_mapping = _check_header(header_row, text.detach)
+    if total_rows <= 0:
+        text.detach()
+        raise ImportFileError('CSV 文件没有数据行')
+    rows = ([cell if cell.strip() else None for cell in row] for row in reader)
+    # 只解除包装，不关闭底层文件，由调用方管理
+    return ResultSheet(rows, column_mapping, total_rows, text.detach)
+
+
+def open_result_sheet(file, file_type='xlsx'):
+    """
+    打开成绩表并识别表头
+
+    参数:
+        file: 上传的 .xlsx / .csv 文件（二进制文件对象）
+        file_type: 'xlsx' 或 'csv'
+
+    返回:
+        ResultSheet: 调用方负责调用 close()
+
+    异常:
+        ImportFileError: 文件无法读取、缺少必要字段或没有数据行
+    """
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    if file_type == 'csv':
+        return _open_csv(file)
+    return _open_xlsx(file)
+
+
+class ResultImporter:
+    """
+    成绩导入器
+
+    使用示例:
+        importer = ResultImporter(request.user, context_event_id=12)
+        imported, errors = importer.run(rows, column_mapping)
+
+    参数:
+        recorded_by: 录入人
+        context_event_id: 当前筛选的赛事ID，行中的赛事必须与之一致（可选）
+    """
+
+    def __init__(self, recorded_by, context_event_id=None):
+        self.recorded_by = recorded_by
+        self.context_event_id = context_event_id
+        self.events = {}            # 小写赛事名称 -> 赛事
+        self.indexes = {}           # 赛事ID -> RegistrationIndex
+        self.existing = {}          # 赛事ID -> {(报名ID, 轮次)}
+        self.pending = []
+        self.imported = 0
+        # 复用序列化器字段的校验规则和错误信息，不触发数据库查询
+        fields = ResultCreateSerializer().fields
+        self.score_field = fields['score']
+        self.rank_field = fields['rank']
+
+    def get_event(self, event_text):
+        """按名称查找赛事，每个名称只查询一次"""
+        key = event_text.lower()
+        if key not in self.events:
+            self.events[key] = Event.objects.filter(title__iexact=event_text).first()
+        return self.events[key]
+
+    def prepare_event(self, event):
+        """载入赛事的报名索引和已有成绩"""
+        if event.id not in self.indexes:
+            self.indexes[event.id] = RegistrationIndex(event)
+            self.existing[event.id] = set(
+                Result.objects.filter(event=event).values_list('registration_id', 'round_type')
+            )
+        return self.indexes[event.id], self.existing[event.id]
+
+    def validate_row(self, row, column_mapping):
+        """
+        校验一行数据
+
+        返回:
+            tuple: (Result 实例, None) 或 (None, 错误原因)
+        """
+        def get_cell(field):
+            idx = column_mapping.get(field)
+            if idx is None or idx >= len(row):
+                return None
+            return row[idx]
+
+        event_text = safe_str(get_cell('event'))
+        if not event_text:
+            return None, '赛事名称为空'
+        event = self.get_event(event_text)
+        if not event:
+            return None, f'找不到赛事: {event_text}'
+        if self.context_event_id and event.id != self.context_event_id:
+            return None, f'行中的赛事与当前筛选赛事不一致 ({event.title})'
+
+        candidates = build_candidate_names(safe_str(get_cell('participant')))
+        if not candidates:
+            return None, '参赛者信息为空'
+        index, existing = self.prepare_event(event)
+        registration, reg_error = index.find(candidates)
+        if reg_error:
+            return None, reg_error
+
+        normalized_round = normalize_round_type(get_cell('round'))
+        if not normalized_round:
+            return None, '轮次无法识别'
+        score_text = safe_str(get_cell('score'))
+        if not score_text:
+            return None, '成绩为空'
+        rank_value = None
+        rank_cell = get_cell('rank')
+        if rank_cell not in (None, ''):
+            try:
+                rank_value = int(float(rank_cell))
+            except (ValueError, TypeError):
+                return None, '排名需要为数字'
+
+        registration_id, user_id = registration
+        if (registration_id, normalized_round) in existing:
+            return None, '该参赛者在当前轮次已有成绩'
+
+        field_errors = []
+        for name, field, value in (('score', self.score_field, score_text), ('rank', self.rank_field, rank_value)):
+            if value is None:
+                continue
+            try:
+                field.run_validation(value)
+            except serializers.ValidationError as exc:
+                field_errors.append(f"{name}: {exc.detail[0]}")
+        if field_errors:
+            return None, '; '.join(field_errors)
+
+        existing.add((registration_id, normalized_round))
+        result = Result(
+            event=event,
+            registration_id=registration_id,
+            user_id=user_id,
+            round_type=normalized_round,
+            score=score_text,
+            rank=rank_value,
+            recorded_by=self.recorded_by
+        )
+        # bulk_create 不调用 save()，这里计算数值成绩
+        result.update_score_value()
+        return result, None
+
+    def flush(self):
+        """写入已通过校验的成绩"""
+        if self.pending:
+            Result.objects.bulk_create(self.pending, batch_size=IMPORT_BATCH_SIZE)
+            # bulk_create 不发送 post_save 信号，手动使排行榜失效
+            invalidate_leaderboards({result.event_id for result in self.pending})
+            self.imported += len(self.pending)
+            self.pending = []
+
+    def run(self, rows, column_mapping, start_row=2):
+        """
+        导入数据行，调用方应在 transaction.atomic() 中执行
+
+        参数:
+            rows: 数据行迭代器（不含表头）
+            column_mapping: build_column_mapping() 返回的列映射
+            start_row: 第一行数据在表格中的行号
+
+        返回:
+            tuple: (本次成功导入的数量, 错误列表 [{row, detail}])
+        """
+        imported_before = self.imported
+        errors = []
+        for row_index, row in enumerate(rows, start=start_row):
+            if not any(cell is not None for cell in row):
+                continue
+            result, error = self.validate_row(row, column_mapping)
+            if error:
+                errors.append({'row': row_index, 'detail': error})
+                continue
+            self.pending.append(result)
+            if len(self.pending) >= IMPORT_BATCH_SIZE:
+                self.flush()
+        self.flush()
+        return self.imported - imported_before, errors
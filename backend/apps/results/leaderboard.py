@@ -0,0 +1,111 @@
+"""
+排行榜缓存
+
+决赛期间大量观众每隔几秒刷新排行榜，每次都执行带多表关联的排序查询代价较高。
+本模块把每个 (赛事, 轮次) 的前 N 名序列化后缓存：
+    - 缓存命中时直接返回，不访问数据库
+    - 成绩创建、修改、公开、取消公开、删除、导入、重新排名后使该赛事的排行榜失效，
+      下一次请求时重新生成
+    - 失效在当前事务提交后再执行一次，避免事务提交前的并发请求把旧数据重新写入缓存
+    - 提交后在后台线程池中向 WebSocket 订阅者推送增量（见 live.py）
+
+LEADERBOARD_CACHE_TTL 只是兜底过期时间（如通过数据库直接修改成绩），正常情况下由失效驱动
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from utils.background import submit
+from .models import Result
+from .scoring import get_round_direction, score_ordering
+
+
+LEADERBOARD_SIZE = 10
+LEADERBOARD_KEY = 'results:leaderboard:{event_id}:{round_type}'
+
+
+def get_leaderboard_ttl():
+    """排行榜的最长缓存时间（秒）"""
+    return getattr(settings, 'LEADERBOARD_CACHE_TTL', 3600)
+
+
+def leaderboard_key(event_id, round_type):
+    return LEADERBOARD_KEY.format(event_id=event_id, round_type=round_type)
+
+
+def build_leaderboard(event_id, round_type):
+    """
+    查询排行榜
+
+    按数值成绩排序（计时类越小越好，距离/分数类越大越好），成绩相同按排名；
+    无法解析的成绩排在有效成绩之后
+
+    返回:
+        list: 前 LEADERBOARD_SIZE 名的序列化数据
+    """
+    from .serializers import ResultListSerializer
+
+    base = Result.objects.select_related('event', 'user').filter(
+        event_id=event_id,
+        round_type=round_type,
+        is_published=True
+    )
+    direction = get_round_direction(base)
+
+    # 有效成绩走 (event, round_type, score_value) 索引
+    results = list(
+        base.filter(score_value__isnull=False).order_by(score_ordering(direction), 'rank')[:LEADERBOARD_SIZE]
+    )
+    if len(results) < LEADERBOARD_SIZE:
+        results += list(
+            base.filter(score_value__isnull=True).order_by('rank')[:LEADERBOARD_SIZE - len(results)]
+        )
+    return ResultListSerializer(results, many=True).data
+
+
+def get_leaderboard(event_id, round_type):
+    """
+    读取排行榜，缓存未命中时重新生成
+
+    参数:
+        event_id: 赛事ID
+        round_type: 轮次
+
+    返回:
+        list: 前 LEADERBOARD_SIZE 名的序列化数据
+    """
+    key = leaderboard_key(event_id, round_type)
+    data = cache.get(key)
+    if data is None:
+        data = list(build_leaderboard(event_id, round_type))
+        cache.set(key, data, timeout=get_leaderboard_ttl())
+    return data
+
+
+def invalidate_leaderboards(event_ids):
+    """
+    使赛事全部轮次的排行榜失效
+
+    参数:
+        event_ids: 赛事ID或赛事ID集合
+    """
+    if isinstance(event_ids, int):
+        event_ids = [event_ids]
+    keys = [
+        leaderboard_key(event_id, round_type)
+        for event_id in set(event_ids)
+        for round_type, _ in Result.STATUS_CHOICES
+    ]
+    if not keys:
+        return
+    cache.delete_many(keys)
+    # 事务提交前其他请求可能读到旧数据并重新写入缓存，提交后再删除一次，并向订阅者推送增量
+    transaction.on_commit(lambda: after_commit(keys, event_ids))
+
+
+def after_commit(keys, event_ids):
+    """事务提交后再次失效，并在后台推送排行榜增量"""
+    from .live import push_leaderboard_changes
+
+    cache.delete_many(keys)
+    submit(push_leaderboard_changes, list(set(event_ids)))
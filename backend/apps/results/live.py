@@ -0,0 +1,204 @@
+"""
+排行榜实时推送
+
+观众连接 ws://host/ws/results/<event_id>/<round_type>/ 订阅排行榜：
+    - 连接时收到完整的排行榜（leaderboard_snapshot）
+    - 之后该轮次的成绩发生变化时，只推送与上一次推送相比的增量（leaderboard_update）：
+      inserted 新进入前 N 名的行、moved 名次变化的行、removed 跌出前 N 名的行、
+      updated 名次不变但内容变化的行
+    数千个订阅者时，每次变化只广播几行数据
+
+推送基线（上一次推送的排行榜及其版本号）保存在缓存中，只有被订阅过的排行榜才保存基线；
+没有基线的排行榜在成绩变化时不做任何计算
+
+同一排行榜的推送逐个执行：
+    - 每次成绩变化先设置待推送标记，再尝试获取该排行榜的推送锁；
+      锁被占用时直接返回，由持有者在完成当前推送后合并处理
+    - 每条增量带有递增的 version，快照带有基线的 version；
+      客户端收到的 version 不等于本地 version + 1 时，发送 {"type": "snapshot"} 重新获取快照
+"""
+import json
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+
+from .leaderboard import get_leaderboard
+from .models import Result
+
+
+logger = logging.getLogger(__name__)
+
+LIVE_BASELINE_KEY = 'results:leaderboard:live:{event_id}:{round_type}'
+LIVE_PUSH_LOCK_KEY = 'results:leaderboard:live:{event_id}:{round_type}:lock'
+LIVE_PUSH_DIRTY_KEY = 'results:leaderboard:live:{event_id}:{round_type}:dirty'
+# 推送基线的保留时间（秒），每次订阅或推送时刷新
+LIVE_BASELINE_TTL = 86400
+# 推送锁的过期时间（秒），持有者异常退出后自动释放
+LIVE_PUSH_LOCK_TIMEOUT = 30
+
+
+def leaderboard_group(event_id, round_type):
+    """排行榜推送的频道组名"""
+    return f'results_leaderboard_{event_id}_{round_type}'
+
+
+def baseline_key(event_id, round_type):
+    return LIVE_BASELINE_KEY.format(event_id=event_id, round_type=round_type)
+
+
+def push_lock_key(event_id, round_type):
+    return LIVE_PUSH_LOCK_KEY.format(event_id=event_id, round_type=round_type)
+
+
+def push_dirty_key(event_id, round_type):
+    return LIVE_PUSH_DIRTY_KEY.format(event_id=event_id, round_type=round_type)
+
+
+def to_json_rows(rows):
+    """转换为 JSON 基本类型，兼容 Redis 通道层的序列化"""
+    return json.loads(json.dumps(list(rows), cls=DjangoJSONEncoder))
+
+
+def get_live_leaderboard(event_id, round_type):
+    """
+    获取订阅者的排行榜快照
+
+    已有推送基线时返回基线，保证新订阅者与已有订阅者基于同一份数据接收增量；
+    否则以当前排行榜建立基线
+
+    返回:
+        dict: {'version': 基线版本, 'rows': 排行榜数据}
+    """
+    key = baseline_key(event_id, round_type)
+    baseline = cache.get(key)
+    if baseline is None:
+        baseline = {'version': 0, 'rows': to_json_rows(get_leaderboard(event_id, round_type))}
+        if not cache.add(key, baseline, timeout=LIVE_BASELINE_TTL):
+            # 并发订阅时以先写入的基线为准
+            baseline = cache.get(key) or baseline
+    else:
+        cache.touch(key, LIVE_BASELINE_TTL)
+    return baseline
+
+
+def diff_leaderboards(old_rows, new_rows):
+    """
+    计算两份排行榜的增量
+
+    名次从 1 开始，对应排行榜中的位置
+
+    返回:
+        dict: {'inserted': [{position, row}], 'moved': [{id, from, to}],
+               'removed': [id], 'updated': [{position, row}]}；没有变化时返回 None
+    """
+    old_positions = {row['id']: (position, row) for position, row in enumerate(old_rows, 1)}
+    new_positions = {row['id']: (position, row) for position, row in enumerate(new_rows, 1)}
+
+    changes = {
+        'inserted': [],
+        'moved': [],
+        'removed': [result_id for result_id in old_positions if result_id not in new_positions],
+        'updated': [],
+    }
+    for result_id, (position, row) in new_positions.items():
+        if result_id not in old_positions:
+            changes['inserted'].append({'position': position, 'row': row})
+            continue
+        old_position, old_row = old_positions[result_id]
+        if old_position != position:
+            changes['moved'].append({'id': result_id, 'from': old_position, 'to': position})
+        if old_row != row:
+            changes['updated'].append({'position': position, 'row': row})
+
+    if not any(changes.values()):
+        return None
+    return changes
+
+
+def push_leaderboard_changes(event_ids):
+    """
+    向订阅者推送赛事各轮次排行榜的增量
+
+    参数:
+        event_ids: 成绩发生变化的赛事ID集合
+
+    返回:
+        int: 推送的消息数量
+    """
+    channel_layer = get_channel_layer()
+    if not channel_layer:
+        return 0
+
+    pushed = 0
+    for event_id in set(event_ids):
+        for round_type, _ in Result.STATUS_CHOICES:
+            if cache.get(baseline_key(event_id, round_type)) is None:
+                # 没有订阅者
+                continue
+            pushed += push_round_changes(channel_layer, event_id, round_type)
+    return pushed
+
+
+def push_round_changes(channel_layer, event_id, round_type):
+    """
+    逐个推送单个排行榜的增量
+
+    先设置待推送标记再尝试获取推送锁：获取失败说明其他线程或进程正在推送，
+    持有者释放锁前会发现标记并再推送一次，本次变化不会丢失
+
+    返回:
+        int: 推送的消息数量
+    """
+    lock_key = push_lock_key(event_id, round_type)
+    dirty_key = push_dirty_key(event_id, round_type)
+    cache.set(dirty_key, 1, timeout=LIVE_PUSH_LOCK_TIMEOUT)
+
+    pushed = 0
+    while cache.add(lock_key, 1, timeout=LIVE_PUSH_LOCK_TIMEOUT):
+        try:
+            # 推送期间到达的变化合并为下一次推送
+            while cache.delete(dirty_key):
+                pushed += push_round_update(channel_layer, event_id, round_type)
+        finally:
+            cache.delete(lock_key)
+        # 释放锁与检查标记之间可能有新的变化，重新获取锁处理
+        if not cache.get(dirty_key):
+            break
+    return pushed
+
+
+def push_round_update(channel_layer, event_id, round_type):
+    """
+    计算单个排行榜相对基线的增量并推送，调用方必须持有推送锁
+
+    返回:
+        int: 推送的消息数量（0 或 1）
+    """
+    key = baseline_key(event_id, round_type)
+    baseline = cache.get(key)
+    if baseline is None:
+        return 0
+    new_rows = to_json_rows(get_leaderboard(event_id, round_type))
+    changes = diff_leaderboards(baseline['rows'], new_rows)
+    if changes is None:
+        cache.touch(key, LIVE_BASELINE_TTL)
+        return 0
+
+    version = baseline['version'] + 1
+    cache.set(key, {'version': version, 'rows': new_rows}, timeout=LIVE_BASELINE_TTL)
+    try:
+        async_to_sync(channel_layer.group_send)(
+            leaderboard_group(event_id, round_type),
+            {
+                'type': 'leaderboard.update',
+                'payload': {'event': event_id, 'round_type': round_type, 'version': version, **changes},
+            },
+        )
+    except Exception:
+        # 推送失败不影响成绩写入；客户端收到下一条增量时发现版本不连续，会重新获取快照
+        logger.warning('推送排行榜增量失败: %s %s', event_id, round_type, exc_info=True)
+        return 0
+    return 1
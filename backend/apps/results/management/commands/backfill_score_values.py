@@ -0,0 +1,43 @@
+"""
+补算数值成绩
+
+为历史成绩解析 score_value / score_direction：
+    python manage.py backfill_score_values
+    python manage.py backfill_score_values --only-missing --batch-size 2000
+
+按主键分块处理，每块一次查询和一次批量更新；只写回数值或方向有变化的记录
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from apps.results.models import Result
+from utils.bulk import iter_id_chunks
+
+
+class Command(BaseCommand):
+    help = '根据成绩文本补算数值成绩 score_value 与成绩方向 score_direction'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='每批处理的记录数，默认1000')
+        parser.add_argument('--only-missing', action='store_true', help='只处理 score_value 为空的记录')
+
+    def handle(self, *args, **options):
+        queryset = Result.objects.all()
+        if options['only_missing']:
+            queryset = queryset.filter(score_value__isnull=True)
+
+        scanned = updated = 0
+        for ids in iter_id_chunks(queryset, max(1, options['batch_size'])):
+            changed = []
+            results = Result.objects.filter(pk__in=ids).only('id', 'score', 'score_unit', 'score_value', 'score_direction')
+            for result in results:
+                before = (result.score_value, result.score_direction)
+                result.update_score_value()
+                if (result.score_value, result.score_direction) != before:
+                    changed.append(result)
+            with transaction.atomic():
+                Result.objects.bulk_update(changed, ['score_value', 'score_direction'])
+            scanned += len(ids)
+            updated += len(changed)
+
+        self.stdout.write(self.style.SUCCESS(f'共检查 {scanned} 条成绩，更新 {updated} 条'))
@@ -0,0 +1,34 @@
+"""
+成绩导入任务工作进程
+
+执行等待中的成绩导入任务：
+    python manage.py process_result_imports           # 处理一轮后退出
+    python manage.py process_result_imports --loop    # 作为独立工作进程持续运行
+
+设置 IMPORT_JOBS_IN_PROCESS=False 时，导入任务只由该工作进程执行
+"""
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from apps.results.import_jobs import process_pending_jobs
+
+
+class Command(BaseCommand):
+    help = '执行等待中的成绩导入任务'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--loop', action='store_true', help='持续运行，定期检查新任务')
+        parser.add_argument('--interval', type=float, default=2, help='持续运行时的检查间隔（秒），默认2')
+
+    def handle(self, *args, **options):
+        while True:
+            close_old_connections()
+            processed = process_pending_jobs()
+            if processed or not options['loop']:
+                self.stdout.write(f'执行 {processed} 个成绩导入任务')
+            if not options['loop']:
+                return
+            if not processed:
+                time.sleep(options['interval'])
@@ -0,0 +1,44 @@
+# Generated by Django 5.0 on 2026-10-18 16:57
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0009_event_queue_registrations'),
+        ('results', '0003_keyset_pagination_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultImportJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('file', models.FileField(upload_to='imports/results/', verbose_name='导入文件')),
+                ('file_type', models.CharField(default='xlsx', max_length=10, verbose_name='文件格式')),
+                ('status', models.CharField(choices=[('pending', '等待中'), ('running', '导入中'), ('succeeded', '已完成'), ('failed', '失败')], default='pending', max_length=20, verbose_name='状态')),
+                ('chunk_size', models.PositiveIntegerField(default=500, verbose_name='分块行数')),
+                ('total_rows', models.PositiveIntegerField(blank=True, null=True, verbose_name='数据行数')),
+                ('processed_rows', models.PositiveIntegerField(default=0, verbose_name='已处理行数')),
+                ('committed_chunks', models.PositiveIntegerField(default=0, verbose_name='已提交分块数')),
+                ('imported', models.PositiveIntegerField(default=0, verbose_name='已导入数量')),
+                ('errors', models.JSONField(blank=True, default=list, verbose_name='行错误')),
+                ('message', models.TextField(blank=True, verbose_name='失败原因')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('updated_at', models.DateTimeField(auto_now=True, help_text='每提交一个分块更新一次，用于判断任务是否中断', verbose_name='更新时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='完成时间')),
+                ('context_event', models.ForeignKey(blank=True, help_text='行中的赛事必须与之一致', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='result_import_jobs', to='events.event', verbose_name='筛选赛事')),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='result_import_jobs', to=settings.AUTH_USER_MODEL, verbose_name='发起人')),
+            ],
+            options={
+                'verbose_name': '成绩导入任务',
+                'verbose_name_plural': '成绩导入任务',
+                'db_table': 'result_import_job',
+                'ordering': ['-created_at'],
+            },
+        ),
+    ]
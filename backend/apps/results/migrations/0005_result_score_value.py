@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('results', '0004_resultimportjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='result',
+            name='score_direction',
+            field=models.CharField(blank=True, choices=[('asc', '越小越好'), ('desc', '越大越好')], default='', help_text='asc: 越小越好（时间）；desc: 越大越好（距离、分数）。成绩或单位能判断方向时自动设置', max_length=4, verbose_name='成绩方向'),
+        ),
+        migrations.AddField(
+            model_name='result',
+            name='score_value',
+            field=models.FloatField(blank=True, help_text='由成绩解析出的数值（时间为秒、距离为米、重量为千克），保存时自动计算，无法解析时为空', null=True, verbose_name='成绩数值'),
+        ),
+        migrations.AddIndex(
+            model_name='result',
+            index=models.Index(fields=['event', 'round_type', 'score_value'], name='result_event_i_da0db9_idx'),
+        ),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.conf import settings
 
+from .scoring import DEFAULT_SCORE_DIRECTION, SCORE_DIRECTION_CHOICES, parse_score
+
 
 class Result(models.Model):
     """
@@ -74,6 +76,20 @@ class Result(models.Model):
         verbose_name='成绩',
         help_text='成绩值，可以是时间、分数、距离等，如: 10.23、85分、5.6米'
     )
+    score_value = models.FloatField(
+        blank=True,
+        null=True,
+        verbose_name='成绩数值',
+        help_text='由成绩解析出的数值（时间为秒、距离为米、重量为千克），保存时自动计算，无法解析时为空'
+    )
+    score_direction = models.CharField(
+        max_length=4,
+        choices=SCORE_DIRECTION_CHOICES,
+        blank=True,
+        default='',
+        verbose_name='成绩方向',
+        help_text='asc: 越小越好（时间）；desc: 越大越好（距离、分数）。成绩或单位能判断方向时自动设置'
+    )
     rank = models.IntegerField(
         blank=True,
         null=True,
@@ -144,8 +160,138 @@ class Result(models.Model):
             models.Index(fields=['event', 'rank']),      # 按赛事和排名查询
             models.Index(fields=['user']),               # 按用户查询个人成绩
             models.Index(fields=['is_published']),       # 按公开状态过滤
+            models.Index(fields=['-created_at', '-id']), # 键集分页的稳定排序
+            models.Index(fields=['event', 'round_type', 'score_value']),  # 排行榜按数值成绩排序
         ]
     
     def __str__(self):
         """返回成绩的字符串表示"""
         return f"{self.user.real_name} - {self.event.title} - {self.score}"
+
+    def update_score_value(self):
+        """
+        根据成绩和单位计算 score_value / score_direction
+
+        能从成绩或单位判断方向时覆盖 score_direction，否则保留已有值（未设置时使用默认方向）；
+        bulk_create 不会调用 save()，批量写入前需要手动调用
+        """
+        self.score_value, direction = parse_score(self.score, self.score_unit)
+        if direction:
+            self.score_direction = direction
+        elif not self.score_direction:
+            self.score_direction = DEFAULT_SCORE_DIRECTION
+
+    def save(self, *args, **kwargs):
+        """保存前重新计算数值成绩"""
+        self.update_score_value()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'score', 'score_unit'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'score_value', 'score_direction'}
+        super().save(*args, **kwargs)
+
+
+class ResultImportJob(models.Model):
+    """
+    成绩导入任务模型
+
+    大文件导入改为后台任务：按 chunk_size 行分块，每块在独立事务中写入成绩并同步更新进度，
+    任务中断后可从最后一个已提交的分块继续
+
+    关键字段说明:
+        - processed_rows: 已提交的数据行数（含空行和出错的行），继续导入时跳过这些行
+        - imported: 已写入的成绩数量
+        - errors: 各行的错误信息 [{row, detail}]，与同步导入的返回格式相同
+        - message: 任务失败时的原因
+
+    数据表名: result_import_job
+    """
+    STATUS_CHOICES = (
+        ('pending', '等待中'),
+        ('running', '导入中'),
+        ('succeeded', '已完成'),
+        ('failed', '失败'),
+    )
+
+    file = models.FileField(
+        upload_to='imports/results/',
+        verbose_name='导入文件'
+    )
+    file_type = models.CharField(
+        max_length=10,
+        default='xlsx',
+        verbose_name='文件格式'
+    )
+    context_event = models.ForeignKey(
+        'events.Event',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='result_import_jobs',
+        verbose_name='筛选赛事',
+        help_text='行中的赛事必须与之一致'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='pending',
+        verbose_name='状态'
+    )
+    chunk_size = models.PositiveIntegerField(
+        default=500,
+        verbose_name='分块行数'
+    )
+    total_rows = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='数据行数'
+    )
+    processed_rows = models.PositiveIntegerField(
+        default=0,
+        verbose_name='已处理行数'
+    )
+    committed_chunks = models.PositiveIntegerField(
+        default=0,
+        verbose_name='已提交分块数'
+    )
+    imported = models.PositiveIntegerField(
+        default=0,
+        verbose_name='已导入数量'
+    )
+    errors = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name='行错误'
+    )
+    message = models.TextField(
+        blank=True,
+        verbose_name='失败原因'
+    )
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='result_import_jobs',
+        verbose_name='发起人'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='创建时间'
+    )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='更新时间',
+        help_text='每提交一个分块更新一次，用于判断任务是否中断'
+    )
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name='完成时间'
+    )
+
+    class Meta:
+        db_table = 'result_import_job'
+        verbose_name = '成绩导入任务'
+        verbose_name_plural = verbose_name
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"成绩导入 #{self.id} ({self.get_status_display()})"
@@ -0,0 +1,93 @@
+"""
+成绩自动排名
+
+按 score_value 为一个赛事轮次的全部成绩重新计算排名：
+    - 一次查询取出 (id, score_value, rank)，在内存中排序计算名次
+    - 只把名次有变化的记录通过一次 bulk_update 写回
+    - 无法解析的成绩（score_value 为空）不参与排名，名次清空
+
+并列规则:
+    - competition: 1, 2, 2, 4（并列占用后续名次，默认）
+    - dense: 1, 2, 2, 3（并列不占用名次）
+    - ordinal: 1, 2, 3, 4（并列按录入顺序依次排名）
+"""
+from django.db import transaction
+from django.utils import timezone
+
+from .leaderboard import invalidate_leaderboards
+from .models import Result
+from .scoring import get_round_direction
+
+
+RANK_METHODS = ('competition', 'dense', 'ordinal')
+# bulk_update 每条 UPDATE 语句包含的记录数
+RERANK_BATCH_SIZE = 1000
+
+
+def compute_ranks(values, direction='asc', method='competition'):
+    """
+    计算名次
+
+    参数:
+        values: 成绩数值列表
+        direction: 'asc' 数值越小越好，'desc' 数值越大越好
+        method: 并列规则，见 RANK_METHODS
+
+    返回:
+        list: 与 values 一一对应的名次
+    """
+    # 稳定排序：数值相同时保持输入顺序，ordinal 规则按此顺序排名
+    order = sorted(range(len(values)), key=values.__getitem__, reverse=direction == 'desc')
+    ranks = [0] * len(values)
+    previous = None
+    competition_rank = dense_rank = 0
+    for position, index in enumerate(order, 1):
+        value = values[index]
+        if position == 1 or value != previous:
+            competition_rank = position
+            dense_rank += 1
+            previous = value
+        if method == 'ordinal':
+            ranks[index] = position
+        elif method == 'dense':
+            ranks[index] = dense_rank
+        else:
+            ranks[index] = competition_rank
+    return ranks
+
+
+@transaction.atomic
+def rerank_round(event_id, round_type, method='competition'):
+    """
+    重新计算赛事轮次的排名
+
+    参数:
+        event_id: 赛事ID
+        round_type: 轮次
+        method: 并列规则，见 RANK_METHODS
+
+    返回:
+        dict: {'ranked': 参与排名的数量, 'unranked': 无有效成绩的数量, 'updated': 名次有变化的数量}
+    """
+    queryset = Result.objects.filter(event_id=event_id, round_type=round_type)
+    direction = get_round_direction(queryset)
+    # 锁定本轮成绩，避免排名期间被修改；按录入顺序取出
+    rows = list(queryset.select_for_update().order_by('id').values_list('id', 'score_value', 'rank'))
+
+    scored = [row for row in rows if row[1] is not None]
+    new_ranks = dict(zip(
+        (row[0] for row in scored),
+        compute_ranks([row[1] for row in scored], direction, method)
+    ))
+
+    now = timezone.now()
+    changed = [
+        Result(id=result_id, rank=new_ranks.get(result_id), updated_at=now)
+        for result_id, _, rank in rows
+        if new_ranks.get(result_id) != rank
+    ]
+    # 同时更新 updated_at，使成绩接口的条件请求校验值失效
+    Result.objects.bulk_update(changed, ['rank', 'updated_at'], batch_size=RERANK_BATCH_SIZE)
+    if changed:
+        invalidate_leaderboards(event_id)
+    return {'ranked': len(scored), 'unranked': len(rows) - len(scored), 'updated': len(changed)}
@@ -0,0 +1,14 @@
+"""
+成绩 WebSocket 路由配置模块
+"""
+
+from django.urls import re_path
+
+from .consumers import ResultLeaderboardConsumer
+
+websocket_urlpatterns = [
+    # 排行榜 WebSocket 路由
+    # URL: ws://host/ws/results/<event_id>/<round_type>/
+    # 说明：观众订阅赛事轮次的排行榜增量
+    re_path(r"ws/results/(?P<event_id>\d+)/(?P<round_type>[a-z]+)/$", ResultLeaderboardConsumer.as_asgi()),
+]
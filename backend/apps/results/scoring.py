@@ -0,0 +1,138 @@
+"""
+成绩数值化
+
+Result.score 为自由文本（如 "10.23"、"85分"、"5.6米"、"2:03:11"），按字符串排序既不正确也无法利用索引。
+保存成绩时解析出：
+    - score_value: 统一单位后的数值（时间为秒，距离为米，重量为千克，分数/次数保持原值）
+    - score_direction: 'asc' 数值越小越好（时间），'desc' 数值越大越好（距离、重量、分数）
+无法解析的成绩（如 "DNF"、"弃权"）score_value 为 NULL，排行榜中排在有效成绩之后
+
+历史数据可通过 `python manage.py backfill_score_values` 补算
+"""
+import re
+
+from django.db.models import Case, Count, F, FloatField, When
+
+
+SCORE_DIRECTION_CHOICES = (
+    ('asc', '越小越好'),
+    ('desc', '越大越好'),
+)
+# 无法从成绩或单位判断方向时使用
+DEFAULT_SCORE_DIRECTION = 'desc'
+
+# 单位 -> (换算系数, 方向)，单位比较时忽略大小写
+TIME_UNITS = {
+    'ms': 0.001, '毫秒': 0.001,
+    's': 1, 'sec': 1, '秒': 1,
+    'min': 60, '分钟': 60,
+    'h': 3600, '小时': 3600,
+}
+HIGHER_BETTER_UNITS = {
+    'mm': 0.001, '毫米': 0.001,
+    'cm': 0.01, '厘米': 0.01,
+    'm': 1, '米': 1,
+    'km': 1000, '千米': 1000, '公里': 1000,
+    'g': 0.001, '克': 0.001,
+    'kg': 1, '公斤': 1, '千克': 1,
+    '分': 1, 'pts': 1, 'points': 1, '环': 1, '个': 1, '次': 1, '点': 1,
+}
+SCORE_UNITS = {
+    **{unit: (factor, 'asc') for unit, factor in TIME_UNITS.items()},
+    **{unit: (factor, 'desc') for unit, factor in HIGHER_BETTER_UNITS.items()},
+}
+
+# 2:03:11、1:02.35 形式的时间
+CLOCK_PATTERN = re.compile(r'^(\d+)(?::(\d{1,2})){1,2}(?:\.\d+)?$')
+# 1小时2分3秒、2分05.3秒 形式的时间（"85分" 视为分数，不匹配）
+CHINESE_TIME_PATTERN = re.compile(
+    r'^(?:(?P<hours>\d+)(?:小时|时))?(?:(?P<minutes>\d+)分(?:钟)?)?(?:(?P<seconds>\d+(?:\.\d+)?)秒)?$'
+)
+NUMBER_PATTERN = re.compile(r'^([+-]?\d+(?:\.\d+)?)(.*)$')
+
+
+def _parse_clock(text):
+    """把 时:分:秒 / 分:秒 转换为秒数"""
+    seconds = 0.0
+    for part in text.split(':'):
+        seconds = seconds * 60 + float(part)
+    return seconds
+
+
+def _parse_chinese_time(text):
+    """把 1小时2分3秒 转换为秒数，不是时间格式时返回 None"""
+    match = CHINESE_TIME_PATTERN.match(text)
+    if not match:
+        return None
+    parts = match.groupdict()
+    given = [name for name, value in parts.items() if value is not None]
+    # 只有 "xx分" 时按分数处理
+    if not given or given == ['minutes'] and not text.endswith('钟'):
+        return None
+    return (
+        float(parts['hours'] or 0) * 3600
+        + float(parts['minutes'] or 0) * 60
+        + float(parts['seconds'] or 0)
+    )
+
+
+def parse_score(score, score_unit=None):
+    """
+    解析成绩文本
+
+    参数:
+        score: 成绩文本
+        score_unit: 成绩单位（成绩文本中没有单位时使用）
+
+    返回:
+        tuple: (数值, 方向)；无法解析时数值为 None，无法判断方向时方向为 None
+    """
+    text = re.sub(r'\s+', '', str(score or '')).replace('：', ':')
+    if not text:
+        return None, None
+
+    if CLOCK_PATTERN.match(text):
+        return _parse_clock(text), 'asc'
+
+    seconds = _parse_chinese_time(text)
+    if seconds is not None:
+        return seconds, 'asc'
+
+    match = NUMBER_PATTERN.match(text)
+    if not match:
+        return None, None
+    value = float(match.group(1))
+    unit = (match.group(2) or str(score_unit or '').strip()).lower()
+    if unit not in SCORE_UNITS:
+        return value, None
+    factor, direction = SCORE_UNITS[unit]
+    # 去掉换算产生的浮点误差，如 560cm -> 5.6000000000000005
+    return round(value * factor, 6), direction
+
+
+def get_round_direction(queryset):
+    """
+    赛事轮次的排序方向
+
+    同一轮次的成绩方向应当一致，个别成绩无法判断时取多数成绩的方向
+    """
+    return queryset.order_by().values('score_direction').annotate(total=Count('id'))\
+        .order_by('-total').values_list('score_direction', flat=True).first()
+
+
+def score_ordering(direction):
+    """按方向把成绩从好到差排序的 order_by 参数"""
+    return 'score_value' if direction == 'asc' else '-score_value'
+
+
+def directed_score():
+    """
+    成绩排序表达式：越好的成绩值越小
+
+    用于跨赛事（方向可能不同）的排序，如导出成绩表
+    """
+    return Case(
+        When(score_direction='asc', then=F('score_value')),
+        default=F('score_value') * -1,
+        output_field=FloatField()
+    )
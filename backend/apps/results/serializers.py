@@ -4,10 +4,11 @@
 提供成绩数据的序列化和反序列化功能，支持成绩录入、查询等业务逻辑
 """
 from rest_framework import serializers
-from .models import Result
+from .models import Result, ResultImportJob
+from utils.fieldsets import SparseFieldsetSerializerMixin
 
 
-class ResultSerializer(serializers.ModelSerializer):
+class ResultSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """
     成绩序列化器
     
@@ -25,6 +26,7 @@ class ResultSerializer(serializers.ModelSerializer):
         - user_username: 参赛运动员的用户名
         - recorded_by_name: 录入人的真实姓名
         - registration_number: 报名编号
+        - score_value: 由成绩解析出的数值，用于排序
         
     使用场景:
         - 成绩列表展示
@@ -42,12 +44,13 @@ class ResultSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'event', 'event_title', 'registration', 'registration_number',
             'user', 'user_name', 'user_username', 'round_type', 'score',
+            'score_value', 'score_direction',
             'rank', 'award', 'score_unit', 'remarks', 'certificate_url',
             'is_published', 'recorded_by', 'recorded_by_name',
             'created_at', 'updated_at'
         ]
         read_only_fields = [
-            'id', 'recorded_by', 'created_at', 'updated_at',
+            'id', 'recorded_by', 'created_at', 'updated_at', 'score_value',
             'event_title', 'user_name', 'user_username', 'recorded_by_name',
             'registration_number'
         ]
@@ -123,6 +126,7 @@ class ResultCreateSerializer(serializers.ModelSerializer):
         - registration: 报名记录
         - round_type: 比赛轮次
         - score: 成绩值
+        - score_direction: 成绩方向（可选，成绩或单位无法判断时使用，如纯数字的计时成绩填 asc）
         - rank: 排名
         - award: 奖项
         - score_unit: 成绩单位
@@ -138,7 +142,7 @@ class ResultCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Result
         fields = [
-            'event', 'registration', 'round_type', 'score', 'rank',
+            'event', 'registration', 'round_type', 'score', 'score_direction', 'rank',
             'award', 'score_unit', 'remarks', 'certificate_url', 'is_published'
         ]
 
@@ -189,7 +193,7 @@ class ResultCreateSerializer(serializers.ModelSerializer):
         return super().create(validated_data)
 
 
-class ResultListSerializer(serializers.ModelSerializer):
+class ResultListSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
     """
     成绩列表序列化器（简化版）
     
@@ -216,3 +220,38 @@ class ResultListSerializer(serializers.ModelSerializer):
             'is_published', 'created_at'
         ]
 
+
+
+class ResultImportJobSerializer(serializers.ModelSerializer):
+    """
+    成绩导入任务序列化器
+
+    扩展字段说明:
+        - status_display: 状态的中文名称
+        - progress: 已处理行数的百分比（总行数未知时为 0）
+        - error_count: 错误行数量
+    """
+    status_display = serializers.CharField(source='get_status_display', read_only=True)
+    progress = serializers.SerializerMethodField()
+    error_count = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ResultImportJob
+        fields = [
+            'id', 'file_type', 'context_event', 'status', 'status_display', 'chunk_size',
+            'total_rows', 'processed_rows', 'committed_chunks', 'imported', 'progress',
+            'error_count', 'errors', 'message', 'created_at', 'updated_at', 'finished_at'
+        ]
+        read_only_fields = fields
+
+    def get_progress(self, obj):
+        """计算进度百分比"""
+        if obj.status == 'succeeded':
+            return 100
+        if not obj.total_rows:
+            return 0
+        return min(100, int(obj.processed_rows * 100 / obj.total_rows))
+
+    def get_error_count(self, obj):
+        """错误行数量"""
+        return len(obj.errors or [])
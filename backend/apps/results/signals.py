@@ -0,0 +1,25 @@
+"""
+成绩信号处理模块
+
+成绩或报名记录发生变化时，使对应赛事的排行榜缓存失效
+
+成绩删除不使用 post_delete 信号：注册接收者会让批量删除逐条加载记录，
+删除成绩的视图直接调用 invalidate_leaderboards
+"""
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .leaderboard import invalidate_leaderboards
+from .models import Result
+
+
+@receiver(post_save, sender=Result)
+def handle_result_change(sender, instance, **kwargs):
+    """成绩创建、修改、公开或取消公开后，使排行榜失效"""
+    invalidate_leaderboards(instance.event_id)
+
+
+@receiver(post_delete, sender='registrations.Registration')
+def handle_registration_delete(sender, instance, **kwargs):
+    """删除报名会级联删除成绩，使排行榜失效"""
+    invalidate_leaderboards(instance.event_id)
@@ -1,3 +1,536 @@
-from django.test import TestCase
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+from io import BytesIO, StringIO
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from openpyxl import Workbook
+from rest_framework.test import APIClient
+
+from apps.events.models import Event, RefereeEventAccess
+from apps.registrations.models import Registration
+from . import live
+from .models import Result, ResultImportJob
+from .leaderboard import leaderboard_key
+from .live import (
+    diff_leaderboards, get_live_leaderboard, leaderboard_group, push_leaderboard_changes, push_lock_key,
+)
+from .ranking import compute_ranks
+from .scoring import parse_score
+
+
+User = get_user_model()
+
+
+class ResultTestMixin:
+    """创建赛事、运动员和已通过报名的公共方法"""
+
+    def create_event(self, title='马拉松'):
+        now = timezone.now()
+        return Event.objects.create(
+            title=title,
+            description='描述',
+            location='成都',
+            event_type='athletics',
+            start_time=now - timedelta(days=1),
+            end_time=now + timedelta(days=1),
+            registration_start=now - timedelta(days=5),
+            registration_end=now - timedelta(days=2),
+            status='ongoing',
+            organizer=self.admin,
+            contact_person='吴九',
+            contact_phone='13900000006'
+        )
+
+    def create_athlete(self, event, index, participant_name=None, real_name=None):
+        user = User.objects.create_user(
+            username=f'runner{index}',
+            password='password123',
+            real_name=real_name or f'跑者{index}',
+            phone=f'1380001{index:04d}'
+        )
+        return Registration.objects.create(
+            event=event,
+            user=user,
+            participant_name=participant_name or user.real_name,
+            participant_phone=user.phone,
+            participant_id_card=f'11010119900101{index:04d}',
+            participant_gender='M',
+            participant_birth_date='1990-01-01',
+            emergency_contact='家属',
+            emergency_phone='13800009999',
+            registration_number=f'REG-RESULT-{index}',
+            status='approved'
+        )
+
+
+def build_sheet(rows, headers=('赛事名称', '参赛者', '轮次', '成绩', '排名')):
+    workbook = Workbook()
+    sheet = workbook.active
+    sheet.append(list(headers))
+    for row in rows:
+        sheet.append(list(row))
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return SimpleUploadedFile(
+        'results.xlsx', buffer.getvalue(),
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+
+
+def build_csv(rows, headers=('赛事名称', '参赛者', '轮次', '成绩', '排名')):
+    lines = [','.join(headers)] + [','.join(str(cell) for cell in row) for row in rows]
+    return SimpleUploadedFile('results.csv', ('\n'.join(lines) + '\n').encode('utf-8-sig'), content_type='text/csv')
+
+
+class ResultImportTests(ResultTestMixin, TestCase):
+    """按报名索引校验并批量写入导入的成绩"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='result-admin',
+            password='password123',
+            real_name='管理员',
+            phone='13800000300',
+            is_superuser=True
+        )
+        self.event = self.create_event()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('result-import-results')
+
+    def upload(self, rows):
+        return self.client.post(self.url, {'file': build_sheet(rows)}, format='multipart')
+
+    def test_row_errors_are_reported(self):
+        self.create_athlete(self.event, 1, participant_name='张三')
+        self.create_athlete(self.event, 2, participant_name='李四')
+        self.create_athlete(self.event, 3, participant_name='李四')
+        self.create_athlete(self.event, 4, real_name='王五')
+
+        response = self.upload([
+            ('马拉松', '张三', '决赛', '2:10:01', 1),
+            ('马拉松', 'x(RUNNER4)', '决赛', '2:11:30', 2),
+            ('马拉松', '李四', '决赛', '2:12:00', 3),
+            ('马拉松', '张三', '决赛', '2:10:01', 1),
+            ('不存在的赛事', '张三', '决赛', '2:10:01', 1),
+            ('马拉松', '王五', '复赛', '2:10:01', 1),
+            ('马拉松', '王五', '预赛', '2:10:01', '第一'),
+            ('马拉松', '赵六', '预赛', '2:10:01', 1),
+            ('马拉松', '王五', '预赛', 'x' * 101, 1),
+        ])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['imported'], 2)
+        self.assertEqual(response.data['errors'], [
+            {'row': 4, 'detail': '参赛者"李四"匹配到多条报名记录，请确保唯一'},
+            {'row': 5, 'detail': '该参赛者在当前轮次已有成绩'},
+            {'row': 6, 'detail': '找不到赛事: 不存在的赛事'},
+            {'row': 7, 'detail': '轮次无法识别'},
+            {'row': 8, 'detail': '排名需要为数字'},
+            {'row': 9, 'detail': '找不到与参赛者匹配的报名记录，请确认姓名或用户名'},
+            {'row': 10, 'detail': 'score: 请确保这个字段不能超过 100 个字符。'},
+        ])
+        result = Result.objects.get(user__username='runner4')
+        self.assertEqual((result.round_type, result.rank, result.recorded_by), ('final', 2, self.admin))
+
+    def test_query_count_does_not_grow_with_rows(self):
+        for index in range(40):
+            self.create_athlete(self.event, index)
+
+        def import_queries(indexes, round_name):
+            rows = [('马拉松', f'跑者{index}', round_name, f'2:{index:02d}:00', index + 1) for index in indexes]
+            with CaptureQueriesContext(connection) as context:
+                response = self.upload(rows)
+            self.assertEqual(response.data['imported'], len(rows))
+            return len(context.captured_queries)
+
+        self.assertEqual(import_queries(range(5), '预赛'), import_queries(range(40), '决赛'))
+        self.assertEqual(Result.objects.count(), 45)
+
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, BACKGROUND_TASKS_EAGER=True, IMPORT_JOBS_IN_PROCESS=True)
+class ResultImportJobTests(ResultTestMixin, TestCase):
+    """CSV 导入与分块、可继续的后台导入任务"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='import-admin',
+            password='password123',
+            real_name='管理员',
+            phone='13800000301',
+            is_superuser=True
+        )
+        self.event = self.create_event()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = reverse('result-import-results')
+
+    def build_rows(self, count):
+        for index in range(count):
+            self.create_athlete(self.event, index)
+        return [('马拉松', f'跑者{index}', '决赛', f'2:{index % 60:02d}:00', index + 1) for index in range(count)]
+
+    def test_csv_import(self):
+        rows = self.build_rows(3) + [('马拉松', '赵六', '决赛', '2:30:00', 4)]
+        response = self.client.post(self.url, {'file': build_csv(rows)}, format='multipart')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['imported'], 3)
+        self.assertEqual(response.data['errors'][0]['row'], 5)
+
+        response = self.client.post(
+            self.url, {'file': SimpleUploadedFile('results.txt', b'x')}, format='multipart'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_async_import_commits_chunks(self):
+        rows = self.build_rows(120)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'{self.url}?async=1', {'file': build_csv(rows), 'chunk_size': 50}, format='multipart'
+            )
+        self.assertEqual(response.status_code, 202)
+
+        response = self.client.get(reverse('result-import-job-detail', args=[response.data['job']['id']]))
+        self.assertEqual(response.data['status'], 'succeeded')
+        self.assertEqual(response.data['total_rows'], 120)
+        self.assertEqual(response.data['processed_rows'], 120)
+        self.assertEqual(response.data['committed_chunks'], 3)
+        self.assertEqual(response.data['imported'], 120)
+        self.assertEqual(response.data['progress'], 100)
+        self.assertEqual(Result.objects.count(), 120)
+
+    def test_resume_continues_from_last_chunk(self):
+        rows = self.build_rows(120)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'{self.url}?async=1', {'file': build_sheet(rows), 'chunk_size': 50}, format='multipart'
+            )
+        job = ResultImportJob.objects.get(pk=response.data['job']['id'])
+
+        # 模拟第二块提交前进程中断：只保留第一块的成绩和进度
+        Result.objects.filter(user__username__in=[f'runner{index}' for index in range(50, 120)]).delete()
+        ResultImportJob.objects.filter(pk=job.pk).update(
+            status='failed', processed_rows=50, committed_chunks=1, imported=50, message='中断'
+        )
+
+        resume_url = reverse('result-import-job-resume', args=[job.pk])
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(resume_url)
+        self.assertEqual(response.status_code, 202)
+
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.processed_rows, job.committed_chunks), ('succeeded', 120, 3))
+        self.assertEqual(job.imported, 120)
+        self.assertEqual(job.errors, [])
+        self.assertEqual(Result.objects.count(), 120)
+
+        self.assertEqual(self.client.post(resume_url).status_code, 400)
+
+
+class ResultRankingTests(ResultTestMixin, TestCase):
+    """成绩数值化、排名、排行榜与待录入统计"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username='score-admin',
+            password='password123',
+            real_name='管理员',
+            phone='13800000302',
+            is_superuser=True
+        )
+        self.event = self.create_event()
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        cache.clear()
+
+    def create_result(self, index, score, score_unit=None, rank=None):
+        registration = self.create_athlete(self.event, index)
+        return Result.objects.create(
+            event=self.event,
+            registration=registration,
+            user=registration.user,
+            score=score,
+            score_unit=score_unit,
+            rank=rank,
+            is_published=True
+        )
+
+    def test_parse_score(self):
+        self.assertEqual(parse_score('2:03:11'), (7391.0, 'asc'))
+        self.assertEqual(parse_score('1:02.5'), (62.5, 'asc'))
+        self.assertEqual(parse_score('2分05.5秒'), (125.5, 'asc'))
+        self.assertEqual(parse_score('10.23', '秒'), (10.23, 'asc'))
+        self.assertEqual(parse_score('85分'), (85.0, 'desc'))
+        self.assertEqual(parse_score('560cm'), (5.6, 'desc'))
+        self.assertEqual(parse_score('5.6米'), (5.6, 'desc'))
+        self.assertEqual(parse_score('12'), (12.0, None))
+        self.assertEqual(parse_score('DNF'), (None, None))
+
+    def test_leaderboard_orders_by_score_value(self):
+        self.create_result(1, '2:10:05')
+        self.create_result(2, 'DNF', rank=4)
+        self.create_result(3, '2:09:59')
+        self.create_result(4, '10:01:00')
+
+        response = self.client.get(reverse('result-leaderboard'), {'event': self.event.id})
+        self.assertEqual(
+            [row['score'] for row in response.data],
+            ['2:09:59', '2:10:05', '10:01:00', 'DNF']
+        )
+
+        response = self.client.get(reverse('result-list'), {'ordering': '-score'})
+        self.assertEqual(response.data['results'][0]['score'], '10:01:00')
+
+    def test_leaderboard_cache_invalidation(self):
+        first = self.create_result(1, '2:10:05')
+        second = self.create_result(2, '2:09:59')
+        url = reverse('result-leaderboard')
+
+        response = self.client.get(url, {'event': self.event.id})
+        self.assertEqual([row['id'] for row in response.data], [second.id, first.id])
+        # 命中缓存时不访问数据库
+        with self.assertNumQueries(0):
+            self.client.get(url, {'event': self.event.id})
+
+        # 取消公开
+        self.client.put(reverse('result-unpublish', args=[second.id]))
+        response = self.client.get(url, {'event': self.event.id})
+        self.assertEqual([row['id'] for row in response.data], [first.id])
+
+        # 批量公开
+        self.client.post(reverse('result-bulk-publish'), {'ids': [second.id]}, format='json')
+        response = self.client.get(url, {'event': self.event.id})
+        self.assertEqual([row['id'] for row in response.data], [second.id, first.id])
+
+        # 删除
+        self.client.delete(reverse('result-detail', args=[second.id]))
+        response = self.client.get(url, {'event': self.event.id})
+        self.assertEqual([row['id'] for row in response.data], [first.id])
+
+    def test_diff_leaderboards(self):
+        old = [{'id': 1, 'score': '9'}, {'id': 2, 'score': '10'}, {'id': 3, 'score': '11'}]
+        new = [{'id': 2, 'score': '10'}, {'id': 4, 'score': '10.5'}, {'id': 1, 'score': '11.2'}]
+        self.assertEqual(diff_leaderboards(old, new), {
+            'inserted': [{'position': 2, 'row': {'id': 4, 'score': '10.5'}}],
+            'moved': [{'id': 2, 'from': 2, 'to': 1}, {'id': 1, 'from': 1, 'to': 3}],
+            'removed': [3],
+            'updated': [{'position': 3, 'row': {'id': 1, 'score': '11.2'}}],
+        })
+        self.assertIsNone(diff_leaderboards(new, new))
+
+    @override_settings(BACKGROUND_TASKS_EAGER=True)
+    def test_live_leaderboard_pushes_changes(self):
+        first = self.create_result(1, '2:10:05')
+        second = self.create_result(2, '2:09:59')
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(leaderboard_group(self.event.id, 'final'), channel)
+        snapshot = get_live_leaderboard(self.event.id, 'final')
+        self.assertEqual(snapshot['version'], 0)
+        self.assertEqual([row['id'] for row in snapshot['rows']], [second.id, first.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.put(reverse('result-unpublish', args=[second.id]))
+        message = async_to_sync(channel_layer.receive)(channel)
+        self.assertEqual(message['type'], 'leaderboard.update')
+        self.assertEqual(message['payload']['version'], 1)
+        self.assertEqual(message['payload']['removed'], [second.id])
+        self.assertEqual(message['payload']['moved'], [{'id': first.id, 'from': 2, 'to': 1}])
+        self.assertEqual(message['payload']['inserted'], [])
+
+        # 新订阅者的快照与已推送的增量版本一致
+        self.assertEqual(get_live_leaderboard(self.event.id, 'final')['version'], 1)
+
+    def test_live_pushes_are_serialized_per_round(self):
+        first = self.create_result(1, '2:10:05')
+        second = self.create_result(2, '2:09:59')
+        channel_layer = get_channel_layer()
+        channel = async_to_sync(channel_layer.new_channel)()
+        async_to_sync(channel_layer.group_add)(leaderboard_group(self.event.id, 'final'), channel)
+        get_live_leaderboard(self.event.id, 'final')
+
+        # 其他线程正在推送时，本次调用只留下待推送标记
+        lock_key = push_lock_key(self.event.id, 'final')
+        cache.add(lock_key, 1)
+        Result.objects.filter(pk=second.pk).update(is_published=False)
+        cache.delete(leaderboard_key(self.event.id, 'final'))
+        self.assertEqual(push_leaderboard_changes([self.event.id]), 0)
+
+        # 持有者推送期间又有成绩变化：并发调用立即返回，由持有者再推送一次
+        cache.delete(lock_key)
+        get_leaderboard = live.get_leaderboard
+
+        def change_during_push(event_id, round_type):
+            rows = get_leaderboard(event_id, round_type)
+            if Result.objects.filter(pk=first.pk, score='2:10:05').exists():
+                Result.objects.filter(pk=first.pk).update(score='2:08:00')
+                cache.delete(leaderboard_key(self.event.id, 'final'))
+                self.assertEqual(push_leaderboard_changes([self.event.id]), 0)
+            return rows
+
+        with mock.patch.object(live, 'get_leaderboard', side_effect=change_during_push):
+            self.assertEqual(push_leaderboard_changes([self.event.id]), 2)
+
+        messages = [async_to_sync(channel_layer.receive)(channel) for _ in range(2)]
+        self.assertEqual([message['payload']['version'] for message in messages], [1, 2])
+        self.assertEqual(messages[0]['payload']['removed'], [second.id])
+        self.assertEqual(messages[1]['payload']['updated'][0]['row']['score'], '2:08:00')
+        self.assertIsNone(cache.get(lock_key))
+
+    def test_pending_results_count(self):
+        self.create_result(1, '2:10:05')
+        preliminary = self.create_result(2, '2:11:00')
+        Result.objects.filter(pk=preliminary.pk).update(round_type='preliminary')
+        self.create_athlete(self.event, 3)
+        other_event = self.create_event('铁人三项')
+        self.create_athlete(other_event, 4)
+
+        url = reverse('result-pending-results-count')
+        response = self.client.get(url, {'breakdown': 1})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['events'][0], {
+            'event': self.event.id,
+            'event_title': '马拉松',
+            'pending': 1,
+            'rounds': {'preliminary': 2, 'semifinal': 3, 'final': 2},
+        })
+
+        referee = User.objects.create_user(
+            username='pending-referee',
+            password='password123',
+            real_name='裁判',
+            phone='13800000303',
+            user_type='referee'
+        )
+        RefereeEventAccess.objects.create(referee=referee, event=other_event)
+        self.client.force_authenticate(referee)
+        response = self.client.get(url, {'breakdown': 1})
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual([row['event'] for row in response.data['events']], [other_event.id])
+
+        # 短时间内的重复请求读取缓存，裁判的可访问赛事同样已缓存
+        self.create_athlete(other_event, 5)
+        with self.assertNumQueries(0):
+            response = self.client.get(url, {'breakdown': 1})
+        self.assertEqual(response.data['count'], 1)
+
+    def test_backfill_command(self):
+        result = self.create_result(1, '5.6米')
+        Result.objects.filter(pk=result.pk).update(score_value=None, score_direction='')
+
+        call_command('backfill_score_values', stdout=StringIO())
+        result.refresh_from_db()
+        self.assertEqual((result.score_value, result.score_direction), (5.6, 'desc'))
+
+    def test_compute_ranks(self):
+        values = [12.0, 10.5, 12.0, 9.8, 12.0]
+        self.assertEqual(compute_ranks(values, 'asc', 'competition'), [3, 2, 3, 1, 3])
+        self.assertEqual(compute_ranks(values, 'asc', 'dense'), [3, 2, 3, 1, 3])
+        self.assertEqual(compute_ranks(values, 'asc', 'ordinal'), [3, 2, 4, 1, 5])
+        self.assertEqual(compute_ranks(values, 'desc', 'competition'), [1, 4, 1, 5, 1])
+        self.assertEqual(compute_ranks(values, 'desc', 'dense'), [1, 2, 1, 3, 1])
+
+    def test_rerank_round(self):
+        first = self.create_result(1, '2:10:05', rank=1)
+        second = self.create_result(2, '2:09:59', rank=2)
+        tied = self.create_result(3, '2:10:05')
+        dnf = self.create_result(4, 'DNF', rank=3)
+
+        url = reverse('result-rerank')
+        response = self.client.post(f"{url}?event={self.event.id}&round_type=final&method=competition")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['ranked'], response.data['unranked'], response.data['updated']), (3, 1, 4))
+        ranks = dict(Result.objects.values_list('id', 'rank'))
+        self.assertEqual(
+            [ranks[first.id], ranks[second.id], ranks[tied.id], ranks[dnf.id]],
+            [2, 1, 2, None]
+        )
+
+        response = self.client.post(f"{url}?event={self.event.id}&method=dense")
+        self.assertEqual(response.data['updated'], 0)
+
+        response = self.client.post(f"{url}?event={self.event.id}&method=random")
+        self.assertEqual(response.status_code, 400)
+
+
+class ResultRefereeAccessTests(ResultTestMixin, TestCase):
+    """裁判只能访问被分配赛事的成绩，可访问赛事按裁判缓存"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            username='access-admin',
+            password='password123',
+            real_name='管理员',
+            phone='13800000310',
+            is_superuser=True
+        )
+        self.referee = User.objects.create_user(
+            username='access-referee',
+            password='password123',
+            real_name='裁判',
+            phone='13800000311',
+            user_type='referee'
+        )
+        self.event = self.create_event()
+        self.other_event = self.create_event('铁人三项')
+        self.results = {}
+        for index, event in enumerate((self.event, self.other_event)):
+            registration = self.create_athlete(event, index)
+            self.results[event.id] = Result.objects.create(
+                event=event,
+                registration=registration,
+                user=registration.user,
+                score='2:10:05',
+                is_published=True
+            )
+        self.client = APIClient()
+
+    def assign(self, *events):
+        self.client.force_authenticate(self.admin)
+        response = self.client.post(reverse('refereeaccess-assign'), {
+            'referee': self.referee.id,
+            'event_ids': [event.id for event in events]
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.client.force_authenticate(self.referee)
+
+    def listed_events(self):
+        response = self.client.get(reverse('result-list'))
+        return {row['event'] for row in response.data['results']}
+
+    def test_assigned_events_are_cached_and_invalidated(self):
+        self.assign(self.event)
+        self.assertEqual(self.listed_events(), {self.event.id})
+
+        # 第二次请求直接读取缓存
+        with CaptureQueriesContext(connection) as context:
+            self.assertEqual(self.listed_events(), {self.event.id})
+        self.assertFalse(any('referee_event_access' in query['sql'] for query in context.captured_queries))
+
+        # 重新分配后缓存立即失效
+        self.assign(self.event, self.other_event)
+        self.assertEqual(self.listed_events(), {self.event.id, self.other_event.id})
+
+        # 通过模型删除分配同样使缓存失效
+        RefereeEventAccess.objects.filter(referee=self.referee, event=self.event).delete()
+        self.assertEqual(self.listed_events(), {self.other_event.id})
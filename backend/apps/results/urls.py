@@ -3,9 +3,11 @@
 """
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import ResultViewSet
+from .views import ResultViewSet, ResultImportJobViewSet
 
 router = DefaultRouter()
+# 导入任务路由需在空前缀之前注册，否则会被当作成绩ID匹配
+router.register(r'import-jobs', ResultImportJobViewSet, basename='result-import-job')
 router.register(r'', ResultViewSet, basename='result')
 
 urlpatterns = [
@@ -3,158 +3,38 @@
 
 提供成绩管理的完整REST API接口，包括成绩录入、查询、导出、批量导入等功能
 """
-import re
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework.filters import SearchFilter, OrderingFilter
-from django.db.models import Case, When, IntegerField
+from rest_framework.filters import SearchFilter
 from rest_framework.exceptions import PermissionDenied
-from openpyxl import load_workbook
+from django.conf import settings
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q
+from django.utils import timezone
 
-from .models import Result
-from .serializers import ResultSerializer, ResultCreateSerializer, ResultListSerializer
+from .models import Result, ResultImportJob
+from .filters import ResultOrderingFilter
+from .serializers import ResultSerializer, ResultCreateSerializer, ResultListSerializer, ResultImportJobSerializer
 from utils.permissions import IsAdmin, IsAdminOrReferee
-from utils.export import export_results
-from apps.events.models import RefereeEventAccess, Event
+from utils.export import EXPORT_FILE_TYPES, export_results
+from utils.pagination import CursorOrPageNumberPagination
+from utils.fieldsets import SparseFieldsetViewSetMixin
+from utils.bulk import TRUE_VALUES, BulkActionViewSetMixin
+from apps.exports.views import is_async_export, start_export_job
+from .exports import build_export_queryset
+from .leaderboard import get_leaderboard, invalidate_leaderboards
+from .ranking import RANK_METHODS, rerank_round
+from .importer import ImportFileError, ResultImporter, get_import_file_type, open_result_sheet
+from .import_jobs import create_import_job, is_resumable, resume_import_job
+from apps.events.referee_access import get_referee_event_ids
 from apps.registrations.models import Registration
 
 
-HEADER_ALIASES = {
-    'event': {alias.lower() for alias in {
-        '赛事名称', '赛事', '比赛名称', 'event name', 'event', 'match name'
-    }},
-    'participant': {alias.lower() for alias in {
-        '参赛者', '选手', '运动员', 'participant', 'athlete', '选手姓名', 'name'
-    }},
-    'round': {alias.lower() for alias in {
-        '轮次', 'round', 'round type', '阶段', '赛次'
-    }},
-    'score': {alias.lower() for alias in {
-        '成绩', 'score', 'result'
-    }},
-    'rank': {alias.lower() for alias in {
-        '排名', 'rank', 'position'
-    }}
-}
-
-ROUND_TYPE_KEYWORDS = [
-    ('semifinal', ['半决赛', 'semifinal']),
-    ('final', ['决赛', 'final']),
-    ('preliminary', ['预赛', '初赛', 'preliminary'])
-]
-
-
-def build_column_mapping(header_row):
-    """
-    构建Excel列映射关系
-    
-    将Excel表头与系统字段建立映射关系，支持多种表头名称
-    
-    参数:
-        header_row: Excel第一行的表头数据
-        
-    返回:
-        mapping: 字段名到列索引的映射字典
-        missing: 缺失的必填字段列表
-    """
-    mapping = {}
-    for idx, header in enumerate(header_row or []):
-        normalized = (header or '').strip().lower()
-        for field, aliases in HEADER_ALIASES.items():
-            if normalized in aliases:
-                mapping[field] = idx
-                break
-    missing = [field for field in HEADER_ALIASES if field not in mapping]
-    return mapping, missing
-
-
-def safe_str(value):
-    """安全地将值转换为字符串，处理None和空值"""
-    if value is None:
-        return ''
-    return str(value).strip()
-
-
-def normalize_round_type(value):
-    """
-    规范化轮次类型
-    
-    将Excel中的轮次描述转换为系统标准格式
-    支持中英文关键词匹配
-    """
-    if value is None:
-        return None
-    text = str(value).strip().lower()
-    for target, keywords in ROUND_TYPE_KEYWORDS:
-        for keyword in keywords:
-            if keyword in text:
-                return target
-    return None
-
-
-def build_candidate_names(raw_value):
-    """
-    构建参赛者姓名候选列表
-    
-    从Excel单元格提取可能的姓名，包括括号中的别名
-    例如: "张三(zhangsan)" -> ["张三(zhangsan)", "zhangsan"]
-    """
-    if raw_value in (None, ''):
-        return []
-    text = str(raw_value).strip()
-    if not text:
-        return []
-    names = [text]
-    for match in re.findall(r"\(([^)]+)\)", text):
-        candidate = match.strip()
-        if candidate and candidate not in names:
-            names.append(candidate)
-    return names
-
-
-def _match_registration(queryset, field, candidate):
-    if not candidate:
-        return None, None
-    matches = queryset.filter(**{f"{field}__iexact": candidate})
-    count = matches.count()
-    if count == 1:
-        return matches.first(), None
-    if count > 1:
-        return None, f'参赛者"{candidate}"匹配到多条报名记录，请确保唯一'
-    return None, None
-
-
-def find_registration_for_participant(event, candidates):
-    """
-    根据候选姓名查找报名记录
-    
-    在赛事的已审核报名中查找匹配的报名记录
-    支持按参赛者姓名、真实姓名、用户名等多种方式匹配
-    
-    参数:
-        event: 赛事对象
-        candidates: 候选姓名列表
-        
-    返回:
-        registration: 匹配的报名记录，未找到返回None
-        error: 错误信息，无错误返回None
-    """
-    approved = Registration.objects.filter(event=event, status='approved').select_related('user')
-    for candidate in candidates:
-        for field in ['participant_name', 'user__real_name', 'user__username']:
-            registration, error = _match_registration(approved, field, candidate)
-            if error:
-                return None, error
-            if registration:
-                return registration, None
-    return None, '找不到与参赛者匹配的报名记录，请确认姓名或用户名'
-
-
-class ResultViewSet(viewsets.ModelViewSet):
+class ResultViewSet(SparseFieldsetViewSetMixin, BulkActionViewSetMixin, viewsets.ModelViewSet):
     """
     成绩视图集
     
@@ -182,14 +62,15 @@ class ResultViewSet(viewsets.ModelViewSet):
     """
     queryset = Result.objects.select_related('event', 'user', 'registration', 'recorded_by').all()
     serializer_class = ResultSerializer
-    filter_backends = [DjangoFilterBackend, SearchFilter, OrderingFilter]
+    filter_backends = [DjangoFilterBackend, SearchFilter, ResultOrderingFilter]
     filterset_fields = ['event', 'user', 'round_type', 'is_published']
     search_fields = [
         'user__username', 'user__real_name', 'event__title',
         'score', 'award'
     ]
-    ordering_fields = ['created_at', 'rank', 'score']
+    ordering_fields = ['created_at', 'rank', 'score', 'score_value']  # score 按解析后的数值排序
     ordering = ['event', 'rank']
+    pagination_class = CursorOrPageNumberPagination  # 支持 ?cursor= 键集分页
 
     def get_permissions(self):
         """
@@ -204,7 +85,7 @@ class ResultViewSet(viewsets.ModelViewSet):
         if self.action in ['list', 'retrieve']:
             # 列表和详情允许任何人访问（但只能看到已公开的）
             permission_classes = [AllowAny]
-        elif self.action in ['create', 'update', 'partial_update', 'destroy', 'publish', 'export', 'pending_results_count', 'import_results', 'bulk_publish', 'bulk_delete']:
+        elif self.action in ['create', 'update', 'partial_update', 'destroy', 'publish', 'export', 'pending_results_count', 'import_results', 'bulk_publish', 'bulk_delete', 'rerank']:
             # 创建、更新、删除、公开、导出需要管理员或裁判权限
             permission_classes = [IsAdminOrReferee]
         else:
@@ -224,11 +105,10 @@ class ResultViewSet(viewsets.ModelViewSet):
         """
         获取裁判被分配的赛事ID列表
         
-        如果用户不是裁判，返回None（不受限制）
+        如果用户不是裁判，返回None（不受限制）；
+        同一请求内只查询一次，跨请求按裁判缓存，分配关系变化时失效
         """
-        if not (user and user.is_authenticated and user.user_type == 'referee'):
-            return None
-        return list(RefereeEventAccess.objects.filter(referee=user).values_list('event_id', flat=True))
+        return get_referee_event_ids(user, self.request)
 
     def apply_referee_filter(self, queryset, user):
         """
@@ -278,6 +158,12 @@ class ResultViewSet(viewsets.ModelViewSet):
             'result': ResultSerializer(result).data
         }, status=status.HTTP_201_CREATED)
 
+    def perform_destroy(self, instance):
+        """删除成绩后使排行榜失效（成绩未注册 post_delete 信号）"""
+        event_id = instance.event_id
+        instance.delete()
+        invalidate_leaderboards(event_id)
+
     @action(detail=True, methods=['put'])
     def publish(self, request, pk=None):
         """
@@ -312,31 +198,23 @@ class ResultViewSet(viewsets.ModelViewSet):
     def export(self, request):
         """
         导出成绩表
-        GET /api/results/export/?event={event_id}
-        """
-        # 获取查询参数
-        event_id = request.query_params.get('event')
-        round_type = request.query_params.get('round_type')
+        GET /api/results/export/?event={event_id}&file_type=csv
 
-        queryset = Result.objects.select_related('event', 'user', 'registration').all()
-        queryset = self.apply_referee_filter(queryset, request.user)
+        file_type 可选 xlsx（默认）或 csv，文件以流式响应返回；
+        带上 async=1 时改为提交后台导出任务，返回 202 和任务信息，通过 /api/exports/{id}/ 查询进度
+        """
+        file_type = request.query_params.get('file_type') or 'xlsx'
+        if file_type not in EXPORT_FILE_TYPES:
+            return Response({'error': '导出格式仅支持 xlsx 或 csv'}, status=status.HTTP_400_BAD_REQUEST)
 
-        if event_id:
-            queryset = queryset.filter(event_id=event_id)
-        if round_type:
-            queryset = queryset.filter(round_type=round_type)
+        if is_async_export(request):
+            return start_export_job(request, 'results', request.query_params, file_type)
 
-        round_order = Case(
-            When(round_type='final', then=1),
-            When(round_type='semifinal', then=2),
-            When(round_type='preliminary', then=3),
-            default=4,
-            output_field=IntegerField()
-        )
-        queryset = queryset.order_by(round_order, 'rank', 'score')
+        # 裁判只能导出被分配赛事的成绩，按轮次（决赛在前）、排名、数值成绩排序
+        queryset = build_export_queryset(request.user, request.query_params)
 
         # 使用导出工具导出
-        return export_results(queryset)
+        return export_results(queryset, file_type=file_type)
 
     @action(detail=False, methods=['get'])
     def leaderboard(self, request):
@@ -346,8 +224,9 @@ class ResultViewSet(viewsets.ModelViewSet):
         GET /api/results/leaderboard/?event={event_id}&round_type={round_type}
         
         功能说明:
-            - 获取指定赛事和轮次的前10名成绩
-            - 按排名升序排列
+            - 获取指定赛事和轮次的前10名成绩（缓存，成绩变化时失效）
+            - 按数值成绩排序（计时类越小越好，距离/分数类越大越好），成绩相同按排名
+            - 无法解析的成绩（如 DNF）排在有效成绩之后
             - 只返回已公开的成绩
             
         参数:
@@ -360,19 +239,57 @@ class ResultViewSet(viewsets.ModelViewSet):
         event_id = request.query_params.get('event')
         round_type = request.query_params.get('round_type', 'final')
 
-        if not event_id:
+        if not event_id or not str(event_id).isdigit():
             return Response({
                 'error': '请提供赛事ID'
             }, status=status.HTTP_400_BAD_REQUEST)
+        if round_type not in dict(Result.STATUS_CHOICES):
+            return Response([])
+        # 裁判只能查看被分配赛事的排行榜
+        referee_ids = self.get_referee_event_ids(request.user)
+        if referee_ids is not None and int(event_id) not in referee_ids:
+            return Response([])
 
-        results = self.apply_referee_filter(self.queryset, request.user).filter(
-            event_id=event_id,
-            round_type=round_type,
-            is_published=True
-        ).order_by('rank')[:10]  # 只返回前10名
+        # 排行榜缓存在成绩变化时失效，命中时不访问数据库
+        return Response(get_leaderboard(int(event_id), round_type))
 
-        serializer = ResultListSerializer(results, many=True)
-        return Response(serializer.data)
+    @action(detail=False, methods=['post'])
+    def rerank(self, request):
+        """
+        按成绩自动排名
+        
+        POST /api/results/rerank/?event={event_id}&round_type={round_type}&method=competition
+        
+        功能说明:
+            - 按解析后的数值成绩重新计算该轮次全部成绩的排名（含未公开的成绩）
+            - 无法解析的成绩（如 DNF）排名清空
+            - 裁判只能为被分配的赛事排名
+            
+        参数:
+            - event: 赛事ID（必填）
+            - round_type: 轮次类型（可选，默认为final）
+            - method: 并列规则（可选）: competition 1,2,2,4（默认）/ dense 1,2,2,3 / ordinal 1,2,3,4
+            
+        返回:
+            ranked: 参与排名的数量, unranked: 无有效成绩的数量, updated: 名次有变化的数量
+        """
+        params = request.query_params
+        event_id = params.get('event') or request.data.get('event')
+        round_type = params.get('round_type') or request.data.get('round_type') or 'final'
+        method = params.get('method') or request.data.get('method') or 'competition'
+
+        if not str(event_id or '').isdigit():
+            return Response({'error': '请提供赛事ID'}, status=status.HTTP_400_BAD_REQUEST)
+        if round_type not in dict(Result.STATUS_CHOICES):
+            return Response({'error': '轮次无效'}, status=status.HTTP_400_BAD_REQUEST)
+        if method not in RANK_METHODS:
+            return Response({'error': '并列规则仅支持 competition、dense 或 ordinal'}, status=status.HTTP_400_BAD_REQUEST)
+        referee_ids = self.get_referee_event_ids(request.user)
+        if referee_ids is not None and int(event_id) not in referee_ids:
+            raise PermissionDenied('您没有权限为该赛事排名')
+
+        summary = rerank_round(int(event_id), round_type, method)
+        return Response({'message': f"已为{summary['ranked']}条成绩重新排名", **summary})
 
     @action(detail=False, methods=['get'])
     def my_results(self, request):
@@ -403,6 +320,18 @@ class ResultViewSet(viewsets.ModelViewSet):
         serializer = ResultSerializer(results, many=True)
         return Response(serializer.data)
 
+    def get_pending_registrations(self, event_ids=None):
+        """
+        已审核通过但尚未录入任何成绩的报名
+
+        使用 NOT EXISTS 相关子查询，由数据库完成反连接，
+        查询大小与内存占用不随成绩总量增长
+        """
+        queryset = Registration.objects.filter(status='approved')
+        if event_ids is not None:
+            queryset = queryset.filter(event_id__in=event_ids)
+        return queryset.filter(~Exists(Result.objects.filter(registration_id=OuterRef('pk'))))
+
     def get_pending_results_count(self, event_ids=None):
         """
         获取待录入成绩的运动员数量
@@ -415,16 +344,41 @@ class ResultViewSet(viewsets.ModelViewSet):
         返回:
             待录入成绩的数量
         """
-        queryset = Result.objects.select_related('event', 'registration')
-        if event_ids:
+        return self.get_pending_registrations(event_ids).count()
+
+    def get_pending_results_breakdown(self, event_ids=None):
+        """
+        按赛事、轮次统计待录入数量（一次分组查询）
+
+        参数:
+            event_ids: 赛事ID列表，用于限制统计范围
+
+        返回:
+            list: [{event, event_title, pending, rounds: {轮次: 该轮次尚未录入成绩的数量}}]，
+                  只包含有待录入数据的赛事
+        """
+        queryset = Registration.objects.filter(status='approved')
+        if event_ids is not None:
             queryset = queryset.filter(event_id__in=event_ids)
-        recorded_ids = set(queryset.values_list('registration_id', flat=True))
-        reg_queryset = Registration.objects.filter(status='approved')
-        if event_ids:
-            reg_queryset = reg_queryset.filter(event_id__in=event_ids)
-        if recorded_ids:
-            reg_queryset = reg_queryset.exclude(id__in=recorded_ids)
-        return reg_queryset.count()
+
+        def missing(**filters):
+            return ~Exists(Result.objects.filter(registration_id=OuterRef('pk'), **filters))
+
+        round_types = [round_type for round_type, _ in Result.STATUS_CHOICES]
+        rows = queryset.order_by().values('event_id', 'event__title').annotate(
+            pending=Count('id', filter=Q(missing())),
+            **{round_type: Count('id', filter=Q(missing(round_type=round_type))) for round_type in round_types}
+        ).order_by('event_id')
+        return [
+            {
+                'event': row['event_id'],
+                'event_title': row['event__title'],
+                'pending': row['pending'],
+                'rounds': {round_type: row[round_type] for round_type in round_types},
+            }
+            for row in rows
+            if row['pending'] or any(row[round_type] for round_type in round_types)
+        ]
 
     @action(detail=False, methods=['get'])
     def pending_results_count(self, request):
@@ -432,25 +386,39 @@ class ResultViewSet(viewsets.ModelViewSet):
         获取待录入成绩数量（仅管理员/裁判）
         
         GET /api/results/pending_results_count/
+        GET /api/results/pending_results_count/?breakdown=1
         
         功能说明:
             - 管理员可以看到所有待录入数量
             - 裁判只能看到自己负责赛事的待录入数量
             - 用于提醒和统计
+            - 结果按用户范围缓存 PENDING_RESULTS_CACHE_TTL 秒
+            
+        参数:
+            - breakdown: 为 1 时同时返回按赛事、轮次的待录入数量（可选）
             
         返回:
-            待录入成绩的数量
+            count: 待录入成绩的数量
+            events: 按赛事、轮次的待录入数量（breakdown=1 时）
         """
         user = request.user
+        breakdown = str(request.query_params.get('breakdown', '')).lower() in TRUE_VALUES
         if user.is_authenticated and (user.is_superuser or user.user_type in ['admin', 'organizer']):
-            count = self.get_pending_results_count()
-            return Response({'count': count})
-
-        event_ids = self.get_referee_event_ids(user)
-        if not event_ids:
-            return Response({'count': 0})
-        count = self.get_pending_results_count(event_ids)
-        return Response({'count': count})
+            scope, event_ids = 'all', None
+        else:
+            event_ids = self.get_referee_event_ids(user)
+            if not event_ids:
+                return Response({'count': 0, 'events': []} if breakdown else {'count': 0})
+            scope = f'referee:{user.id}'
+
+        key = f'results:pending_count:{scope}:{int(breakdown)}'
+        data = cache.get(key)
+        if data is None:
+            data = {'count': self.get_pending_results_count(event_ids)}
+            if breakdown:
+                data['events'] = self.get_pending_results_breakdown(event_ids)
+            cache.set(key, data, timeout=getattr(settings, 'PENDING_RESULTS_CACHE_TTL', 30))
+        return Response(data)
 
     @action(detail=False, methods=['post'])
     def bulk_publish(self, request):
@@ -459,6 +427,7 @@ class ResultViewSet(viewsets.ModelViewSet):
         
         POST /api/results/bulk_publish/
         Body: {ids: [1, 2, 3]}
+        或 POST /api/results/bulk_publish/?event=12&round_type=final  按列表筛选条件选择成绩
         
         功能说明:
             - 批量设置成绩为公开状态
@@ -466,19 +435,33 @@ class ResultViewSet(viewsets.ModelViewSet):
             - 裁判受到赛事分配限制
             
         参数:
-            - ids: 要公开的成绩ID列表
+            - ids: 要公开的成绩ID列表（不提供时使用查询参数中的筛选条件）
+            - dry_run: 为 true 时只返回将被处理的数量（可选）
             
         返回:
             成功公开的数量
         """
         ids = request.data.get('ids') or []
-        if not isinstance(ids, list) or not ids:
+        if not isinstance(ids, list):
             return Response({'error': '请提供要公开的成绩ID列表'}, status=status.HTTP_400_BAD_REQUEST)
-        queryset = Result.objects.filter(id__in=ids)
-        queryset = self.apply_referee_filter(queryset, request.user)
+        queryset = self.apply_referee_filter(Result.objects.all(), request.user)
+        queryset = self.get_bulk_queryset(queryset, ids)
+        if queryset is None:
+            return Response({'error': '请提供要公开的成绩ID列表或筛选条件'}, status=status.HTTP_400_BAD_REQUEST)
+        if self.is_bulk_dry_run():
+            return self.bulk_dry_run_response(queryset, '公开')
         if not queryset.exists():
             return Response({'error': '没有可以公开的数据'}, status=status.HTTP_400_BAD_REQUEST)
-        updated = queryset.update(is_published=True)
+
+        def publish(chunk):
+            rows = list(chunk.select_related(None).select_for_update().values_list('id', 'event_id'))
+            ids = [result_id for result_id, _ in rows]
+            # 同时更新 updated_at，使成绩接口的条件请求校验值失效
+            Result.objects.filter(id__in=ids).update(is_published=True, updated_at=timezone.now())
+            invalidate_leaderboards({event_id for _, event_id in rows})
+            return ids
+
+        updated = len(self.run_bulk_action(queryset, publish))
         return Response({'message': f'成功公开{updated}条成绩', 'updated': updated})
 
     @action(detail=False, methods=['post'])
@@ -488,6 +471,7 @@ class ResultViewSet(viewsets.ModelViewSet):
         
         POST /api/results/bulk_delete/
         Body: {ids: [1, 2, 3]}
+        或 POST /api/results/bulk_delete/?event=12&round_type=final  按列表筛选条件选择成绩
         
         功能说明:
             - 批量删除多条成绩记录
@@ -495,7 +479,8 @@ class ResultViewSet(viewsets.ModelViewSet):
             - 裁判受到赛事分配限制
             
         参数:
-            - ids: 要删除的成绩ID列表
+            - ids: 要删除的成绩ID列表（不提供时使用查询参数中的筛选条件）
+            - dry_run: 为 true 时只返回将被处理的数量（可选）
             
         返回:
             成功删除的数量
@@ -504,14 +489,25 @@ class ResultViewSet(viewsets.ModelViewSet):
             - 删除操作不可恢复
         """
         ids = request.data.get('ids') or []
-        if not isinstance(ids, list) or not ids:
+        if not isinstance(ids, list):
             return Response({'error': '请提供要删除的成绩ID列表'}, status=status.HTTP_400_BAD_REQUEST)
-        queryset = Result.objects.filter(id__in=ids)
-        queryset = self.apply_referee_filter(queryset, request.user)
+        queryset = self.apply_referee_filter(Result.objects.all(), request.user)
+        queryset = self.get_bulk_queryset(queryset, ids)
+        if queryset is None:
+            return Response({'error': '请提供要删除的成绩ID列表或筛选条件'}, status=status.HTTP_400_BAD_REQUEST)
+        if self.is_bulk_dry_run():
+            return self.bulk_dry_run_response(queryset, '删除')
         if not queryset.exists():
             return Response({'error': '没有可以删除的数据'}, status=status.HTTP_400_BAD_REQUEST)
-        with transaction.atomic():
-            deleted, _ = queryset.delete()
+
+        def delete(chunk):
+            rows = list(chunk.select_related(None).select_for_update().values_list('id', 'event_id'))
+            ids = [result_id for result_id, _ in rows]
+            Result.objects.filter(id__in=ids).delete()
+            invalidate_leaderboards({event_id for _, event_id in rows})
+            return ids
+
+        deleted = len(self.run_bulk_action(queryset, delete))
         return Response({'message': f'成功删除{deleted}条成绩', 'deleted': deleted})
 
     @action(detail=False, methods=['post'], url_path='import')
@@ -521,6 +517,8 @@ class ResultViewSet(viewsets.ModelViewSet):
         
         POST /api/results/import/
         Form-Data: file=成绩表.xlsx, context_event=赛事ID
+        POST /api/results/import/?async=1
+        Form-Data: file=成绩表.csv, context_event=赛事ID, chunk_size=500
         
         功能说明:
             - 支持从Excel文件批量导入成绩
@@ -536,12 +534,15 @@ class ResultViewSet(viewsets.ModelViewSet):
             - 支持中英文表头
             
         参数:
-            - file: Excel文件（.xlsx格式）
+            - file: Excel文件（.xlsx格式）或 UTF-8 编码的 .csv 文件
             - context_event: 当前筛选的赛事ID（可选，用于验证）
+            - async: 为 1 时提交后台导入任务（可选）
+            - chunk_size: 后台导入每个事务处理的行数（可选，50~5000）
             
         返回:
             - imported: 成功导入的数量
             - errors: 错误信息列表（包含行号和详情）
+            - 后台导入时返回 202 和 job，通过 /api/results/import-jobs/{id}/ 查询进度
             
         注意事项:
             - 参赛者必须已有审核通过的报名记录
@@ -551,106 +552,81 @@ class ResultViewSet(viewsets.ModelViewSet):
         uploaded_file = request.FILES.get('file')
         if not uploaded_file:
             return Response({'error': '未提供文件'}, status=status.HTTP_400_BAD_REQUEST)
-        if not uploaded_file.name.lower().endswith('.xlsx'):
-            return Response({'error': '仅支持 .xlsx 文件'}, status=status.HTTP_400_BAD_REQUEST)
+        file_type = get_import_file_type(uploaded_file.name)
+        if not file_type:
+            return Response({'error': '仅支持 .xlsx 或 .csv 文件'}, status=status.HTTP_400_BAD_REQUEST)
         context_event_id = request.data.get('context_event')
         try:
             context_event_id = int(context_event_id) if context_event_id else None
         except (TypeError, ValueError):
             context_event_id = None
+
+        if is_async_export(request) or str(request.data.get('async', '')).lower() in TRUE_VALUES:
+            # 后台分块导入，返回任务信息供轮询
+            job = create_import_job(
+                uploaded_file, file_type, request.user,
+                context_event_id=context_event_id, chunk_size=request.data.get('chunk_size')
+            )
+            return Response({
+                'message': '导入任务已提交',
+                'job': ResultImportJobSerializer(job).data
+            }, status=status.HTTP_202_ACCEPTED)
+
         try:
-            uploaded_file.seek(0)
-            workbook = load_workbook(uploaded_file, read_only=True, data_only=True)
-        except Exception as exc:
-            return Response({'error': '无法读取 Excel 文件', 'detail': str(exc)}, status=status.HTTP_400_BAD_REQUEST)
-        sheet = workbook.active
-        header_row = next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), None)
-        column_mapping, missing = build_column_mapping(header_row)
-        if missing:
-            workbook.close()
-            return Response({'error': f'缺少必要字段: {", ".join(missing)}'}, status=status.HTTP_400_BAD_REQUEST)
-        if sheet.max_row <= 1:
-            workbook.close()
-            return Response({'error': 'Excel 文件没有数据行'}, status=status.HTTP_400_BAD_REQUEST)
-        errors = []
-        imported = 0
-        event_cache = {}
+            sheet = open_result_sheet(uploaded_file, file_type)
+        except ImportFileError as exc:
+            body = {'error': exc.message}
+            if exc.detail:
+                body['detail'] = exc.detail
+            return Response(body, status=status.HTTP_400_BAD_REQUEST)
         try:
+            # 每个赛事只查询一次报名索引和已有成绩，通过校验的行批量写入
             with transaction.atomic():
-                for row_index, row in enumerate(sheet.iter_rows(min_row=2, values_only=True), start=2):
-                    if not any(cell is not None for cell in row):
-                        continue
-                    def get_cell(field):
-                        idx = column_mapping.get(field)
-                        if idx is None or idx >= len(row):
-                            return None
-                        return row[idx]
-                    event_text = safe_str(get_cell('event'))
-                    if not event_text:
-                        errors.append({'row': row_index, 'detail': '赛事名称为空'})
-                        continue
-                    cache_key = event_text.lower()
-                    event = event_cache.get(cache_key)
-                    if event is None:
-                        event = Event.objects.filter(title__iexact=event_text).first()
-                        if not event:
-                            errors.append({'row': row_index, 'detail': f'找不到赛事: {event_text}'})
-                            continue
-                        event_cache[cache_key] = event
-                    if context_event_id and event.id != context_event_id:
-                        errors.append({'row': row_index, 'detail': f'行中的赛事与当前筛选赛事不一致 ({event.title})'})
-                        continue
-                    participant_text = safe_str(get_cell('participant'))
-                    candidates = build_candidate_names(participant_text)
-                    if not candidates:
-                        errors.append({'row': row_index, 'detail': '参赛者信息为空'})
-                        continue
-                    registration, reg_error = find_registration_for_participant(event, candidates)
-                    if reg_error:
-                        errors.append({'row': row_index, 'detail': reg_error})
-                        continue
-                    if not registration:
-                        errors.append({'row': row_index, 'detail': '未找到匹配的报名记录'})
-                        continue
-                    round_value = get_cell('round')
-                    normalized_round = normalize_round_type(round_value)
-                    if not normalized_round:
-                        errors.append({'row': row_index, 'detail': '轮次无法识别'})
-                        continue
-                    score_text = safe_str(get_cell('score'))
-                    if not score_text:
-                        errors.append({'row': row_index, 'detail': '成绩为空'})
-                        continue
-                    rank_value = None
-                    rank_cell = get_cell('rank')
-                    if rank_cell not in (None, ''):
-                        try:
-                            rank_value = int(float(rank_cell))
-                        except (ValueError, TypeError):
-                            errors.append({'row': row_index, 'detail': '排名需要为数字'})
-                            continue
-                    if Result.objects.filter(event=event, registration=registration, round_type=normalized_round).exists():
-                        errors.append({'row': row_index, 'detail': '该参赛者在当前轮次已有成绩'})
-                        continue
-                    serializer = ResultCreateSerializer(
-                        data={
-                            'event': event.id,
-                            'registration': registration.id,
-                            'round_type': normalized_round,
-                            'score': score_text,
-                            'rank': rank_value
-                        },
-                        context={'request': request}
-                    )
-                    if not serializer.is_valid():
-                        detail = '; '.join(f"{k}: {v[0]}" for k, v in serializer.errors.items())
-                        errors.append({'row': row_index, 'detail': detail})
-                        continue
-                    serializer.save()
-                    imported += 1
+                imported, errors = ResultImporter(request.user, context_event_id).run(sheet.rows, sheet.column_mapping)
         finally:
-            workbook.close()
+            sheet.close()
         if imported == 0:
             return Response({'error': '未导入任何成绩', 'errors': errors}, status=status.HTTP_400_BAD_REQUEST)
         status_code = status.HTTP_201_CREATED if not errors else status.HTTP_200_OK
         return Response({'message': f'已成功导入{imported}条成绩', 'imported': imported, 'errors': errors}, status=status_code)
+
+
+class ResultImportJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    成绩导入任务视图集
+
+    接口:
+        GET  /api/results/import-jobs/               导入任务列表
+        GET  /api/results/import-jobs/{id}/          查询进度和各行错误
+        POST /api/results/import-jobs/{id}/resume/   从最后一个已提交的分块继续
+
+    权限控制:
+        - 需要管理员或裁判权限，裁判只能查看自己发起的任务
+    """
+    queryset = ResultImportJob.objects.select_related('context_event').all()
+    serializer_class = ResultImportJobSerializer
+    permission_classes = [IsAdminOrReferee]
+
+    def get_queryset(self):
+        """限制裁判只能看到自己的任务"""
+        user = self.request.user
+        if user.is_superuser or user.user_type in ['admin', 'organizer']:
+            return self.queryset
+        return self.queryset.filter(created_by=user)
+
+    @action(detail=True, methods=['post'])
+    def resume(self, request, pk=None):
+        """
+        继续导入
+        POST /api/results/import-jobs/{id}/resume/
+
+        只有失败或已中断（超过一定时间没有进度）的任务可以继续
+        """
+        job = self.get_object()
+        if not is_resumable(job) or not resume_import_job(job):
+            return Response({'error': '该任务当前无法继续'}, status=status.HTTP_400_BAD_REQUEST)
+        job.refresh_from_db()
+        return Response({
+            'message': '导入任务已继续',
+            'job': ResultImportJobSerializer(job).data
+        }, status=status.HTTP_202_ACCEPTED)
@@ -0,0 +1,11 @@
+from django.apps import AppConfig
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.search'
+    verbose_name = '全文搜索'
+
+    def ready(self):
+        # 为所有被索引的模型注册信号处理器
+        import apps.search.signals
@@ -0,0 +1,56 @@
+"""
+搜索过滤后端
+
+RankedSearchFilter 与 DRF SearchFilter 使用相同的 ?search= 参数：
+    - 模型已登记在 SEARCH_INDEX 中时，通过倒排索引匹配并按相关度排序
+    - 其他模型退回 SearchFilter 的 LIKE 查询
+
+需要放在 OrderingFilter 之后，未指定 ?ordering= 时把相关度作为第一排序键：
+    filter_backends = [DjangoFilterBackend, OrderingFilter, RankedSearchFilter]
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Count, FloatField, OuterRef, Subquery, Sum
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from .indexing import get_index_fields, tokenize_query
+from .models import SearchToken
+
+
+class RankedSearchFilter(SearchFilter):
+    """
+    基于倒排索引的排序搜索过滤器
+
+    查询词经 jieba 精确分词后，要求对象命中全部词条，
+    并把命中词条的权重之和注解为 search_rank
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_terms = self.get_search_terms(request)
+        if not search_terms:
+            return queryset
+        if get_index_fields(queryset.model) is None:
+            return super().filter_queryset(request, queryset, view)
+
+        tokens = tokenize_query(' '.join(search_terms))
+        if not tokens:
+            # 查询只包含标点等无效字符
+            return queryset.none()
+
+        content_type = ContentType.objects.get_for_model(queryset.model)
+        matches = SearchToken.objects.filter(content_type=content_type, token__in=tokens)
+        matched_ids = matches.values('object_id')\
+            .annotate(matched=Count('token'))\
+            .filter(matched=len(tokens))\
+            .values('object_id')
+        rank = matches.filter(object_id=OuterRef('pk'))\
+            .values('object_id')\
+            .annotate(rank=Sum('weight'))\
+            .values('rank')
+
+        queryset = queryset.filter(pk__in=matched_ids)\
+            .annotate(search_rank=Subquery(rank, output_field=FloatField()))
+
+        ordering_param = getattr(view, 'ordering_param', OrderingFilter.ordering_param)
+        if not request.query_params.get(ordering_param):
+            queryset = queryset.order_by('-search_rank', *queryset.query.order_by)
+        return queryset
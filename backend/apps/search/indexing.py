@@ -0,0 +1,146 @@
+"""
+中文全文搜索索引
+
+使用 jieba 对文本字段分词，维护 SearchToken 倒排索引：
+    - 建索引时使用搜索引擎模式（cut_for_search），长词会额外切出短词，提高召回
+    - 查询时使用精确模式（cut），所有查询词都必须命中（AND 语义）
+    - 相关度为命中词条权重之和，权重 = 字段权重 × 词频
+
+新增可搜索模型时，在 SEARCH_INDEX 中登记 '应用.模型' 和字段权重即可，
+信号处理器与 rebuild_search_index 命令会自动覆盖
+"""
+import re
+from collections import Counter
+
+import jieba
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
+
+from .models import SearchToken
+
+
+# 被索引的模型及其字段权重
+SEARCH_INDEX = {
+    'events.Event': {
+        'title': 3,
+        'location': 2,
+        'event_type': 1,
+        'description': 1,
+    },
+    'announcements.Announcement': {
+        'title': 3,
+        'summary': 2,
+        'content': 1,
+    },
+}
+
+MAX_TOKEN_LENGTH = SearchToken._meta.get_field('token').max_length
+# 只保留包含中文、字母或数字的词条，过滤标点和空白
+TOKEN_PATTERN = re.compile(r'[\u4e00-\u9fa5a-z0-9]')
+
+
+def get_index_fields(model):
+    """
+    获取模型的索引字段权重
+
+    返回:
+        dict: 字段名 -> 权重；模型未登记时返回 None
+    """
+    return SEARCH_INDEX.get(model._meta.label)
+
+
+def get_indexed_models():
+    """获取所有被索引的模型类"""
+    return [apps.get_model(label) for label in SEARCH_INDEX]
+
+
+def _normalize(words):
+    tokens = []
+    for word in words:
+        word = word.strip().lower()
+        if word and TOKEN_PATTERN.search(word):
+            tokens.append(word[:MAX_TOKEN_LENGTH])
+    return tokens
+
+
+def tokenize_for_index(text):
+    """建索引分词（搜索引擎模式）"""
+    return _normalize(jieba.cut_for_search(text or ''))
+
+
+def tokenize_query(text):
+    """
+    查询分词（精确模式）
+
+    返回:
+        list: 去重后的查询词条，保持原有顺序
+    """
+    return list(dict.fromkeys(_normalize(jieba.cut(text or ''))))
+
+
+def build_tokens(instance):
+    """
+    计算对象的词条权重
+
+    返回:
+        dict: 词条 -> 权重
+    """
+    weights = Counter()
+    for field, field_weight in get_index_fields(type(instance)).items():
+        for token, count in Counter(tokenize_for_index(getattr(instance, field, ''))).items():
+            weights[token] += field_weight * count
+    return weights
+
+
+def index_instance(instance):
+    """
+    重建单个对象的索引
+
+    参数:
+        instance: 已登记在 SEARCH_INDEX 中的模型实例
+    """
+    content_type = ContentType.objects.get_for_model(instance)
+    tokens = build_tokens(instance)
+    with transaction.atomic():
+        SearchToken.objects.filter(content_type=content_type, object_id=instance.pk).delete()
+        SearchToken.objects.bulk_create([
+            SearchToken(content_type=content_type, object_id=instance.pk, token=token, weight=weight)
+            for token, weight in tokens.items()
+        ])
+
+
+def remove_instance(instance):
+    """删除单个对象的索引"""
+    content_type = ContentType.objects.get_for_model(instance)
+    SearchToken.objects.filter(content_type=content_type, object_id=instance.pk).delete()
+
+
+def rebuild_model_index(model, batch_size=500):
+    """
+    重建某个模型的全部索引
+
+    参数:
+        model: 已登记在 SEARCH_INDEX 中的模型类
+        batch_size: 每批写入的对象数量
+
+    返回:
+        int: 已索引的对象数量
+    """
+    content_type = ContentType.objects.get_for_model(model)
+    fields = ['pk', *get_index_fields(model)]
+    total = 0
+    with transaction.atomic():
+        SearchToken.objects.filter(content_type=content_type).delete()
+        batch = []
+        for instance in model.objects.only(*fields).order_by('pk').iterator(chunk_size=batch_size):
+            batch.extend(
+                SearchToken(content_type=content_type, object_id=instance.pk, token=token, weight=weight)
+                for token, weight in build_tokens(instance).items()
+            )
+            total += 1
+            if len(batch) >= batch_size:
+                SearchToken.objects.bulk_create(batch)
+                batch = []
+        SearchToken.objects.bulk_create(batch)
+    return total
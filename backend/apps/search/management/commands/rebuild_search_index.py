@@ -0,0 +1,32 @@
+"""
+重建全文搜索索引
+
+首次部署、调整 SEARCH_INDEX 字段权重，或通过 queryset.update() 等
+不触发信号的方式批量修改数据后执行：
+    python manage.py rebuild_search_index
+    python manage.py rebuild_search_index --model events.Event
+"""
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.search.indexing import SEARCH_INDEX, get_indexed_models, rebuild_model_index
+
+
+class Command(BaseCommand):
+    help = '重建赛事、公告等模型的全文搜索索引'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--model', action='append', help="只重建指定模型，如 events.Event，可重复指定")
+        parser.add_argument('--batch-size', type=int, default=500, help='每批写入数量，默认500')
+
+    def handle(self, *args, **options):
+        labels = options['model'] or list(SEARCH_INDEX)
+        unknown = set(labels) - set(SEARCH_INDEX)
+        if unknown:
+            raise CommandError(f"未登记的模型: {', '.join(sorted(unknown))}")
+
+        for model in get_indexed_models():
+            if model._meta.label not in labels:
+                continue
+            total = rebuild_model_index(model, batch_size=options['batch_size'])
+            self.stdout.write(f'{model._meta.label}: {total} 条')
+        self.stdout.write(self.style.SUCCESS('搜索索引重建完成'))
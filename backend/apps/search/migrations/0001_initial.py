@@ -0,0 +1,33 @@
+# Generated by Django 5.0 on 2026-10-18 16:21
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('object_id', models.PositiveIntegerField(verbose_name='对象ID')),
+                ('token', models.CharField(max_length=64, verbose_name='词条')),
+                ('weight', models.FloatField(default=1, verbose_name='权重')),
+                ('content_type', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='contenttypes.contenttype', verbose_name='内容类型')),
+            ],
+            options={
+                'verbose_name': '搜索索引',
+                'verbose_name_plural': '搜索索引',
+                'db_table': 'search_token',
+                'indexes': [models.Index(fields=['content_type', 'token'], name='search_toke_content_c7d146_idx')],
+                'unique_together': {('content_type', 'object_id', 'token')},
+            },
+        ),
+    ]
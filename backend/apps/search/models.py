@@ -0,0 +1,47 @@
+from django.db import models
+from django.contrib.contenttypes.models import ContentType
+
+
+class SearchToken(models.Model):
+    """
+    搜索倒排索引模型
+
+    把赛事、公告等对象的文本字段经 jieba 分词后，按词条记录到该表，
+    搜索时按词条等值匹配代替 LIKE '%关键词%' 全表扫描
+
+    关键字段说明:
+        - content_type: 被索引对象的模型类型
+        - object_id: 被索引对象的ID
+        - token: 分词得到的词条（统一小写）
+        - weight: 词条权重，为各字段权重乘以词频之和，用于相关度排序
+
+    数据表名: search_token
+    """
+    content_type = models.ForeignKey(
+        ContentType,
+        on_delete=models.CASCADE,
+        verbose_name='内容类型'
+    )
+    object_id = models.PositiveIntegerField(
+        verbose_name='对象ID'
+    )
+    token = models.CharField(
+        max_length=64,
+        verbose_name='词条'
+    )
+    weight = models.FloatField(
+        default=1,
+        verbose_name='权重'
+    )
+
+    class Meta:
+        db_table = 'search_token'
+        verbose_name = '搜索索引'
+        verbose_name_plural = verbose_name
+        unique_together = [['content_type', 'object_id', 'token']]
+        indexes = [
+            models.Index(fields=['content_type', 'token']),      # 按词条查找对象
+        ]
+
+    def __str__(self):
+        return f"{self.token} -> {self.content_type_id}:{self.object_id}"
@@ -0,0 +1,32 @@
+"""
+搜索索引信号处理模块
+
+被索引对象保存后重建其索引，删除后清除其索引
+"""
+from django.db.models.signals import post_save, post_delete
+
+from .indexing import get_index_fields, get_indexed_models, index_instance, remove_instance
+
+
+def handle_indexed_save(sender, instance, raw=False, update_fields=None, **kwargs):
+    """
+    对象保存后重建索引
+
+    只更新了非索引字段（如 save(update_fields=['status'])）时跳过，
+    避免点击数、状态等高频更新触发重新分词
+    """
+    if raw:
+        return
+    if update_fields is not None and not set(update_fields) & set(get_index_fields(sender)):
+        return
+    index_instance(instance)
+
+
+def handle_indexed_delete(sender, instance, **kwargs):
+    """对象删除后清除索引"""
+    remove_instance(instance)
+
+
+for model in get_indexed_models():
+    post_save.connect(handle_indexed_save, sender=model, dispatch_uid=f'search_index_save_{model._meta.label}')
+    post_delete.connect(handle_indexed_delete, sender=model, dispatch_uid=f'search_index_delete_{model._meta.label}')
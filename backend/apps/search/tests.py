@@ -0,0 +1,92 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from apps.events.models import Event
+from .indexing import tokenize_query
+from .models import SearchToken
+
+
+User = get_user_model()
+
+
+class RankedSearchTests(TestCase):
+    """?search= 通过 jieba 倒排索引匹配，并按相关度排序"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username='organizer',
+            password='password123',
+            real_name='组织者',
+            phone='13800000050'
+        )
+        self.title_hit = self.create_event('城市马拉松比赛', '欢迎参加', '北京')
+        self.description_hit = self.create_event('秋季长跑', '本次活动包含半程马拉松比赛项目', '上海')
+        self.other = self.create_event('篮球联赛', '三对三篮球', '广州')
+        self.client = APIClient()
+
+    def create_event(self, title, description, location):
+        now = timezone.now()
+        return Event.objects.create(
+            title=title,
+            description=description,
+            location=location,
+            event_type='athletics',
+            start_time=now + timedelta(days=2),
+            end_time=now + timedelta(days=3),
+            registration_start=now - timedelta(days=1),
+            registration_end=now + timedelta(days=1),
+            status='published',
+            organizer=self.user,
+            contact_person='周八',
+            contact_phone='13900000005'
+        )
+
+    def search(self, term, **params):
+        response = self.client.get(reverse('event-list'), {'search': term, **params})
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.json()['results']]
+
+    def test_results_are_ranked_by_field_weight(self):
+        self.assertEqual(self.search('马拉松'), [self.title_hit.id, self.description_hit.id])
+
+    def test_all_query_tokens_must_match(self):
+        self.assertEqual(tokenize_query('马拉松 上海'), ['马拉松', '上海'])
+        self.assertEqual(self.search('马拉松 上海'), [self.description_hit.id])
+        self.assertEqual(self.search('马拉松 篮球'), [])
+
+    def test_explicit_ordering_overrides_rank(self):
+        ids = self.search('马拉松', ordering='-created_at')
+        self.assertEqual(ids, [self.description_hit.id, self.title_hit.id])
+
+    def test_index_follows_saves_and_deletes(self):
+        self.other.title = '篮球马拉松'
+        self.other.save()
+        self.assertIn(self.other.id, self.search('马拉松'))
+
+        # 只更新非索引字段时不重新分词
+        SearchToken.objects.filter(object_id=self.other.id).delete()
+        self.other.status = 'ongoing'
+        self.other.save(update_fields=['status'])
+        self.assertFalse(SearchToken.objects.filter(object_id=self.other.id).exists())
+
+        self.title_hit.delete()
+        self.assertFalse(SearchToken.objects.filter(object_id=self.title_hit.id).exists())
+
+    def test_rebuild_command_restores_index(self):
+        SearchToken.objects.all().delete()
+        Event.objects.filter(pk=self.other.pk).update(title='篮球马拉松')
+        call_command('rebuild_search_index', stdout=StringIO())
+        # 两个标题命中权重相同，按默认排序（创建时间倒序）排列
+        self.assertEqual(
+            self.search('马拉松'),
+            [self.other.id, self.title_hit.id, self.description_hit.id]
+        )
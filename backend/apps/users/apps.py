@@ -5,3 +5,7 @@ class UsersConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.users'
     verbose_name = '用户管理'
+
+    def ready(self):
+        # 注册头像缩略图生成的信号处理器
+        import apps.users.signals
@@ -0,0 +1,19 @@
+# Generated by Django 5.0 on 2026-10-18 16:35
+
+import utils.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0003_allow_any_username_chars'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='user',
+            name='avatar',
+            field=models.ImageField(blank=True, help_text='用户头像图片', null=True, storage=utils.images.ContentHashStorage(), upload_to=utils.images.ContentHashUploadTo('avatars', 'avatar'), verbose_name='头像'),
+        ),
+    ]
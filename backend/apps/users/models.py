@@ -2,6 +2,8 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 from django.utils.translation import gettext_lazy as _
 
+from utils.images import ContentHashStorage, ContentHashUploadTo
+
 
 class User(AbstractUser):
     """
@@ -65,7 +67,8 @@ class User(AbstractUser):
         help_text='用户角色类型'
     )
     avatar = models.ImageField(
-        upload_to='avatars/%Y/%m/',  # 按年月组织头像文件
+        upload_to=ContentHashUploadTo('avatars', 'avatar'),  # 按内容哈希命名，相同头像只保存一份
+        storage=ContentHashStorage(),
         blank=True,
         null=True,
         verbose_name='头像',
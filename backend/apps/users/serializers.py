@@ -4,6 +4,7 @@
 from rest_framework import serializers
 from django.contrib.auth.password_validation import validate_password
 from .models import User
+from utils.images import ImageVariantsField
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
 from django.utils.translation import gettext_lazy as _
 
@@ -22,12 +23,13 @@ class UserSerializer(serializers.ModelSerializer):
         - is_verified: 实名认证状态
         - date_joined: 注册时间
     """
+    avatar_variants = ImageVariantsField(source='avatar')
 
     class Meta:
         model = User
         fields = [
             'id', 'username', 'email', 'real_name', 'phone', 'user_type',
-            'avatar', 'gender', 'birth_date', 'id_card', 'emergency_contact',
+            'avatar', 'avatar_variants', 'gender', 'birth_date', 'id_card', 'emergency_contact',
             'emergency_phone', 'organization', 'bio', 'is_verified',
             'is_active', 'is_staff', 'date_joined', 'created_at', 'updated_at'
         ]
@@ -150,12 +152,13 @@ class UserProfileSerializer(serializers.ModelSerializer):
         - date_joined: 账号注册时间
         - created_at, updated_at: 记录创建和更新时间
     """
+    avatar_variants = ImageVariantsField(source='avatar')
 
     class Meta:
         model = User
         fields = [
             'id', 'username', 'email', 'real_name', 'phone', 'user_type',
-            'avatar', 'gender', 'birth_date', 'id_card', 'emergency_contact',
+            'avatar', 'avatar_variants', 'gender', 'birth_date', 'id_card', 'emergency_contact',
             'emergency_phone', 'organization', 'bio', 'is_verified',
             'is_active', 'is_superuser', 'is_staff',
             'date_joined', 'created_at', 'updated_at'
@@ -0,0 +1,19 @@
+"""
+用户信号处理模块
+
+头像保存后在后台生成各尺寸缩略图
+"""
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from utils.images import schedule_variants
+from .models import User
+
+
+@receiver(post_save, sender=User)
+def handle_avatar_change(sender, instance, update_fields=None, **kwargs):
+    """头像可能发生变化时安排生成缩略图（已生成的尺寸会被跳过）"""
+    if update_fields is not None and 'avatar' not in update_fields:
+        return
+    if instance.avatar:
+        schedule_variants(instance.avatar.name)
@@ -13,12 +13,18 @@ from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 import apps.interactions.routing
+import apps.registrations.routing
+import apps.results.routing
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "sports_backend.settings")
 
 application = ProtocolTypeRouter({
     "http": get_asgi_application(),
     "websocket": AuthMiddlewareStack(
-        URLRouter(apps.interactions.routing.websocket_urlpatterns)
+        URLRouter(
+            apps.interactions.routing.websocket_urlpatterns
+            + apps.registrations.routing.websocket_urlpatterns
+            + apps.results.routing.websocket_urlpatterns
+        )
     ),
 })
@@ -57,6 +57,8 @@ INSTALLED_APPS = [
     "apps.interactions",
     "apps.carousel",
     "apps.feedback",
+    "apps.search",
+    "apps.exports",
 ]
 
 MIDDLEWARE = [
@@ -254,3 +256,51 @@ CHANNEL_LAYERS = {
         "BACKEND": "channels.layers.InMemoryChannelLayer",
     }
 }
+
+
+# 缓存配置
+# 默认使用进程内存缓存；多进程部署时建议通过环境变量切换为 Redis 等共享缓存
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', 'sports-backend'),
+    }
+}
+
+# 浏览/点击计数器的顺带刷新间隔（秒），0 表示只通过 flush_hit_counters 命令刷新
+HIT_COUNTER_FLUSH_INTERVAL = int(os.getenv('HIT_COUNTER_FLUSH_INTERVAL', '30'))
+
+# 首页公开赛事列表快照的最长缓存时间（秒），实际过期时间不超过下一个赛事时间边界
+EVENT_SNAPSHOT_TTL = int(os.getenv('EVENT_SNAPSHOT_TTL', '300'))
+
+# 赛事状态（published → ongoing → finished）顺带推进的间隔（秒），0 表示只通过 sweep_event_statuses 命令推进
+EVENT_STATUS_SWEEP_INTERVAL = int(os.getenv('EVENT_STATUS_SWEEP_INTERVAL', '60'))
+
+# 前端 public 目录，赛事、公告、轮播图上传的图片保存在其 images/ 子目录下
+FRONTEND_PUBLIC_DIR = os.getenv('FRONTEND_PUBLIC_DIR', os.path.join(BASE_DIR, '..', 'frontend', 'public'))
+
+# 后台任务（图片缩略图生成等）线程池大小；BACKGROUND_TASKS_EAGER 为 True 时同步执行
+BACKGROUND_WORKERS = int(os.getenv('BACKGROUND_WORKERS', '2'))
+BACKGROUND_TASKS_EAGER = os.getenv('BACKGROUND_TASKS_EAGER', 'False') == 'True'
+
+# 按筛选条件执行的批量操作每个事务处理的记录数
+BULK_ACTION_CHUNK_SIZE = int(os.getenv('BULK_ACTION_CHUNK_SIZE', '500'))
+
+# 后台导出文件的保留时间（秒），过期前相同的导出请求直接复用已生成的文件
+EXPORT_ARTIFACT_TTL = int(os.getenv('EXPORT_ARTIFACT_TTL', '86400'))
+# 为 True 时导出任务在 Web 进程的后台线程池中执行；
+# 为 False 时只登记任务，由独立的 `python manage.py process_export_jobs --loop` 工作进程执行
+EXPORT_JOBS_IN_PROCESS = os.getenv('EXPORT_JOBS_IN_PROCESS', 'True') == 'True'
+
+# 后台成绩导入每个事务处理的行数（请求可通过 chunk_size 指定，范围 50~5000）
+RESULT_IMPORT_CHUNK_SIZE = int(os.getenv('RESULT_IMPORT_CHUNK_SIZE', '500'))
+# 为 True 时成绩导入任务在 Web 进程的后台线程池中执行；
+# 为 False 时由独立的 `python manage.py process_result_imports --loop` 工作进程执行
+IMPORT_JOBS_IN_PROCESS = os.getenv('IMPORT_JOBS_IN_PROCESS', 'True') == 'True'
+
+# 排行榜缓存的兜底过期时间（秒），成绩变化时会立即失效
+LEADERBOARD_CACHE_TTL = int(os.getenv('LEADERBOARD_CACHE_TTL', '3600'))
+# 待录入成绩统计按用户范围缓存的时间（秒）
+PENDING_RESULTS_CACHE_TTL = int(os.getenv('PENDING_RESULTS_CACHE_TTL', '30'))
+# 裁判可访问赛事ID的跨请求缓存时间（秒），分配关系变化时立即失效
+REFEREE_ACCESS_CACHE_TTL = int(os.getenv('REFEREE_ACCESS_CACHE_TTL', '300'))
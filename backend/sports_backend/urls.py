@@ -48,6 +48,9 @@ urlpatterns = [
 
     # 反馈管理
     path('api/feedbacks/', include('apps.feedback.urls')),
+
+    # 后台导出任务
+    path('api/exports/', include('apps.exports.urls')),
 ]
 
 # 开发环境下提供媒体文件服务
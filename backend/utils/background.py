@@ -0,0 +1,62 @@
+"""
+后台任务工具模块
+
+在进程内线程池中执行耗时任务（如图片缩放），不阻塞请求：
+    submit(generate_variants, '/images/events/event_ab12.png')
+
+说明:
+    - 线程数由 BACKGROUND_WORKERS 设置，默认 2
+    - BACKGROUND_TASKS_EAGER 为 True 时在当前线程同步执行，便于测试和命令行调用
+    - 每个任务结束后关闭本线程的数据库连接，避免连接泄漏
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """获取（必要时创建）进程内共享的线程池"""
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=getattr(settings, 'BACKGROUND_WORKERS', 2),
+                    thread_name_prefix='background',
+                )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        return func(*args, **kwargs)
+    except Exception:
+        logger.exception('后台任务执行失败: %s', getattr(func, '__name__', func))
+        raise
+    finally:
+        connections.close_all()
+
+
+def submit(func, *args, **kwargs):
+    """
+    提交后台任务
+
+    参数:
+        func: 要执行的函数，参数应为可在线程间传递的简单值（如ID、路径）
+
+    返回:
+        Future: 任务句柄；同步执行模式下返回 None
+    """
+    if getattr(settings, 'BACKGROUND_TASKS_EAGER', False):
+        func(*args, **kwargs)
+        return None
+    return get_executor().submit(_run, func, args, kwargs)
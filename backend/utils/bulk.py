@@ -0,0 +1,134 @@
+"""
+批量操作工具模块
+
+批量审核、公开、删除等操作除了接收 ids 列表，还支持与列表接口相同的筛选参数：
+    POST /api/registrations/bulk_approve/?event=12&status=pending
+    POST /api/results/bulk_publish/?event=12&round_type=final
+
+提供 ids 列表时，全部记录在同一个事务中处理，要么全部成功，要么全部回滚。
+
+按筛选条件操作时：
+    - 服务端按主键顺序分块（BULK_ACTION_CHUNK_SIZE）取出ID，每块在独立事务中处理，
+      不会生成超长的 IN 列表，也不会长时间锁住大量记录
+    - 因此不保证整体原子性：中途出错时，之前的分块已经提交，
+      重新执行相同的请求会只处理剩余的记录（已处理的记录不再满足操作条件）
+    - 请求体或查询参数带上 dry_run=true 时只返回将被处理的记录数，不做修改
+    - 必须至少提供一个筛选参数，避免误操作全部数据
+"""
+from django.conf import settings
+from django.db import transaction
+from rest_framework.response import Response
+
+
+TRUE_VALUES = ('1', 'true', 'yes', 'on')
+
+
+def get_bulk_chunk_size():
+    """每个事务处理的记录数"""
+    return max(1, getattr(settings, 'BULK_ACTION_CHUNK_SIZE', 500))
+
+
+def iter_id_chunks(queryset, chunk_size=None):
+    """
+    按主键顺序分块取出ID
+
+    使用主键键集翻页，每块一条查询；处理过程中记录被修改或删除不影响后续分块
+
+    参数:
+        queryset: 待处理的查询集
+        chunk_size: 每块的数量，默认 BULK_ACTION_CHUNK_SIZE
+
+    返回:
+        generator: 每次产出一个ID列表
+    """
+    chunk_size = chunk_size or get_bulk_chunk_size()
+    ids_queryset = queryset.order_by('pk').values_list('pk', flat=True)
+    last_id = None
+    while True:
+        chunk_queryset = ids_queryset if last_id is None else ids_queryset.filter(pk__gt=last_id)
+        ids = list(chunk_queryset[:chunk_size])
+        if not ids:
+            return
+        yield ids
+        if len(ids) < chunk_size:
+            return
+        last_id = ids[-1]
+
+
+class BulkActionViewSetMixin:
+    """
+    批量操作视图集混入
+
+    为批量操作提供统一的选择记录、试运行和分块执行逻辑，
+    筛选参数复用视图集的 filter_backends（filterset_fields 与 search）
+    """
+    # 本次请求是否按 ids 选择记录，由 get_bulk_queryset() 设置
+    bulk_by_ids = False
+
+    def get_bulk_filter_params(self):
+        """请求中与列表接口相同的筛选参数"""
+        allowed = set(getattr(self, 'filterset_fields', None) or [])
+        if getattr(self, 'search_fields', None):
+            allowed.add('search')
+        return {
+            key: value for key, value in self.request.query_params.items()
+            if key in allowed and value != ''
+        }
+
+    def get_bulk_queryset(self, queryset, ids=None):
+        """
+        确定批量操作的记录范围
+
+        参数:
+            queryset: 已按权限和操作条件过滤的查询集
+            ids: 请求体中的ID列表，提供时优先使用
+
+        返回:
+            QuerySet: 待处理的记录；既没有ID也没有筛选参数时返回 None
+        """
+        self.bulk_by_ids = bool(ids)
+        if ids:
+            return queryset.filter(pk__in=ids)
+        if not self.get_bulk_filter_params():
+            return None
+        return self.filter_queryset(queryset)
+
+    def is_bulk_dry_run(self):
+        """请求是否只统计数量"""
+        value = self.request.data.get('dry_run', self.request.query_params.get('dry_run', ''))
+        if isinstance(value, bool):
+            return value
+        return str(value).lower() in TRUE_VALUES
+
+    def bulk_dry_run_response(self, queryset, verb):
+        """返回试运行结果"""
+        count = queryset.count()
+        return Response({
+            'message': f'将{verb} {count} 条记录',
+            'dry_run': True,
+            'count': count
+        })
+
+    def run_bulk_action(self, queryset, handler):
+        """
+        执行批量操作
+
+        按 ids 选择的记录在一个事务中全部处理；按筛选条件选择的记录分块处理，
+        每块一个事务，出错时之前的分块不会回滚
+
+        参数:
+            queryset: get_bulk_queryset() 返回的查询集
+            handler: 处理函数，接收一块记录的查询集，返回实际处理的ID列表
+
+        返回:
+            list: 全部处理的ID
+        """
+        if self.bulk_by_ids:
+            with transaction.atomic():
+                return list(handler(queryset))
+
+        processed = []
+        for ids in iter_id_chunks(queryset):
+            with transaction.atomic():
+                processed.extend(handler(queryset.filter(pk__in=ids)))
+        return processed
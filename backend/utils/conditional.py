@@ -0,0 +1,103 @@
+"""
+条件请求工具模块
+
+为前端轮询的公开只读接口提供 ETag / Last-Modified 支持：
+    - 视图先用一次轻量查询（如 Max('updated_at') + Count）计算校验值
+    - 客户端携带的 If-None-Match / If-Modified-Since 命中时直接返回 304，
+      不再执行完整查询和序列化
+    - 按资源的变化频率设置 Cache-Control
+
+Last-Modified 只适用于最后修改时间能反映全部变化的资源。
+列表中非最新的行被删除或取消公开、计数字段通过 F() 更新时，最后修改时间都不会变化，
+这类资源的校验器返回 None 作为最后修改时间，只通过 ETag（包含行数与计数）校验
+
+使用示例:
+    class CarouselViewSet(viewsets.ModelViewSet):
+        def get_active_validators(self, request):
+            return queryset_validators(self.get_active_queryset())
+
+        @action(detail=False, methods=['get'])
+        @conditional_get('get_active_validators', max_age=300)
+        def active(self, request):
+            ...
+"""
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+
+def queryset_validators(queryset, counters=()):
+    """
+    根据查询集计算校验值
+
+    参数:
+        queryset: 响应内容对应的查询集
+        counters: 通过 F() 或缓冲计数更新、不会修改 updated_at 的计数字段，
+                  如 ('view_count',)，在同一次聚合中求和计入 ETag
+
+    返回:
+        tuple: (None, 用于生成 ETag 的值列表)；删除非最新的行不会改变 Max('updated_at')，
+               列表不提供 Last-Modified，避免只携带 If-Modified-Since 的客户端收到过期的 304
+    """
+    aggregates = {f'{field}_sum': Sum(field) for field in counters}
+    stats = queryset.order_by().aggregate(last_modified=Max('updated_at'), total=Count('pk'), **aggregates)
+    return None, [stats['total'], stats['last_modified'], *(
+        stats[f'{field}_sum'] for field in counters
+    )]
+
+
+def conditional_get(validator, max_age=0):
+    """
+    条件 GET 装饰器
+
+    参数:
+        validator: 视图方法名或可调用对象，签名与被装饰的视图方法相同，
+                   返回 (最后修改时间, ETag 值列表)；返回 None 时跳过条件处理
+                   （例如对象不存在，交给视图返回 404）；最后修改时间为 None 时
+                   不发送 Last-Modified，也不处理 If-Modified-Since
+        max_age: 匿名请求的缓存秒数，按资源的变化频率设置
+
+    说明:
+        登录用户的响应可能包含个人状态（如是否已报名），
+        ETag 中会加入用户ID，并设置为 private 缓存
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(view, request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return func(view, request, *args, **kwargs)
+
+            if isinstance(validator, str):
+                validators = getattr(view, validator)(request, *args, **kwargs)
+            else:
+                validators = validator(view, request, *args, **kwargs)
+            if validators is None:
+                return func(view, request, *args, **kwargs)
+
+            last_modified, parts = validators
+            user = request.user
+            if user.is_authenticated:
+                parts = [*parts, 'user', user.pk]
+            etag = quote_etag(hashlib.md5(repr(parts).encode()).hexdigest())
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = func(view, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+                response['ETag'] = etag
+                if timestamp is not None:
+                    response['Last-Modified'] = http_date(timestamp)
+
+            if user.is_authenticated:
+                patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+            else:
+                patch_cache_control(response, public=True, max_age=max_age, must_revalidate=True)
+            patch_vary_headers(response, ['Authorization'])
+            return response
+        return wrapper
+    return decorator
@@ -1,11 +1,58 @@
 """
 Excel导出工具
 用于导出报名名单和成绩表
+
+报名名单和成绩表使用流式导出（export_queryset）：
+    - 通过 values_list() + iterator() 分批读取，不创建模型实例
+    - xlsx 使用 openpyxl 的 write_only 模式写入临时文件后分块返回，
+      csv 边查询边输出，内存占用与数据量无关
+    - 列宽根据前 EXPORT_WIDTH_SAMPLE_SIZE 行估算
 """
 from openpyxl import Workbook
-from django.http import HttpResponse
-from datetime import datetime
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font
+from openpyxl.utils import get_column_letter
+from django.http import FileResponse, HttpResponse, StreamingHttpResponse
+from datetime import date, datetime
+from itertools import chain, islice
+import csv
 import re
+import tempfile
+
+
+# 支持的导出格式
+EXPORT_FILE_TYPES = ('xlsx', 'csv')
+# 每批从数据库读取的行数
+EXPORT_CHUNK_SIZE = 2000
+# 估算列宽时采样的行数
+EXPORT_WIDTH_SAMPLE_SIZE = 200
+# 列宽上限（字符数）
+EXPORT_MAX_COLUMN_WIDTH = 50
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+# 报名名单导出的字段与表头，字段支持通过点号访问关联对象的属性
+REGISTRATION_EXPORT_FIELDS = [
+    'event.title',              # 通过外键访问赛事标题
+    'user.username',            # 通过外键访问用户名
+    'user.real_name',           # 通过外键访问用户真实姓名
+    'participant_birth_date',   # 参赛者出生日期
+    'participant_id_card',      # 参赛者身份证号
+    'participant_phone',        # 参赛者联系电话
+    'created_at',               # 报名创建时间
+    'status',                   # 报名审核状态
+]
+REGISTRATION_EXPORT_HEADERS = ['赛事名称', '用户名', '姓名', '出生日期', '身份证', '手机号', '报名时间', '审核状态']
+
+# 成绩表导出的字段与表头
+RESULT_EXPORT_FIELDS = [
+    'event.title',      # 赛事标题
+    'user.username',    # 参赛者用户名
+    'user.real_name',   # 参赛者真实姓名
+    'round_type',       # 比赛轮次
+    'rank',             # 排名
+    'score'             # 成绩（时间、分数等）
+]
+RESULT_EXPORT_HEADERS = ['赛事名称', '用户名', '姓名', '轮次', '排名', '成绩']
 
 
 def export_to_excel(queryset, fields, headers, filename):
@@ -97,6 +144,163 @@ def export_to_excel(queryset, fields, headers, filename):
     return response
 
 
+def format_cell(value):
+    """把数据库取出的值格式化为导出的字符串"""
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d')
+    return str(value)
+
+
+def iter_export_rows(queryset, fields, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    分批读取导出数据
+
+    参数:
+        queryset: 查询集，保留其筛选和排序
+        fields: 字段列表，支持点号访问关联字段，如 'user.username'
+        chunk_size: 每批读取的行数
+
+    返回:
+        generator: 每次产出一行格式化后的字符串列表
+    """
+    lookups = [field.replace('.', '__') for field in fields]
+    for row in queryset.values_list(*lookups).iterator(chunk_size=chunk_size):
+        yield [format_cell(value) for value in row]
+
+
+def estimate_column_widths(headers, sample_rows):
+    """
+    根据表头和采样行估算列宽
+
+    中文等全角字符按两个字符宽度计算，最大不超过 EXPORT_MAX_COLUMN_WIDTH
+    """
+    widths = []
+    for index, header in enumerate(headers):
+        values = chain([str(header)], (row[index] for row in sample_rows))
+        longest = max(sum(2 if ord(char) > 0x2E7F else 1 for char in value) for value in values)
+        widths.append(min(longest + 2, EXPORT_MAX_COLUMN_WIDTH))
+    return widths
+
+
+class Echo:
+    """只返回写入内容的伪文件对象，配合 csv.writer 逐行生成输出"""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(rows, headers):
+    """逐行生成 CSV 内容，带 BOM 便于 Excel 识别 UTF-8"""
+    writer = csv.writer(Echo())
+    yield '\ufeff' + writer.writerow(headers)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def append_xlsx_sheet(workbook, title, rows, headers):
+    """
+    向 write_only 工作簿追加一个工作表并写入数据
+
+    参数:
+        workbook: Workbook(write_only=True)
+        title: 工作表名称
+        rows: 行迭代器
+        headers: 表头列表
+    """
+    sheet = workbook.create_sheet(title)
+
+    # write_only 模式下列宽必须在写入数据前设置，先取一部分行采样
+    sample = list(islice(rows, EXPORT_WIDTH_SAMPLE_SIZE))
+    for index, width in enumerate(estimate_column_widths(headers, sample), start=1):
+        sheet.column_dimensions[get_column_letter(index)].width = width
+
+    header_cells = []
+    for header in headers:
+        cell = WriteOnlyCell(sheet, value=header)
+        cell.font = Font(bold=True)
+        header_cells.append(cell)
+    sheet.append(header_cells)
+    for row in chain(sample, rows):
+        sheet.append(row)
+
+
+def write_xlsx(rows, headers, file):
+    """
+    以 write_only 模式把数据写入 xlsx 文件
+
+    参数:
+        rows: 行迭代器
+        headers: 表头列表
+        file: 可写的文件对象
+    """
+    workbook = Workbook(write_only=True)
+    append_xlsx_sheet(workbook, '数据导出', rows, headers)
+    workbook.save(file)
+
+
+def write_export_file(queryset, fields, headers, file, file_type='xlsx'):
+    """
+    把查询集导出到文件
+
+    参数:
+        queryset: Django ORM查询集
+        fields: 字段列表，支持点号访问关联字段
+        headers: 表头列表，与fields一一对应
+        file: 以二进制方式打开的可写文件对象
+        file_type: 'xlsx' 或 'csv'
+    """
+    rows = iter_export_rows(queryset, fields)
+    if file_type == 'csv':
+        for line in stream_csv(rows, headers):
+            file.write(line.encode('utf-8'))
+    else:
+        write_xlsx(rows, headers, file)
+
+
+def export_queryset(queryset, fields, headers, filename, file_type='xlsx'):
+    """
+    流式导出查询集
+
+    参数:
+        queryset: Django ORM查询集
+        fields: 字段列表，支持点号访问关联字段，如 'event.title'
+        headers: 表头列表，与fields一一对应
+        filename: 导出的文件名（不含扩展名）
+        file_type: 'xlsx' 或 'csv'
+
+    返回:
+        StreamingHttpResponse: 分块返回文件内容的响应
+
+    使用示例:
+        export_queryset(
+            Registration.objects.filter(event_id=1),
+            ['event.title', 'user.username'],
+            ['赛事名称', '用户名'],
+            'registration_list_20240101',
+            file_type='csv'
+        )
+    """
+    if file_type == 'csv':
+        rows = iter_export_rows(queryset, fields)
+        response = StreamingHttpResponse(stream_csv(rows, headers), content_type='text/csv; charset=utf-8')
+        response['Content-Disposition'] = f'attachment; filename={filename}.csv'
+        return response
+
+    # xlsx 需要写完才能确定 zip 目录，先写入临时文件，再由 FileResponse 分块读取并在结束后关闭
+    file = tempfile.TemporaryFile()
+    try:
+        write_export_file(queryset, fields, headers, file)
+    except Exception:
+        file.close()
+        raise
+    file.seek(0)
+    return FileResponse(file, as_attachment=True, filename=f'{filename}.xlsx', content_type=XLSX_CONTENT_TYPE)
+
+
 def sanitize_event_title(title):
     """
     清理赛事名称，去除文件名中不允许的特殊字符
@@ -161,7 +365,7 @@ def build_filename(base_name, timestamp, event_title=None):
     return f"{base_name}_{timestamp.strftime('%Y%m%d%H%M%S')}"
 
 
-def export_registrations(queryset, event_title=None):
+def export_registrations(queryset, event_title=None, file_type='xlsx'):
     """
     导出报名名单到Excel文件
     
@@ -181,34 +385,22 @@ def export_registrations(queryset, event_title=None):
     参数:
         queryset: Registration模型的查询集，包含要导出的报名记录
         event_title: 可选的赛事名称，用于生成文件名
+        file_type: 导出格式，'xlsx'（默认）或 'csv'
         
     返回:
-        HttpResponse: 包含Excel文件的HTTP响应
+        StreamingHttpResponse: 分块返回文件内容的响应
         
     使用示例:
         registrations = Registration.objects.filter(event_id=1)
         return export_registrations(registrations, '春季运动会')
     """
-    # 定义要导出的字段，支持通过点号访问关联对象的属性
-    fields = [
-        'event.title',              # 通过外键访问赛事标题
-        'user.username',            # 通过外键访问用户名
-        'user.real_name',           # 通过外键访问用户真实姓名
-        'participant_birth_date',   # 参赛者出生日期
-        'participant_id_card',      # 参赛者身份证号
-        'participant_phone',        # 参赛者联系电话
-        'created_at',               # 报名创建时间
-        'status',                   # 报名审核状态
-    ]
-    # 定义Excel表格的表头
-    headers = ['赛事名称', '用户名', '姓名', '出生日期', '身份证', '手机号', '报名时间', '审核状态']
     # 构建文件名，包含时间戳确保唯一性
     filename = build_filename('registration_list', datetime.now(), event_title)
 
-    return export_to_excel(queryset, fields, headers, filename)
+    return export_queryset(queryset, REGISTRATION_EXPORT_FIELDS, REGISTRATION_EXPORT_HEADERS, filename, file_type)
 
 
-def export_results(queryset):
+def export_results(queryset, file_type='xlsx'):
     """
     导出成绩表到Excel文件
     
@@ -225,26 +417,16 @@ def export_results(queryset):
     
     参数:
         queryset: Result模型的查询集，包含要导出的成绩记录
+        file_type: 导出格式，'xlsx'（默认）或 'csv'
         
     返回:
-        HttpResponse: 包含Excel文件的HTTP响应
+        StreamingHttpResponse: 分块返回文件内容的响应
         
     使用示例:
         results = Result.objects.filter(event_id=1, is_published=True)
         return export_results(results)
     """
-    # 定义要导出的字段
-    fields = [
-        'event.title',      # 赛事标题
-        'user.username',    # 参赛者用户名
-        'user.real_name',   # 参赛者真实姓名
-        'round_type',       # 比赛轮次
-        'rank',             # 排名
-        'score'             # 成绩（时间、分数等）
-    ]
-    # 定义Excel表格的表头
-    headers = ['赛事名称', '用户名', '姓名', '轮次', '排名', '成绩']
     # 构建文件名
     filename = build_filename('results_list', datetime.now())
 
-    return export_to_excel(queryset, fields, headers, filename)
+    return export_queryset(queryset, RESULT_EXPORT_FIELDS, RESULT_EXPORT_HEADERS, filename, file_type)
@@ -0,0 +1,237 @@
+"""
+稀疏字段集工具模块
+
+列表和详情接口支持按需返回字段：
+    GET /api/events/?fields=id,title,start_time
+    GET /api/registrations/?omit=event_title,reviewed_by_name
+
+裁剪同时作用于输出和查询：
+    - 序列化器只保留请求的字段，未请求的 SerializerMethodField 不会被计算
+    - 视图根据保留字段的来源推导 .only()，并只保留需要的 select_related / prefetch_related
+    - 某个字段无法推导出依赖（如未登记的 SerializerMethodField）时，
+      只裁剪输出，查询保持原样，保证结果正确
+
+使用示例:
+    class CommentSerializer(SparseFieldsetSerializerMixin, serializers.ModelSerializer):
+        # SerializerMethodField 需要登记依赖的模型字段路径
+        field_dependencies = {'content_type_name': ('content_type__model',)}
+
+    class CommentViewSet(SparseFieldsetViewSetMixin, viewsets.ModelViewSet):
+        ...
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+SPARSE_FIELDS_CONTEXT_KEY = 'sparse_fields'
+
+
+def parse_field_list(value):
+    """解析逗号分隔的字段列表，忽略空项"""
+    return [name.strip() for name in (value or '').split(',') if name.strip()]
+
+
+class FieldSelection:
+    """
+    一次请求的字段选择
+
+    属性说明:
+        fields: ?fields= 指定的字段，为空表示全部字段
+        omit: ?omit= 指定要排除的字段
+    """
+
+    def __init__(self, fields=(), omit=()):
+        self.fields = list(dict.fromkeys(fields))
+        self.omit = set(omit)
+
+    def __bool__(self):
+        return bool(self.fields or self.omit)
+
+    def apply(self, names):
+        """
+        计算要保留的字段
+
+        参数:
+            names: 序列化器的全部字段名
+
+        返回:
+            set: 保留的字段名；?fields= 中没有任何有效字段时视为未指定
+        """
+        names = set(names)
+        keep = names.intersection(self.fields) or names
+        return keep - self.omit
+
+
+class SparseFieldsetSerializerMixin:
+    """
+    稀疏字段集序列化器混入类
+
+    只有视图把字段选择放入 context[SPARSE_FIELDS_CONTEXT_KEY] 时才裁剪，
+    其他地方直接使用序列化器（如缓存快照、导出）时保持完整字段
+
+    属性说明:
+        field_dependencies: 字段名 -> 依赖的模型字段路径（如 'organizer__real_name'），
+                            用于 SerializerMethodField 或来源无法直接推导的字段
+    """
+    field_dependencies = {}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        selection = self.context.get(SPARSE_FIELDS_CONTEXT_KEY)
+        if selection:
+            keep = selection.apply(self.fields.keys())
+            for name in list(self.fields):
+                if name not in keep:
+                    self.fields.pop(name)
+
+
+def resolve_lookup(model, path):
+    """
+    把字段路径解析为查询优化参数
+
+    参数:
+        model: 起始模型
+        path: 以 __ 分隔的字段路径，如 'title'、'organizer__real_name'、'replies'
+
+    返回:
+        tuple: (only 路径列表, select_related 路径列表, prefetch_related 路径列表)；
+               无法解析（属性、方法、泛型外键等）时返回 None
+    """
+    parts = path.split('__')
+    only, select = [], []
+    current = model
+    for index, name in enumerate(parts):
+        try:
+            field = current._meta.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        lookup = '__'.join(parts[:index + 1])
+        last = index == len(parts) - 1
+
+        if not field.is_relation:
+            if not last:
+                return None
+            only.append(lookup)
+            return only, select, []
+
+        if not field.concrete or field.many_to_many:
+            # 反向关联与多对多只在第一层通过 prefetch_related 加载；泛型外键无法推导
+            if index == 0 and last and field.related_model is not None:
+                return [], [], [lookup]
+            return None
+
+        # 正向外键 / 一对一：外键列本身需要加载，继续向下时改为 JOIN
+        only.append(lookup)
+        if last:
+            return only, select, []
+        select.append(lookup)
+        current = field.related_model
+    return None
+
+
+def build_queryset_plan(serializer, model):
+    """
+    根据序列化器保留的字段推导查询优化参数
+
+    返回:
+        tuple: (only 集合, select_related 集合, prefetch_related 集合)；
+               存在无法推导的字段时返回 None
+    """
+    only, select, prefetch = {model._meta.pk.name}, set(), set()
+    dependencies = getattr(serializer, 'field_dependencies', {})
+    for name, field in serializer.fields.items():
+        if field.write_only:
+            continue
+        if name in dependencies:
+            paths = dependencies[name]
+        elif isinstance(field, serializers.SerializerMethodField) or field.source == '*':
+            return None
+        else:
+            paths = [field.source.replace('.', '__')]
+
+        for path in paths:
+            resolved = resolve_lookup(model, path)
+            if resolved is None:
+                return None
+            only.update(resolved[0])
+            select.update(resolved[1])
+            prefetch.update(resolved[2])
+    return only, select, prefetch
+
+
+class SparseFieldsetViewSetMixin:
+    """
+    稀疏字段集视图混入类
+
+    解析 ?fields= / ?omit= 参数，传给序列化器裁剪输出，
+    并在 filter_queryset() 中按保留字段裁剪查询
+
+    属性说明:
+        sparse_fieldset_actions: 支持字段选择的操作，默认只有列表和详情
+    """
+    sparse_fieldset_actions = ('list', 'retrieve')
+    fields_query_param = 'fields'
+    omit_query_param = 'omit'
+
+    def get_field_selection(self):
+        """
+        获取本次请求的字段选择
+
+        返回:
+            FieldSelection: 只读请求且为支持的操作时返回，否则为 None
+        """
+        if not hasattr(self, '_field_selection'):
+            selection = None
+            request = getattr(self, 'request', None)
+            if (request is not None and request.method in ('GET', 'HEAD')
+                    and self.action in self.sparse_fieldset_actions):
+                selection = FieldSelection(
+                    parse_field_list(request.query_params.get(self.fields_query_param)),
+                    parse_field_list(request.query_params.get(self.omit_query_param)),
+                ) or None
+            self._field_selection = selection
+        return self._field_selection
+
+    def wants_fields(self, *names):
+        """
+        判断响应中是否会包含给定字段中的任意一个
+
+        用于跳过只为这些字段服务的额外查询（如批量解析用户交互状态）
+        """
+        selection = self.get_field_selection()
+        if not selection:
+            return True
+        return bool(selection.apply(self.get_serializer().fields.keys()).intersection(names))
+
+    def get_serializer_context(self):
+        """在序列化器上下文中加入字段选择"""
+        context = super().get_serializer_context()
+        selection = self.get_field_selection()
+        if selection:
+            context[SPARSE_FIELDS_CONTEXT_KEY] = selection
+        return context
+
+    def filter_queryset(self, queryset):
+        """过滤后按字段选择裁剪查询"""
+        return self.trim_queryset(super().filter_queryset(queryset))
+
+    def trim_queryset(self, queryset):
+        """
+        按字段选择裁剪查询集
+
+        只加载保留字段依赖的列，去掉不需要的 JOIN 和预取；
+        游标分页依赖的排序字段总会被加载
+        """
+        if not self.get_field_selection():
+            return queryset
+        plan = build_queryset_plan(self.get_serializer(), queryset.model)
+        if plan is None:
+            return queryset
+        only, select, prefetch = plan
+        only.update(field.lstrip('-') for field in getattr(self.paginator, 'cursor_ordering', ()))
+        queryset = queryset.only(*only).select_related(None).prefetch_related(None)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
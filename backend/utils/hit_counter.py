@@ -0,0 +1,233 @@
+"""
+写后缓冲的浏览/点击计数器
+
+赛事点击、公告浏览、轮播图点击都是高频写操作，
+如果每次都对热点行执行 `count += 1; save()`，既会丢失并发更新，
+也会让热门行的行锁成为瓶颈。
+
+本模块把增量先累加在缓存中（cache.incr 为原子操作），
+再由定时刷新（请求中顺带触发或 `python manage.py flush_hit_counters`）
+按增量分组，批量执行 `UPDATE ... SET field = field + N`。
+读取时把缓冲中的增量合并到数据库值上，保证返回的总数接近实时。
+
+待刷新对象的登记:
+    对象在每个刷新周期内第一次被点击时，通过 cache.incr 原子地取得一个序号，
+    把 (计数器名称, 主键) 写入该序号对应的日志键 hits:log:<序号>；
+    每个写入方占用不同的键，多进程并发时不会互相覆盖。
+    刷新时读取上次刷新位置之后的日志（并回看少量已读位置，
+    补上取得序号后稍晚写入的日志），同一时间只有一个刷新在执行。
+
+注意:
+    默认的本地内存缓存只在单个进程内有效；
+    多进程部署时请把 CACHES 配置为 Redis 等共享缓存，
+    这样管理命令也能刷新所有进程写入的增量。
+"""
+from collections import defaultdict
+
+from django.apps import apps
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F
+
+
+KEY_PREFIX = 'hits'
+# 登记日志的序号与已刷新位置
+LOG_SEQ_KEY = f'{KEY_PREFIX}:log:seq'
+LOG_CURSOR_KEY = f'{KEY_PREFIX}:log:cursor'
+# 每次刷新回看的已读日志数量，补上取得序号与写入日志之间被跳过的记录
+LOG_LOOKBACK = 1000
+# 每次 get_many 读取的日志数量
+LOG_BATCH_SIZE = 1000
+# 刷新节流锁，同一时间窗口内只触发一次顺带刷新
+FLUSH_LOCK_KEY = f'{KEY_PREFIX}:flush-lock'
+# 刷新互斥锁，避免多个进程同时扣减同一份增量
+FLUSH_RUNNING_KEY = f'{KEY_PREFIX}:flush-running'
+FLUSH_RUNNING_TIMEOUT = 300
+# 登记标记的有效期（秒）；登记丢失时（如写入日志前进程退出），过期后下一次点击会重新登记
+MARKER_TTL = 3600
+
+
+def log_key(seq):
+    return f'{KEY_PREFIX}:log:{seq}'
+
+
+def _incr(key, amount=1):
+    """原子累加，键不存在或被淘汰时从 0 开始"""
+    cache.add(key, 0, timeout=None)
+    try:
+        return cache.incr(key, amount)
+    except ValueError:
+        # add 与 incr 之间键被淘汰，重新写入
+        cache.set(key, amount, timeout=None)
+        return amount
+
+
+class HitCounter:
+    """
+    单个模型字段的缓冲计数器
+
+    参数:
+        model: 模型类或 'app_label.ModelName' 字符串
+        field: 计数字段名，如 'view_count'、'click_count'
+
+    使用示例:
+        counter = HitCounter(Event, 'view_count')
+        counter.increment(event.pk)
+        total = counter.total(event)
+    """
+
+    def __init__(self, model, field):
+        if isinstance(model, str):
+            model = apps.get_model(model)
+        self.model = model
+        self.field = field
+        self.name = f'{model._meta.label_lower}.{field}'
+
+    def _delta_key(self, pk):
+        return f'{KEY_PREFIX}:{self.name}:{pk}'
+
+    def _marker_key(self, pk):
+        return f'{KEY_PREFIX}:{self.name}:{pk}:dirty'
+
+    def increment(self, pk, amount=1):
+        """
+        累加缓冲增量
+
+        参数:
+            pk: 对象主键
+            amount: 增量，默认为1
+
+        返回:
+            int: 该对象当前尚未刷新的增量
+        """
+        maybe_flush_all()
+        return self._add(pk, amount)
+
+    def _add(self, pk, amount):
+        delta = _incr(self._delta_key(pk), amount)
+
+        # 每个刷新周期内只在第一次增量时登记，减少日志写入
+        if cache.add(self._marker_key(pk), 1, timeout=MARKER_TTL):
+            cache.set(log_key(_incr(LOG_SEQ_KEY)), (self.name, pk), timeout=None)
+        return delta
+
+    def pending(self, pk):
+        """获取对象尚未刷新到数据库的增量"""
+        return cache.get(self._delta_key(pk)) or 0
+
+    def total(self, instance):
+        """
+        获取接近实时的总数
+
+        参数:
+            instance: 已从数据库加载的模型实例
+
+        返回:
+            int: 数据库中的值加上缓冲中的增量
+        """
+        return (getattr(instance, self.field) or 0) + self.pending(instance.pk)
+
+    def flush(self, pks):
+        """
+        把对象的缓冲增量批量写回数据库
+
+        相同增量的对象合并为一条 `UPDATE ... WHERE id IN (...)`，
+        并在同一个事务中执行
+
+        参数:
+            pks: 已登记的对象主键集合
+
+        返回:
+            int: 本次写入的总增量
+        """
+        if not pks:
+            return 0
+
+        # 先清除登记标记，之后的新增量会重新登记到下一轮
+        cache.delete_many([self._marker_key(pk) for pk in pks])
+        deltas = cache.get_many([self._delta_key(pk) for pk in pks])
+
+        grouped = defaultdict(list)
+        for pk in pks:
+            key = self._delta_key(pk)
+            delta = deltas.get(key) or 0
+            if delta <= 0:
+                continue
+            # 只扣减读到的部分，期间新增的点击保留在缓存中
+            cache.decr(key, delta)
+            grouped[delta].append(pk)
+
+        try:
+            with transaction.atomic():
+                for delta, delta_pks in grouped.items():
+                    self.model.objects.filter(pk__in=delta_pks).update(
+                        **{self.field: F(self.field) + delta}
+                    )
+        except Exception:
+            # 写库失败时把增量还回缓存，等待下次刷新
+            for delta, delta_pks in grouped.items():
+                for pk in delta_pks:
+                    self._add(pk, delta)
+            raise
+
+        return sum(delta * len(delta_pks) for delta, delta_pks in grouped.items())
+
+
+def read_dirty_log():
+    """
+    读取并删除待刷新的登记日志
+
+    返回:
+        dict: 计数器名称 -> 主键集合
+    """
+    last_seq = cache.get(LOG_SEQ_KEY) or 0
+    cursor = cache.get(LOG_CURSOR_KEY) or 0
+    if cursor > last_seq:
+        # 序号被淘汰后重新从 1 开始
+        cursor = 0
+    start = max(1, cursor - LOG_LOOKBACK + 1)
+
+    dirty = defaultdict(set)
+    for batch_start in range(start, last_seq + 1, LOG_BATCH_SIZE):
+        keys = [log_key(seq) for seq in range(batch_start, min(batch_start + LOG_BATCH_SIZE, last_seq + 1))]
+        entries = cache.get_many(keys)
+        for name, pk in entries.values():
+            dirty[name].add(pk)
+        cache.delete_many(list(entries))
+    cache.set(LOG_CURSOR_KEY, last_seq, timeout=None)
+    return dirty
+
+
+def flush_all():
+    """
+    刷新所有存在待写入增量的计数器
+
+    其他进程正在刷新时直接返回
+
+    返回:
+        dict: 计数器名称 -> 本次写入的总增量
+    """
+    if not cache.add(FLUSH_RUNNING_KEY, 1, timeout=FLUSH_RUNNING_TIMEOUT):
+        return {}
+    try:
+        dirty = read_dirty_log()
+        flushed = {}
+        for name in sorted(dirty):
+            label, field = name.rsplit('.', 1)
+            flushed[name] = HitCounter(label, field).flush(dirty[name])
+        return flushed
+    finally:
+        cache.delete(FLUSH_RUNNING_KEY)
+
+
+def maybe_flush_all():
+    """
+    按 HIT_COUNTER_FLUSH_INTERVAL 节流的顺带刷新
+
+    每个时间窗口内只有第一个请求会执行刷新；
+    间隔设置为 0 时关闭顺带刷新，完全依赖管理命令
+    """
+    interval = getattr(settings, 'HIT_COUNTER_FLUSH_INTERVAL', 30)
+    if interval and cache.add(FLUSH_LOCK_KEY, 1, timeout=interval):
+        flush_all()
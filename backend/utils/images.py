@@ -0,0 +1,280 @@
+"""
+图片处理工具模块
+
+上传的赛事、公告、轮播图图片和用户头像统一经过以下处理：
+    - 按内容哈希命名，同一张图片重复上传只保存一份
+    - 在后台线程池中生成多种尺寸的 WebP / JPEG 缩略图（不阻塞上传请求）
+    - 序列化器通过 ImageVariantsField 输出各尺寸的地址，列表页可直接加载小图
+
+存储位置:
+    - 赛事、公告、轮播图图片保存在前端 public 目录（FRONTEND_PUBLIC_DIR）下，
+      数据库中保存 '/images/<分类>/<文件名>' 形式的相对路径
+    - 用户头像保存在 MEDIA_ROOT 下，数据库中保存存储名称
+    - 缩略图保存在原图所在目录的 variants/ 子目录中：
+      <原文件名>_<尺寸名>.webp / .jpg
+
+历史图片可通过 `python manage.py generate_image_variants` 补生成缩略图
+"""
+import hashlib
+import logging
+import os
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+from PIL import Image, ImageOps, UnidentifiedImageError
+from rest_framework import serializers
+
+from .background import submit
+
+
+logger = logging.getLogger(__name__)
+
+# 缩略图尺寸（最大宽, 最大高），按比例缩放，不会放大
+IMAGE_VARIANTS = {
+    'thumbnail': (200, 200),
+    'card': (640, 400),
+    'hero': (1600, 900),
+}
+# 输出格式: 文件扩展名 -> (Pillow 格式名, 保存参数)
+VARIANT_FORMATS = {
+    'webp': ('WEBP', {'quality': 80, 'method': 4}),
+    'jpg': ('JPEG', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+VARIANT_DIR = 'variants'
+PUBLIC_IMAGE_PREFIX = '/images/'
+
+
+def get_public_dir():
+    """前端 public 目录（上传的赛事、公告、轮播图图片保存在其 images/ 子目录下）"""
+    return getattr(settings, 'FRONTEND_PUBLIC_DIR', os.path.join(settings.BASE_DIR, '..', 'frontend', 'public'))
+
+
+def content_hash(file):
+    """
+    计算上传文件的内容哈希
+
+    参数:
+        file: 上传文件或已打开的文件对象，计算后读取位置复位
+
+    返回:
+        str: 32位十六进制哈希
+    """
+    digest = hashlib.sha256()
+    if hasattr(file, 'chunks'):
+        for chunk in file.chunks():
+            digest.update(chunk)
+    else:
+        for chunk in iter(lambda: file.read(64 * 1024), b''):
+            digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()[:32]
+
+
+def get_extension(filename, default='jpg'):
+    """获取小写文件扩展名"""
+    extension = os.path.splitext(filename or '')[1].lstrip('.').lower()
+    return extension or default
+
+
+def save_public_image(image_file, category, prefix):
+    """
+    把上传的图片保存到前端 public 目录并安排生成缩略图
+
+    文件名由内容哈希决定，相同内容的图片直接复用已有文件
+
+    参数:
+        image_file: 已通过类型和大小校验的上传文件
+        category: 分类目录，如 'events'、'announcements'、'carousel'
+        prefix: 文件名前缀，如 'event'
+
+    返回:
+        str: '/images/<分类>/<文件名>' 形式的相对路径
+    """
+    filename = f'{prefix}_{content_hash(image_file)}.{get_extension(image_file.name)}'
+    relative_path = f'{PUBLIC_IMAGE_PREFIX}{category}/{filename}'
+    file_path = locate_image(relative_path)[0]
+
+    if not os.path.exists(file_path):
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        # 先写临时文件再改名，避免并发上传同一图片时读到半个文件
+        temp_path = f'{file_path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb+') as destination:
+            for chunk in image_file.chunks():
+                destination.write(chunk)
+        os.replace(temp_path, file_path)
+
+    schedule_variants(relative_path)
+    return relative_path
+
+
+def locate_image(image_path):
+    """
+    定位图片文件
+
+    参数:
+        image_path: 数据库中保存的值（public 相对路径或 MEDIA 存储名称）
+
+    返回:
+        tuple: (文件系统路径, 访问URL)；外部链接或空值返回 None
+    """
+    image_path = str(image_path or '')
+    if not image_path or '://' in image_path or image_path.startswith('//'):
+        return None
+    if image_path.startswith(PUBLIC_IMAGE_PREFIX):
+        return os.path.join(get_public_dir(), image_path.lstrip('/')), image_path
+    name = image_path.lstrip('/')
+    if name.startswith(settings.MEDIA_URL.lstrip('/')):
+        name = name[len(settings.MEDIA_URL.lstrip('/')):]
+    return os.path.join(settings.MEDIA_ROOT, name), f'{settings.MEDIA_URL}{name}'
+
+
+def variant_path(path, variant, extension):
+    """根据原图路径（文件路径或URL）计算缩略图路径"""
+    directory, filename = os.path.split(path)
+    stem = os.path.splitext(filename)[0]
+    return f'{directory}/{VARIANT_DIR}/{stem}_{variant}.{extension}'
+
+
+def generate_variants(image_path, force=False):
+    """
+    生成图片的全部缩略图
+
+    参数:
+        image_path: 数据库中保存的图片路径
+        force: 为 True 时覆盖已存在的缩略图
+
+    返回:
+        int: 新生成的文件数量；原图不存在或无法识别时返回 0
+    """
+    located = locate_image(image_path)
+    if located is None or not os.path.exists(located[0]):
+        return 0
+    source = located[0]
+
+    targets = [
+        (variant, size, extension)
+        for variant, size in IMAGE_VARIANTS.items()
+        for extension in VARIANT_FORMATS
+        if force or not os.path.exists(variant_path(source, variant, extension))
+    ]
+    if not targets:
+        return 0
+
+    try:
+        with Image.open(source) as original:
+            # 动图只取第一帧；按 EXIF 方向摆正
+            original.seek(0)
+            image = ImageOps.exif_transpose(original)
+            image.load()
+        if image.mode not in ('RGB', 'RGBA'):
+            # 调色板、灰度等模式先转换，保证缩放质量
+            image = image.convert('RGBA')
+    except (UnidentifiedImageError, OSError) as exc:
+        logger.warning('无法处理图片 %s: %s', image_path, exc)
+        return 0
+
+    os.makedirs(os.path.join(os.path.dirname(source), VARIANT_DIR), exist_ok=True)
+    resized = {}
+    for variant, size, extension in targets:
+        if variant not in resized:
+            copy = image.copy()
+            copy.thumbnail(size, Image.LANCZOS)
+            resized[variant] = copy
+        pil_format, options = VARIANT_FORMATS[extension]
+        output = resized[variant]
+        if pil_format == 'JPEG' and output.mode == 'RGBA':
+            # JPEG 不支持透明通道，铺白色背景
+            background = Image.new('RGB', output.size, (255, 255, 255))
+            background.paste(output, mask=output.getchannel('A'))
+            output = background
+
+        target = variant_path(source, variant, extension)
+        temp_path = f'{target}.{os.getpid()}.tmp'
+        output.save(temp_path, pil_format, **options)
+        os.replace(temp_path, target)
+    return len(targets)
+
+
+def schedule_variants(image_path):
+    """在后台线程池中生成缩略图"""
+    if image_path:
+        submit(generate_variants, str(image_path))
+
+
+def image_variant_urls(image_path):
+    """
+    获取图片各尺寸缩略图的地址
+
+    参数:
+        image_path: 数据库中保存的图片路径
+
+    返回:
+        dict: {'thumbnail': {'webp': url, 'jpg': url}, 'card': {...}, 'hero': {...}}；
+              缩略图尚未生成（或为外部链接）时返回 None，前端使用原图
+    """
+    located = locate_image(image_path)
+    if located is None:
+        return None
+    source, url = located
+    # 各尺寸在同一任务中生成，以最后生成的文件判断是否已全部就绪
+    last_variant = list(IMAGE_VARIANTS)[-1]
+    last_extension = list(VARIANT_FORMATS)[-1]
+    if not os.path.exists(variant_path(source, last_variant, last_extension)):
+        return None
+    return {
+        variant: {extension: variant_path(url, variant, extension) for extension in VARIANT_FORMATS}
+        for variant in IMAGE_VARIANTS
+    }
+
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """
+    缩略图地址字段
+
+    使用示例:
+        cover_image_variants = ImageVariantsField(source='cover_image')
+    """
+
+    def to_representation(self, value):
+        return image_variant_urls(getattr(value, 'name', value))
+
+
+@deconstructible
+class ContentHashUploadTo:
+    """
+    按内容哈希命名的 upload_to
+
+    参数:
+        prefix: 存储目录，如 'avatars'
+        field_name: 文件字段名，用于读取待保存的文件内容
+    """
+
+    def __init__(self, prefix, field_name):
+        self.prefix = prefix
+        self.field_name = field_name
+
+    def __call__(self, instance, filename):
+        digest = content_hash(getattr(instance, self.field_name).file)
+        return f'{self.prefix}/{digest[:2]}/{digest}.{get_extension(filename)}'
+
+    def __eq__(self, other):
+        return (isinstance(other, ContentHashUploadTo)
+                and (self.prefix, self.field_name) == (other.prefix, other.field_name))
+
+
+@deconstructible
+class ContentHashStorage(FileSystemStorage):
+    """
+    内容去重存储
+
+    配合 ContentHashUploadTo 使用：同名文件内容必然相同，已存在时直接复用
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+        return super()._save(name, content)
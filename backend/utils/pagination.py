@@ -2,7 +2,17 @@
 分页工具模块
 提供自定义的分页类，用于API响应的分页处理
 """
+import base64
+import binascii
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class CustomPageNumberPagination(PageNumberPagination):
@@ -21,3 +31,148 @@ class CustomPageNumberPagination(PageNumberPagination):
     """
     page_size_query_param = 'page_size'  # 允许客户端通过URL参数控制每页大小
     max_page_size = 1000  # 限制每页最多返回1000条记录
+
+
+class CursorOrPageNumberPagination(CustomPageNumberPagination):
+    """
+    可选游标（键集）分页类
+
+    默认行为与 CustomPageNumberPagination 完全一致；
+    当请求带有 ?cursor= 参数时切换为键集分页：
+        - 按 (created_at, id) 稳定排序，用 WHERE 条件定位下一页，不使用 OFFSET
+        - 不执行 COUNT(*)，响应中没有 count 字段
+        - 深翻页的耗时与第一页基本相同
+
+    属性说明:
+        cursor_query_param: 游标参数名，空值表示从第一页开始
+        cursor_ordering: 键集排序字段，两个字段方向必须一致
+
+    使用示例:
+        GET /api/registrations/?cursor=&page_size=20
+        # 返回第一页，以及 next 链接中的游标
+        GET /api/registrations/?cursor=eyJjIjogIjIwMj...&page_size=20
+        # 按游标继续翻页
+
+    注意:
+        游标模式下排序固定为 cursor_ordering，?ordering 参数不生效
+    """
+    cursor_query_param = 'cursor'
+    cursor_ordering = ('-created_at', '-id')
+    invalid_cursor_message = '无效的游标'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """根据是否带有游标参数选择分页方式"""
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        position = self.decode_cursor(request)
+        key_fields = [field.lstrip('-') for field in self.cursor_ordering]
+        descending = self.cursor_ordering[0].startswith('-')
+        reverse = bool(position and position[2])
+        # 向前翻页时先按相反方向取数据，再把结果翻转回来
+        forward = descending != reverse
+
+        if position:
+            queryset = queryset.filter(self.build_keyset_filter(key_fields, position[:2], forward))
+        ordering = [f'-{field}' if forward else field for field in key_fields]
+        rows = list(queryset.order_by(*ordering)[:page_size + 1])
+
+        has_more = len(rows) > page_size
+        rows = rows[:page_size]
+        if reverse:
+            rows.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        self.page_rows = rows
+        return rows
+
+    def build_keyset_filter(self, key_fields, values, descending):
+        """
+        构造键集定位条件
+
+        (created_at, id) < (c, i) 展开为
+        created_at < c OR (created_at = c AND id < i)
+        """
+        lookup = 'lt' if descending else 'gt'
+        (first, second), (first_value, second_value) = key_fields, values
+        return Q(**{f'{first}__{lookup}': first_value}) | Q(
+            **{first: first_value, f'{second}__{lookup}': second_value}
+        )
+
+    def make_cursor(self, row, reverse=False):
+        """
+        把一行数据的键值编码为游标
+
+        参数:
+            row: 模型实例
+            reverse: 是否为向前翻页的游标
+
+        返回:
+            str: base64 编码的游标
+        """
+        first, second = (getattr(row, field.lstrip('-')) for field in self.cursor_ordering)
+        payload = {'c': first.isoformat(), 'i': second, 'r': int(reverse)}
+        return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode()
+
+    def encode_cursor(self, row, reverse):
+        """把一行数据的键值编码为游标链接"""
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.make_cursor(row, reverse))
+
+    def decode_cursor(self, request):
+        """
+        解析游标参数
+
+        返回:
+            tuple: (created_at, id, reverse)，游标为空时返回 None
+
+        异常:
+            NotFound: 游标格式无效
+        """
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            created_at = parse_datetime(payload['c'])
+            row_id = int(payload['i'])
+            reverse = bool(payload.get('r'))
+        except (binascii.Error, ValueError, TypeError, KeyError, UnicodeDecodeError):
+            raise NotFound(self.invalid_cursor_message)
+        if created_at is None:
+            raise NotFound(self.invalid_cursor_message)
+        return created_at, row_id, reverse
+
+    def get_next_link(self):
+        if not getattr(self, 'use_cursor', False):
+            return super().get_next_link()
+        if not self.has_next or not self.page_rows:
+            return None
+        return self.encode_cursor(self.page_rows[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not getattr(self, 'use_cursor', False):
+            return super().get_previous_link()
+        if not self.has_previous or not self.page_rows:
+            return None
+        return self.encode_cursor(self.page_rows[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        """游标模式下不返回 count，避免 COUNT(*) 查询"""
+        if not getattr(self, 'use_cursor', False):
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))